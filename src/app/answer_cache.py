@@ -0,0 +1,188 @@
+# app/answer_cache.py
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from src.app.config import INGEST_MANIFEST_PATH
+from src.app.dates import MONTHS, WEEKDAYS
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+# Cosine similarity above which a different wording counts as the same question
+# (ada-002 puts "hours on Saturday" and "hours on Sunday" around 0.96)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.98"))
+# Cached answers are dropped when anything under this directory (or the index
+# manifest, rewritten by each ingestion run) changes
+KNOWLEDGE_BASE_DIR = Path(
+    os.getenv(
+        "KNOWLEDGE_BASE_DIR", Path(__file__).resolve().parents[2] / "data_collected"
+    )
+)
+# How often the knowledge base is checked for changes
+KNOWLEDGE_BASE_CHECK_SECONDS = 60
+
+
+def normalize_query(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def key_terms(normalized):
+    """Weekdays, months and numbers in a normalized query.
+
+    Embeddings barely tell these apart, so a similar wording only counts as the
+    same question when they agree.
+    """
+    terms = set()
+    for word in normalized.split():
+        if word not in WEEKDAYS and word.endswith("s") and word[:-1] in WEEKDAYS:
+            word = word[:-1]  # "saturdays", "sabados"
+        if word in WEEKDAYS:
+            terms.add(("weekday", WEEKDAYS[word]))
+        elif word in MONTHS:
+            terms.add(("month", MONTHS[word]))
+        elif any(char.isdigit() for char in word):
+            terms.add(word)
+    return terms
+
+
+def knowledge_base_version(directory=KNOWLEDGE_BASE_DIR, manifest=INGEST_MANIFEST_PATH):
+    """Fingerprint of the knowledge base files and index manifest (sizes, mtimes)"""
+    paths = sorted(directory.rglob("*")) if directory.exists() else []
+    paths.append(Path(manifest))
+    return hash(
+        tuple(
+            (str(path), stat.st_size, stat.st_mtime_ns)
+            for path in paths
+            if path.is_file() and not path.name.startswith(".")
+            for stat in [path.stat()]
+        )
+    )
+
+
+class AnswerCache:
+    """LRU + TTL cache of answers, keyed on normalized text with an embedding fallback.
+
+    Exact repeats are a dict lookup. Other wordings are matched by cosine
+    similarity against a matrix of cached query embeddings (one matrix-vector
+    product per lookup), and must mention the same key terms.
+    """
+
+    def __init__(
+        self,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        ttl=ANSWER_CACHE_TTL_SECONDS,
+        threshold=ANSWER_CACHE_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # normalized query -> (expires, answer, vector)
+        self._matrix = None  # rows: unit vectors of _matrix_keys
+        self._matrix_keys = []
+        self._kb_version = knowledge_base_version()
+        self._kb_checked = time.monotonic()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _check_knowledge_base(self, now):
+        if now - self._kb_checked < KNOWLEDGE_BASE_CHECK_SECONDS:
+            return
+        self._kb_checked = now
+        version = knowledge_base_version()
+        if version != self._kb_version:
+            self._kb_version = version
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop every cached answer (the knowledge base changed)"""
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+
+    def get(self, query):
+        """Cached answer for exactly this (normalized) query, or None"""
+        now = time.monotonic()
+        self._check_knowledge_base(now)
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def get_similar(self, embedding, query=None):
+        """Cached answer for the most similar query above the threshold, or None"""
+        if self._matrix is None:
+            self._build_matrix()
+        if not self._matrix_keys:
+            self.misses += 1
+            return None
+        vector = _unit(embedding)
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        key = self._matrix_keys[best]
+        entry = self._entries.get(key)
+        if (
+            scores[best] < self.threshold
+            or entry is None
+            or entry[0] <= time.monotonic()
+            or (
+                query is not None
+                and key_terms(normalize_query(query)) != key_terms(key)
+            )
+        ):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.semantic_hits += 1
+        return entry[1]
+
+    def put(self, query, embedding, answer):
+        now = time.monotonic()
+        key = normalize_query(query)
+        vector = _unit(embedding) if embedding is not None else None
+        self._entries.pop(key, None)
+        self._entries[key] = (now + self.ttl, answer, vector)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        # Rebuilt lazily on the next similarity lookup
+        self._matrix = None
+
+    def _build_matrix(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        rows = [
+            (key, entry[2])
+            for key, entry in self._entries.items()
+            if entry[2] is not None
+        ]
+        self._matrix_keys = [key for key, _ in rows]
+        self._matrix = (
+            np.vstack([vector for _, vector in rows]) if rows else np.empty((0, 0))
+        )
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+
+def _unit(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+answer_cache = AnswerCache()
@@ -1,20 +1,12 @@
 # app/config.py
+import functools
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.core import (
-    Settings,
-    VectorStoreIndex,
-    get_response_synthesizer,
-    PromptTemplate,
-)
-from llama_index.vector_stores.pinecone import PineconeVectorStore
-from llama_index.core import VectorStoreIndex
-from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.query_engine import RetrieverQueryEngine
-from pinecone import Pinecone
 
+logger = logging.getLogger(__name__)
 
 # ============== CONFIGURATION ==============
 # Load environment variables
@@ -23,22 +15,43 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Model and embeddings configuration
-client = OpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY, temperature=0)
-embedding = OpenAIEmbedding(model="text-embedding-ada-002")
-Settings.llm = client
-Settings.embed_model = embedding
-Settings.chunk_size_limit = 1536
+# Concurrency limits
+# Max number of RAG queries running at the same time (OpenAI/Pinecone round trips)
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", "4"))
+# Max number of Telegram updates processed concurrently by the application
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+
+# Stream LLM answers into the chat as they are generated
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "1") == "1"
+
+# Telegram user ids allowed to run admin commands (comma separated)
+ADMIN_USER_IDS = {
+    int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id
+}
+
+# Vector store backend: "pinecone" (remote cuschatai index) or "local" (in-process)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+# Directory the local vector store is persisted to / memory-mapped from
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "vector_store")
+# The local store switches from exact to IVF search at this many vectors
+LOCAL_VECTOR_IVF_MIN = int(os.getenv("LOCAL_VECTOR_IVF_MIN", "10000"))
+# Ids of the chunks in the index, written by `python -m src.app.ingest`
+INGEST_MANIFEST_PATH = os.getenv(
+    "INGEST_MANIFEST_PATH",
+    (
+        os.path.join(LOCAL_VECTOR_STORE_PATH, "manifest.json")
+        if VECTOR_BACKEND == "local"
+        else "pinecone_manifest.json"
+    ),
+)
 
-# Pinecone connection
-pinecone_client = Pinecone(api_key=PINECONE_API_KEY)
-index_name = "cuschatai"
-pinecone_index = pinecone_client.Index(index_name)
-vector_store = PineconeVectorStore(pinecone_index)
+# Load the date parser and build the intent model, FAQ matcher and RAG pipeline
+# in a background thread right after startup
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
 
-# Retriever and Query Engine setup
-index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
-retriever = VectorIndexRetriever(index=index, similarity_top_k=5)
+# Seconds spent building each component (nested components are included in
+# their parent's time), reported at startup
+STARTUP_TIMINGS = {}
 
 # Custom prompt template
 prompt_template = (
@@ -50,10 +63,128 @@ prompt_template = (
     "If it's about appointments, suggest a time 🗓️ and ask if the user wants to confirm ✅. "
     "If it's about services, answer briefly. If it is something unrelated, respond concisely with a helpful emoji 😊."
 )
-qa_template = PromptTemplate(template=prompt_template)
-response_synthesizer = get_response_synthesizer(
-    llm=client, text_qa_template=qa_template, response_mode="compact"
-)
-query_engine = RetrieverQueryEngine(
-    retriever=retriever, response_synthesizer=response_synthesizer
-)
+
+
+def lazy(factory):
+    """Build a component on first use (thread-safe) and record how long it took"""
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(factory)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    started = time.perf_counter()
+                    built.append(factory())
+                    STARTUP_TIMINGS[factory.__name__] = time.perf_counter() - started
+        return built[0]
+
+    return get
+
+
+# Heavy llama_index / pinecone imports happen inside the factories, so importing
+# this module (and answering menu interactions) never waits on RAG setup
+
+
+@lazy
+def get_llm():
+    """Model configuration"""
+    from llama_index.core import Settings
+    from llama_index.llms.openai import OpenAI
+
+    client = OpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY, temperature=0)
+    Settings.llm = client
+    Settings.chunk_size_limit = 1536
+    return client
+
+
+@lazy
+def get_embed_model():
+    """Embeddings configuration"""
+    from llama_index.core import Settings
+    from llama_index.embeddings.openai import OpenAIEmbedding
+    from src.app.embedding_cache import CachedEmbedding
+
+    # Texts already embedded (by earlier queries or ingestion) are read from disk
+    embedding = CachedEmbedding(OpenAIEmbedding(model="text-embedding-ada-002"))
+    Settings.embed_model = embedding
+    return embedding
+
+
+@lazy
+def get_vector_store():
+    """Vector store selected by VECTOR_BACKEND"""
+    if VECTOR_BACKEND == "local":
+        from src.app.local_vector_store import LocalVectorStore
+
+        return LocalVectorStore(
+            persist_dir=LOCAL_VECTOR_STORE_PATH, ivf_min_vectors=LOCAL_VECTOR_IVF_MIN
+        )
+
+    # Pinecone connection
+    from pinecone import Pinecone
+    from src.app.vector_stores import pinecone_vector_store
+
+    pinecone_client = Pinecone(api_key=PINECONE_API_KEY)
+    index_name = "cuschatai"
+    pinecone_index = pinecone_client.Index(index_name)
+    return pinecone_vector_store(pinecone_index)
+
+
+@lazy
+def get_retriever():
+    """Retriever over the vector store"""
+    from llama_index.core import VectorStoreIndex
+    from llama_index.core.retrievers import VectorIndexRetriever
+
+    index = VectorStoreIndex.from_vector_store(
+        vector_store=get_vector_store(), embed_model=get_embed_model()
+    )
+    return VectorIndexRetriever(index=index, similarity_top_k=5)
+
+
+@lazy
+def get_query_engine():
+    """Retriever and Query Engine setup"""
+    from llama_index.core import PromptTemplate, get_response_synthesizer
+    from llama_index.core.query_engine import RetrieverQueryEngine
+
+    qa_template = PromptTemplate(template=prompt_template)
+    response_synthesizer = get_response_synthesizer(
+        llm=get_llm(),
+        text_qa_template=qa_template,
+        response_mode="compact",
+        streaming=STREAM_ANSWERS,
+    )
+    return RetrieverQueryEngine(
+        retriever=get_retriever(), response_synthesizer=response_synthesizer
+    )
+
+
+def warm_up():
+    """Load the date parser and build the models now instead of on first use"""
+    try:
+        from src.app.dates import warm_up_date_parser
+        from src.app.faq import get_faq_matcher
+        from src.app.intents import get_intent_classifier
+
+        warm_up_date_parser()
+        get_intent_classifier()
+        get_faq_matcher()
+        get_query_engine()
+        logger.info(f"RAG pipeline warmed up: {format_timings()}")
+    except Exception as e:
+        logger.error(f"Error warming up RAG pipeline: {e}")
+
+
+def start_warm_up():
+    """Warm up in a background thread so the bot can answer right away"""
+    if WARM_UP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def format_timings():
+    return ", ".join(
+        f"{name}={seconds * 1000:.0f}ms" for name, seconds in STARTUP_TIMINGS.items()
+    )
@@ -0,0 +1,225 @@
+# app/dates.py
+import datetime
+import functools
+import os
+import re
+import unicodedata
+import pytz
+
+# Timezone from environment variable
+TIMEZONE = os.getenv("TIMEZONE", "America/Mexico_City")
+# Languages dateparser tries (pinned, so it never runs language detection)
+DATE_LANGUAGES = os.getenv("DATE_LANGUAGES", "en,es").split(",")
+# Parsed dates remembered per (text, reference minute, timezone)
+DATE_CACHE_SIZE = 4096
+
+RELATIVE_DAYS = {
+    "today": 0,
+    "hoy": 0,
+    "tomorrow": 1,
+    "manana": 1,
+    "day after tomorrow": 2,
+    "the day after tomorrow": 2,
+    "pasado manana": 2,
+}
+WEEKDAYS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("monday", "mon", "lunes"),
+            ("tuesday", "tue", "tues", "martes"),
+            ("wednesday", "wed", "miercoles"),
+            ("thursday", "thu", "thurs", "jueves"),
+            ("friday", "fri", "viernes"),
+            ("saturday", "sat", "sabado"),
+            ("sunday", "sun", "domingo"),
+        ]
+    )
+    for name in names
+}
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("january", "jan", "enero", "ene"),
+            ("february", "feb", "febrero"),
+            ("march", "mar", "marzo"),
+            ("april", "apr", "abril", "abr"),
+            ("may", "mayo"),
+            ("june", "jun", "junio"),
+            ("july", "jul", "julio"),
+            ("august", "aug", "agosto", "ago"),
+            ("september", "sep", "sept", "septiembre", "setiembre"),
+            ("october", "oct", "octubre"),
+            ("november", "nov", "noviembre"),
+            ("december", "dec", "diciembre", "dic"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+
+def _alternatives(names):
+    # Longest first, so "tues" isn't matched as "tue" + leftovers
+    return "|".join(sorted(map(re.escape, names), key=len, reverse=True))
+
+
+_DATE = (
+    r"(?:(?:on|for|el|para el|para)\s+)?"
+    rf"(?:(?P<relative>{_alternatives(RELATIVE_DAYS)})"
+    rf"|(?:(?P<next>next|this|proximo|este)\s+)?(?P<weekday>{_alternatives(WEEKDAYS)})"
+    rf"|(?P<month>{_alternatives(MONTHS)})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?"
+    r"(?:\s+(?P<year>\d{4}))?"
+    r"|(?P<day2>\d{1,2})(?:st|nd|rd|th)?\s+(?:de\s+)?"
+    rf"(?P<month2>{_alternatives(MONTHS)})(?:\s+(?:de\s+)?(?P<year2>\d{{4}}))?"
+    r"|(?P<iso>\d{4}-\d{2}-\d{2}))"
+)
+_TIME = (
+    r"(?:(?P<at>at|a las|a la|@)\s+)?"
+    r"(?:(?P<noon>noon|midday|mediodia)"
+    r"|(?P<hour>\d{1,2})(?:[:.h](?P<minute>\d{2}))?\s*(?P<meridiem>[ap])\.?\s*m\.?"
+    r"|(?P<hour24>\d{1,2})[:.h](?P<minute24>\d{2})"
+    r"|(?P<bare>\d{1,2}))"
+    r"(?:\s+(?:in the|de la|en la|por la)\s+(?P<period>morning|afternoon|evening"
+    r"|manana|tarde|noche))?"
+    r"(?:\s+(?:hrs|hs|horas|o'clock|oclock))?"
+)
+# "tomorrow at 3pm" / "3pm tomorrow" / "at 3pm"
+_PATTERNS = [
+    re.compile(rf"^(?:{_DATE}\s+)?{_TIME}$"),
+    re.compile(rf"^{_TIME}\s+{_DATE}$"),
+]
+
+
+def normalize_date_text(text):
+    """Lowercase, strip accents and sentence punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[,;!?¿¡]", " ", text)
+    return " ".join(text.split()).strip(" .")
+
+
+def _time_of_day(match):
+    """(hour, minute) of the time part, or None if it's not a valid time"""
+    if match["noon"]:
+        return 12, 0
+    if match["hour"]:
+        hour, minute = int(match["hour"]), int(match["minute"] or 0)
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if match["meridiem"] == "p" else 0)
+    else:
+        if match["hour24"]:
+            hour, minute = int(match["hour24"]), int(match["minute24"])
+            # A zero-padded "03:30" is an explicit 24-hour time
+            padded = match["hour24"].startswith("0")
+        else:
+            hour, minute, padded = int(match["bare"]), 0, False
+        if match["period"] is None and 1 <= hour < 8 and not padded:
+            # "a las 3", "at 3:30": nobody books at 3am, business hours start after 8
+            hour += 12
+    if match["period"] in ("afternoon", "evening", "tarde", "noche") and hour < 12:
+        hour += 12
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return hour, minute
+
+
+def _day(match, today, time_of_day, now):
+    """Calendar day of the date part (the next one, when only a weekday is given)"""
+    if match["relative"]:
+        return today + datetime.timedelta(days=RELATIVE_DAYS[match["relative"]])
+    if match["weekday"]:
+        days = (WEEKDAYS[match["weekday"]] - today.weekday()) % 7
+        if days == 0 and (match["next"] in ("next", "proximo") or time_of_day <= now):
+            days = 7
+        return today + datetime.timedelta(days=days)
+    if match["iso"]:
+        return datetime.date.fromisoformat(match["iso"])
+    month = MONTHS[match["month"] or match["month2"]]
+    day = int(match["day"] or match["day2"])
+    year = match["year"] or match["year2"]
+    if year:
+        return datetime.date(int(year), month, day)
+    candidate = datetime.date(today.year, month, day)
+    if (candidate, time_of_day) <= (today, now):
+        candidate = datetime.date(today.year + 1, month, day)
+    return candidate
+
+
+def parse_fast(text, now):
+    """Parse common "<day> at <time>" phrasings (English and Spanish) without dateparser.
+
+    `text` must be normalized and `now` naive local time. Returns a naive local
+    datetime, or None when the text isn't one of the recognized forms.
+    """
+    for pattern in _PATTERNS:
+        match = pattern.match(text)
+        if match:
+            break
+    else:
+        return None
+    time_of_day = _time_of_day(match)
+    if time_of_day is None:
+        return None
+    time_of_day = datetime.time(*time_of_day)
+    try:
+        if any(
+            match[group] for group in ("relative", "weekday", "month", "month2", "iso")
+        ):
+            day = _day(match, now.date(), time_of_day, now.time())
+        elif match["bare"] and not match["at"]:
+            # A lone number is more likely a day of the month than a time
+            return None
+        else:
+            # Only a time: the next time the clock shows it
+            day = now.date()
+            if time_of_day <= now.time():
+                day += datetime.timedelta(days=1)
+    except ValueError:  # e.g. February 30
+        return None
+    return datetime.datetime.combine(day, time_of_day)
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse(text, reference, timezone):
+    parsed = parse_fast(text, reference)
+    if parsed is None:
+        import dateparser
+
+        parsed = dateparser.parse(
+            text,
+            languages=DATE_LANGUAGES,
+            settings={
+                "PREFER_DATES_FROM": "future",
+                # Relative dates ("in 2 hours") count from local time, not the server's
+                "RELATIVE_BASE": reference,
+                "TIMEZONE": timezone,
+                "RETURN_AS_TIMEZONE_AWARE": False,
+            },
+        )
+    if parsed is None:
+        return None
+    tz = pytz.timezone(timezone)
+    if parsed.tzinfo is not None:
+        return parsed.astimezone(tz)
+    return tz.localize(parsed)
+
+
+def parse_date(text, now=None, timezone=TIMEZONE):
+    """Timezone-aware datetime for a user's date/time message, or None.
+
+    Results are cached per (normalized text, minute, timezone), so repeats and
+    retries within the same minute cost a dict lookup.
+    """
+    tz = pytz.timezone(timezone)
+    now = now.astimezone(tz) if now is not None else datetime.datetime.now(tz)
+    reference = now.replace(second=0, microsecond=0, tzinfo=None)
+    return _parse(normalize_date_text(text), reference, timezone)
+
+
+def warm_up_date_parser():
+    """Import dateparser and load its language data before the first user needs it"""
+    parse_date("in two hours")
+    parse_date("dentro de dos horas")
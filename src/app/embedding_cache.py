@@ -0,0 +1,204 @@
+# app/embedding_cache.py
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+# "float32" (exact) or "int8" (4x smaller, scaled per vector)
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+# Vectors kept decoded in memory (most recently used)
+EMBEDDING_CACHE_HOT_ENTRIES = int(os.getenv("EMBEDDING_CACHE_HOT_ENTRIES", "2048"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY, dtype TEXT NOT NULL, scale REAL NOT NULL, vector BLOB NOT NULL
+);
+"""
+
+
+def embedding_key(model_name, text):
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def encode(vector, dtype):
+    """(scale, bytes) of a vector stored as float32 or symmetric int8"""
+    vector = np.asarray(vector, dtype=np.float32)
+    if dtype == "int8":
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return scale, np.round(vector / scale).astype(np.int8).tobytes()
+    return 1.0, vector.tobytes()
+
+
+def decode(dtype, scale, blob):
+    if dtype == "int8":
+        return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * scale
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingStore:
+    """SQLite table of embeddings keyed by hash(model name, text), with an LRU hot tier"""
+
+    def __init__(
+        self,
+        path=EMBEDDING_CACHE_PATH,
+        dtype=EMBEDDING_CACHE_DTYPE,
+        hot_entries=EMBEDDING_CACHE_HOT_ENTRIES,
+    ):
+        self.dtype = dtype
+        self.hot_entries = hot_entries
+        self._hot = OrderedDict()  # key -> list of floats
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, embedding):
+        self._hot[key] = embedding
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    def get_many(self, keys):
+        """{key: embedding} for the keys that are cached"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._hot:
+                    self._hot.move_to_end(key)
+                    found[key] = self._hot[key]
+            self.hot_hits += len(found)
+            missing = [key for key in keys if key not in found]
+            # Stay under SQLite's 999 bound parameters
+            for i in range(0, len(missing), 500):
+                batch = missing[i : i + 500]
+                rows = self._db.execute(
+                    "SELECT key, dtype, scale, vector FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, dtype, scale, blob in rows:
+                    found[key] = decode(dtype, scale, blob).tolist()
+                    self._remember(key, found[key])
+                    self.disk_hits += 1
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, embedding) pairs in one transaction"""
+        rows = [
+            (key, self.dtype, *encode(embedding, self.dtype))
+            for key, embedding in items
+        ]
+        with self._lock:
+            for key, embedding in items:
+                self._remember(key, embedding)
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Error writing embedding cache: {e}")
+
+    def stats(self):
+        return {
+            "hot_entries": len(self._hot),
+            "hot_hits": self.hot_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Wraps an embedding model so every text is only ever embedded once per model.
+
+    Used for both query embeddings and ingestion; only texts missing from the
+    store reach the wrapped model (in one batch).
+    """
+
+    _embed_model: Any = PrivateAttr()
+    _store: Any = PrivateAttr()
+
+    def __init__(self, embed_model, store=None, **kwargs):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._store = store or EmbeddingStore()
+
+    @classmethod
+    def class_name(cls):
+        return "CachedEmbedding"
+
+    @property
+    def store(self):
+        return self._store
+
+    def _split(self, texts):
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        cached = self._store.get_many(keys)
+        missing = {
+            key: text for key, text in zip(keys, texts) if key not in cached
+        }  # also dedupes repeated texts
+        return keys, cached, missing
+
+    def _merge(self, keys, cached, missing, embeddings):
+        computed = list(zip(missing, embeddings))
+        if computed:
+            self._store.put_many(computed)
+        cached.update(computed)
+        return [cached[key] for key in keys]
+
+    def _get_text_embeddings(self, texts):
+        keys, cached, missing = self._split(texts)
+        embeddings = (
+            self._embed_model.get_text_embedding_batch(list(missing.values()))
+            if missing
+            else []
+        )
+        return self._merge(keys, cached, missing, embeddings)
+
+    async def _aget_text_embeddings(self, texts):
+        # SQLite reads and writes run in a thread to keep the event loop free
+        keys, cached, missing = await asyncio.to_thread(self._split, texts)
+        embeddings = (
+            await self._embed_model.aget_text_embedding_batch(list(missing.values()))
+            if missing
+            else []
+        )
+        return await asyncio.to_thread(self._merge, keys, cached, missing, embeddings)
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text):
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_query_embedding(self, query):
+        keys, cached, missing = self._split([query])
+        embeddings = [self._embed_model.get_query_embedding(query)] if missing else []
+        return self._merge(keys, cached, missing, embeddings)[0]
+
+    async def _aget_query_embedding(self, query):
+        keys, cached, missing = await asyncio.to_thread(self._split, [query])
+        embeddings = (
+            [await self._embed_model.aget_query_embedding(query)] if missing else []
+        )
+        merged = await asyncio.to_thread(self._merge, keys, cached, missing, embeddings)
+        return merged[0]
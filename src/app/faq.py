@@ -0,0 +1,132 @@
+# app/faq.py
+import csv
+import json
+import logging
+import os
+import math
+import time
+from collections import Counter
+from pathlib import Path
+import numpy as np
+from src.app.answer_cache import normalize_query
+from src.app.config import lazy
+
+logger = logging.getLogger(__name__)
+
+FAQ_DIR = Path(__file__).resolve().parents[2] / "data_collected" / "faq"
+# Minimum cosine similarity between the message and a FAQ question to answer
+# directly (tuned on the held-out paraphrases and near misses in tests/test_faq.py)
+FAQ_THRESHOLD = float(os.getenv("FAQ_THRESHOLD", "0.75"))
+# The best FAQ entry must beat the second best by this much, so a message that
+# sits between two questions goes to RAG instead
+FAQ_MARGIN = float(os.getenv("FAQ_MARGIN", "0.1"))
+# Log hit rate and latency every this many lookups
+FAQ_STATS_EVERY = 100
+
+
+def load_faq_pairs(directory=FAQ_DIR):
+    """(question, answer) pairs from the FAQ JSON and CSV files, deduplicated by question"""
+    pairs = {}
+
+    def add(question, answer):
+        if question and answer:
+            pairs.setdefault(normalize_query(question), (question, answer))
+
+    for path in sorted(directory.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        items = data.get("faq", []) if isinstance(data, dict) else data
+        for item in items:
+            add(item.get("question"), item.get("answer"))
+    for path in sorted(directory.glob("*.csv")):
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                add(row.get("Question"), row.get("Answer"))
+    return list(pairs.values())
+
+
+class FAQMatcher:
+    """Answers messages that match a curated FAQ question, without any LLM call.
+
+    The FAQ questions are vectorized once into a TF-IDF matrix (stop words
+    removed, so "how do I ... my" doesn't make questions look alike); each
+    message is scored against all of them with one sparse matrix-vector
+    product. Words of the message that appear in no FAQ question still count
+    in its norm, at the weight of the rarest known term: "cancel my
+    subscription" must not look like "cancel my order" just because
+    "subscription" is unknown.
+    """
+
+    def __init__(self, pairs, threshold=FAQ_THRESHOLD, margin=FAQ_MARGIN):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import normalize
+
+        self.questions = [question for question, _ in pairs]
+        self.answers = [answer for _, answer in pairs]
+        self.threshold = threshold
+        self.margin = margin
+        self.vectorizer = TfidfVectorizer(
+            preprocessor=normalize_query,
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            stop_words="english",
+            norm=None,
+        )
+        # Rows are L2-normalized, so a dot product is the cosine similarity
+        self.matrix = normalize(self.vectorizer.fit_transform(self.questions))
+        self.analyzer = self.vectorizer.build_analyzer()
+        self.unknown_weight = float(self.vectorizer.idf_.max())
+        self.lookups = 0
+        self.hits = 0
+        self.total_seconds = 0.0
+
+    def _scores(self, message):
+        """Cosine similarity of the message with every FAQ question"""
+        vector = self.vectorizer.transform([message])
+        squared_norm = float(vector.multiply(vector).sum())
+        vocabulary = self.vectorizer.vocabulary_
+        for term, count in Counter(self.analyzer(message)).items():
+            if term not in vocabulary:
+                squared_norm += ((1 + math.log(count)) * self.unknown_weight) ** 2
+        if not squared_norm:
+            return np.zeros(len(self.questions))
+        return (self.matrix @ vector.T).toarray()[:, 0] / math.sqrt(squared_norm)
+
+    def match(self, message):
+        """(answer, score) of the best FAQ entry; answer None if it scores below the
+        threshold or not clearly above the runner-up"""
+        started = time.perf_counter()
+        scores = self._scores(message)
+        best = int(scores.argmax())
+        score = float(scores[best])
+        runner_up = float(np.partition(scores, -2)[-2]) if len(scores) > 1 else 0.0
+        answer = (
+            self.answers[best]
+            if score >= self.threshold and score - runner_up >= self.margin
+            else None
+        )
+
+        self.lookups += 1
+        self.hits += answer is not None
+        self.total_seconds += time.perf_counter() - started
+        if self.lookups % FAQ_STATS_EVERY == 0:
+            logger.info(f"FAQ fast path: {self.stats()}")
+        return answer, score
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "avg_latency_ms": (
+                round(self.total_seconds / self.lookups * 1000, 3)
+                if self.lookups
+                else 0.0
+            ),
+        }
+
+
+@lazy
+def get_faq_matcher():
+    """FAQ matcher over data_collected/faq"""
+    return FAQMatcher(load_faq_pairs())
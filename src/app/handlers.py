@@ -1,16 +1,41 @@
 # app/handlers.py
 import datetime
-import dateparser
 import os
+import pytz
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import ContextTypes, ConversationHandler
+from telegram.ext import ContextTypes
+from src.availability import (
+    SLOT_MINUTES,
+    describe_hours,
+    find_free_slots,
+    is_slot_available,
+)
+from src.reservations import reservations, SlotUnavailableError
+from src.calendar_client import CalendarConflictError
 from src.google_calendar import (
+    cancel_day,
     create_event,
     delete_event,
     get_user_events,
     update_event,
 )
-from src.app.config import query_engine
+from src.app.config import ADMIN_USER_IDS
+from src.app.dates import parse_date
+from src.app.idempotency import idempotency
+from src.app.sessions import event_ref, sessions
+from src.app.intents import (
+    AFFIRM,
+    BOOKING,
+    CANCEL,
+    DENY,
+    EDIT,
+    HOURS,
+    MENU,
+    classify,
+)
+from src.app.rag import answer_question, match_faq
+from src.app.streaming import StreamingReply
+from src.tracing import annotate, span, traced
 
 # Define conversation states
 (
@@ -22,16 +47,181 @@ from src.app.config import query_engine
     ENTERING_NEW_DATE,
 ) = range(6)
 
-# User state tracking
-user_context = {}
-
 # Timezone from environment variable
 TIMEZONE = os.getenv("TIMEZONE", "America/Mexico_City")
 
+# Number of free slots offered as buttons
+SUGGESTED_SLOTS = 3
+
+BOOKING_PROMPT = (
+    "🗓️ Great! To schedule an appointment, please tell me your preferred date and time. "
+    "For example: 'Tomorrow at 3pm' or 'April 20 at 10am'"
+)
+
+
+def slots_keyboard(slots, prefix):
+    """Inline buttons for free slots; callback data carries the slot's timestamp"""
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    slot.strftime("%a %b %d, %I:%M %p"),
+                    callback_data=f"{prefix}_{int(slot.timestamp())}",
+                )
+            ]
+            for slot in slots
+        ]
+    )
+
+
+def editing_interval(session):
+    """(start, end) of the event being rescheduled, or None for all-day events"""
+    start = datetime.datetime.fromisoformat(
+        session.events[session.edit_event_index].start
+    )
+    if start.tzinfo is None:
+        return None
+    return start, start + datetime.timedelta(minutes=SLOT_MINUTES)
+
+
+def unavailable_text(start):
+    if start < datetime.datetime.now(datetime.timezone.utc):
+        return "😕 Sorry, that time has already passed."
+    return "😕 Sorry, that time is outside our opening hours or already booked."
+
+
+async def suggest_slots(update, after, prefix, text, exclude=None):
+    """Reply with the next free slots after `after` as inline buttons"""
+    try:
+        slots = await find_free_slots(after, SUGGESTED_SLOTS, exclude=exclude)
+    except Exception as e:
+        print(f"Error finding free slots: {e}")
+        slots = []
+    if slots:
+        await update.message.reply_text(
+            f"{text}\n\nHere are the next available times 👇",
+            reply_markup=slots_keyboard(slots, prefix),
+        )
+    else:
+        await update.message.reply_text(text)
+
+
+def hours_text():
+    return (
+        f"📍 Our available hours are:\n{describe_hours()}\n\n"
+        "Would you like to book an appointment? If so, please type 'Yes'"
+    )
+
+
+async def prompt_booking(send):
+    """Ask for a date, offering the next free slots as buttons; returns the next state"""
+    try:
+        slots = await find_free_slots(
+            datetime.datetime.now(datetime.timezone.utc), SUGGESTED_SLOTS
+        )
+    except Exception as e:
+        print(f"Error finding free slots: {e}")
+        slots = []
+    if slots:
+        await send(
+            f"{BOOKING_PROMPT}\n\nOr pick one of the next available times 👇",
+            reply_markup=slots_keyboard(slots, "slot"),
+        )
+    else:
+        await send(BOOKING_PROMPT)
+    return ENTERING_DATE
+
+
+async def prompt_event_choice(send, user_id, session, action):
+    """List the user's upcoming appointments as buttons to "cancel" or "edit" one"""
+    try:
+        events = await get_user_events(user_id)
+        if not events:
+            await send(f"You don't have any upcoming appointments to {action}.")
+            return CHOOSING_ACTION
+
+        # Keep only what the menus need, not the full event JSON
+        session.events = [event_ref(event) for event in events]
+
+        # Create buttons for each event
+        keyboard = []
+        for i, event in enumerate(session.events):
+            start_time = event.start
+            formatted_time = datetime.datetime.fromisoformat(
+                start_time.replace("Z", "+00:00")
+            ).strftime("%b %d, %Y at %I:%M %p")
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        f"{formatted_time}", callback_data=f"{action}_{i}"
+                    )
+                ]
+            )
+
+        keyboard.append([InlineKeyboardButton("« Back", callback_data="back_to_menu")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        await send(
+            f"🗓 Please select the appointment you wish to {action}:",
+            reply_markup=reply_markup,
+        )
+        return SELECTING_EVENT
+    except Exception as e:
+        print(f"Error fetching events: {e}")
+        await send(
+            "❌ Sorry, I couldn't retrieve your appointments. Please try again later."
+        )
+        return CHOOSING_ACTION
+
+
+async def reschedule(user_id, new_start, fallback_name):
+    """Move the event selected in the edit menu and return the reply text"""
+    try:
+        # Get the event to edit
+        session = sessions.get(user_id)
+        event = session.events[session.edit_event_index]
+        event_id = event.id
+
+        # Update the event
+        event_summary = event.summary
+        client_name = event_summary.replace("Appointment with ", "")
+        if client_name == event_summary:  # No replacement happened
+            client_name = fallback_name or "Client"
+
+        await reservations.commit(user_id, new_start, exclude=editing_interval(session))
+        await update_event(
+            event_id=event_id,
+            summary=f"Appointment with {client_name}",
+            description=f"Edited by user {user_id} via CusChatAI bot",
+            start_time=new_start,
+            duration_minutes=30,
+            etag=event.etag,
+        )
+        reservations.complete(user_id)
+
+        formatted_date = new_start.strftime("%A, %B %d at %I:%M %p")
+        return f"✅ Your appointment has been rescheduled for {formatted_date}."
+    except SlotUnavailableError:
+        return "😕 Sorry, that time was just booked by someone else. Please try another time."
+    except CalendarConflictError:
+        reservations.release(user_id)
+        return (
+            "⚠️ This appointment was changed in the meantime. "
+            "Please open 'Edit Appointment' again to see the latest details."
+        )
+    except Exception as e:
+        reservations.release(user_id)
+        print(f"Error editing event: {e}")
+        return (
+            "❌ There was an error updating your appointment. Please try again later."
+        )
+
 
+@traced()
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    user_context[user_id] = {}
+    annotate(user_id=user_id)
+    sessions.reset(user_id)
 
     # Reset the state
     context.user_data["state"] = CHOOSING_ACTION
@@ -58,28 +248,26 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return CHOOSING_ACTION
 
 
+@traced()
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user_id = query.from_user.id
+    annotate(user_id=user_id, data=query.data)
 
-    # Initialize user context if not exists
-    if user_id not in user_context:
-        user_context[user_id] = {}
+    # Ignore double taps and redelivered updates
+    if idempotency.is_duplicate_update(update):
+        return context.user_data.get("state", CHOOSING_ACTION)
+
+    session = sessions.get(user_id)
 
     data = query.data
     if data == "agendar":
-        await query.edit_message_text(
-            "🗓️ Great! To schedule an appointment, please tell me your preferred date and time. "
-            "For example: 'Tomorrow at 3pm' or 'April 20 at 10am'"
-        )
-        context.user_data["state"] = ENTERING_DATE
-        return ENTERING_DATE
+        state = await prompt_booking(query.edit_message_text)
+        context.user_data["state"] = state
+        return state
     elif data == "horarios":
-        await query.edit_message_text(
-            "📍 Our available hours are:\n- Monday to Friday: 10am - 6pm\n- Saturday: 11am - 3pm\n\n"
-            "Would you like to book an appointment? If so, please type 'Yes'"
-        )
+        await query.edit_message_text(hours_text())
         return CHOOSING_ACTION
     elif data == "empresa":
         company_info = (
@@ -102,91 +290,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return CHOOSING_ACTION
     elif data == "cancelar":
-        # Get user's events
-        try:
-            events = get_user_events(user_id)
-            if not events:
-                await query.edit_message_text(
-                    "You don't have any upcoming appointments to cancel."
-                )
-                return CHOOSING_ACTION
-
-            user_context[user_id]["events"] = events
-
-            # Create buttons for each event
-            keyboard = []
-            for i, event in enumerate(events):
-                start_time = event["start"]["dateTime"]
-                formatted_time = datetime.datetime.fromisoformat(
-                    start_time.replace("Z", "+00:00")
-                ).strftime("%b %d, %Y at %I:%M %p")
-                keyboard.append(
-                    [
-                        InlineKeyboardButton(
-                            f"{formatted_time}", callback_data=f"cancel_{i}"
-                        )
-                    ]
-                )
-
-            keyboard.append(
-                [InlineKeyboardButton("« Back", callback_data="back_to_menu")]
-            )
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.edit_message_text(
-                "🗓 Please select the appointment you wish to cancel:",
-                reply_markup=reply_markup,
-            )
-            return SELECTING_EVENT
-        except Exception as e:
-            print(f"Error fetching events: {e}")
-            await query.edit_message_text(
-                "❌ Sorry, I couldn't retrieve your appointments. Please try again later."
-            )
-            return CHOOSING_ACTION
+        return await prompt_event_choice(
+            query.edit_message_text, user_id, session, "cancel"
+        )
     elif data == "editar":
-        # Similar to cancel but for editing
-        try:
-            events = get_user_events(user_id)
-            if not events:
-                await query.edit_message_text(
-                    "You don't have any upcoming appointments to edit."
-                )
-                return CHOOSING_ACTION
-
-            user_context[user_id]["events"] = events
-
-            # Create buttons for each event
-            keyboard = []
-            for i, event in enumerate(events):
-                start_time = event["start"]["dateTime"]
-                formatted_time = datetime.datetime.fromisoformat(
-                    start_time.replace("Z", "+00:00")
-                ).strftime("%b %d, %Y at %I:%M %p")
-                keyboard.append(
-                    [
-                        InlineKeyboardButton(
-                            f"{formatted_time}", callback_data=f"edit_{i}"
-                        )
-                    ]
-                )
-
-            keyboard.append(
-                [InlineKeyboardButton("« Back", callback_data="back_to_menu")]
-            )
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.edit_message_text(
-                "🗓 Please select the appointment you wish to edit:",
-                reply_markup=reply_markup,
-            )
-            return SELECTING_EVENT
-        except Exception as e:
-            print(f"Error fetching events: {e}")
-            await query.edit_message_text(
-                "❌ Sorry, I couldn't retrieve your appointments. Please try again later."
-            )
-            return CHOOSING_ACTION
+        return await prompt_event_choice(
+            query.edit_message_text, user_id, session, "edit"
+        )
     elif data == "back_to_menu":
         # Return to main menu
         keyboard = [
@@ -209,14 +319,37 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             welcome_text, reply_markup=reply_markup, parse_mode="Markdown"
         )
         return CHOOSING_ACTION
+    elif data.startswith("slot_"):
+        # A suggested free slot was picked: go straight to confirmation
+        start_time = datetime.datetime.fromtimestamp(
+            int(data.split("_")[1]), pytz.timezone(TIMEZONE)
+        )
+        session.start_time = start_time
+
+        formatted_date = start_time.strftime("%A, %B %d at %I:%M %p")
+        await query.edit_message_text(
+            f"📅 You picked: {formatted_date}\n\nDo you confirm this appointment? (Yes/No)"
+        )
+        context.user_data["state"] = CONFIRMING_DATE
+        return CONFIRMING_DATE
+    elif data.startswith("newslot_"):
+        # A suggested free slot was picked while rescheduling
+        new_start = datetime.datetime.fromtimestamp(
+            int(data.split("_")[1]), pytz.timezone(TIMEZONE)
+        )
+        reply = await reschedule(user_id, new_start, query.from_user.first_name)
+        await query.edit_message_text(reply)
+        context.user_data["state"] = CHOOSING_ACTION
+        return CHOOSING_ACTION
     elif data.startswith("cancel_"):
         # Cancel the selected event
         try:
             event_index = int(data.split("_")[1])
-            events = user_context[user_id]["events"]
-            event_id = events[event_index]["id"]
+            event_id = session.events[event_index].id
 
-            delete_event(event_id)
+            await idempotency.run_once(
+                ("cancel", event_id), lambda: delete_event(event_id)
+            )
             await query.edit_message_text(
                 "✅ Your appointment has been successfully canceled!"
             )
@@ -231,7 +364,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Store the event to edit and ask for new date
         try:
             event_index = int(data.split("_")[1])
-            user_context[user_id]["edit_event_index"] = event_index
+            session.edit_event_index = event_index
 
             await query.edit_message_text(
                 "Please enter the new date and time for your appointment. "
@@ -250,36 +383,50 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return CHOOSING_ACTION
 
 
+@traced()
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     message = update.message.text.strip()
 
-    # Initialize user context if not exists
-    if user_id not in user_context:
-        user_context[user_id] = {}
+    # Ignore redelivered updates
+    if idempotency.is_duplicate_update(update):
+        return context.user_data.get("state", CHOOSING_ACTION)
+
+    session = sessions.get(user_id)
 
     # Check if we're in a conversation flow
     state = context.user_data.get("state", CHOOSING_ACTION)
 
     print(f"Current state for user {user_id}: {state}")
+    annotate(user_id=user_id, state=state)
 
-    # Handle "Yes" responses for booking after viewing hours
-    if state == CHOOSING_ACTION and message.lower() in ["yes", "y", "si", "sí"]:
-        await update.message.reply_text(
-            "🗓️ Great! To schedule an appointment, please tell me your preferred date and time. "
-            "For example: 'Tomorrow at 3pm' or 'April 20 at 10am'"
-        )
-        context.user_data["state"] = ENTERING_DATE
-        return ENTERING_DATE
+    # Dates and names are taken as typed; everything else is classified locally
+    intent = None
+    if state not in (ENTERING_DATE, ENTERING_NAME, ENTERING_NEW_DATE):
+        with span("intent"):
+            intent, confidence = await classify(message)
+        print(f"Intent for user {user_id}: {intent} ({confidence:.2f})")
+        annotate(intent=intent)
 
     # Handle date entry
-    elif state == ENTERING_DATE:
-        parsed_date = dateparser.parse(
-            message, settings={"PREFER_DATES_FROM": "future"}
-        )
+    if state == ENTERING_DATE:
+        with span("parse_date"):
+            parsed_date = parse_date(message)
         if parsed_date:
+            try:
+                with span("availability"):
+                    available = await is_slot_available(parsed_date)
+            except Exception as e:
+                print(f"Error checking availability: {e}")
+                available = True  # Let the calendar decide when creating the event
+            if not available:
+                await suggest_slots(
+                    update, parsed_date, "slot", unavailable_text(parsed_date)
+                )
+                return ENTERING_DATE
+
             # Store the date and ask for confirmation
-            user_context[user_id]["start_time"] = parsed_date
+            session.start_time = parsed_date
 
             formatted_date = parsed_date.strftime("%A, %B %d at %I:%M %p")
             await update.message.reply_text(
@@ -295,7 +442,21 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Handle date confirmation
     elif state == CONFIRMING_DATE:
-        if message.lower() in ["yes", "y", "confirm", "ok", "sure", "yep", "si", "sí"]:
+        if intent == AFFIRM:
+            # Hold the slot so nobody else can book it while the user types their name
+            start_time = session.start_time
+            try:
+                await reservations.acquire(user_id, start_time)
+            except SlotUnavailableError:
+                await suggest_slots(
+                    update,
+                    start_time,
+                    "slot",
+                    "😕 Sorry, someone just booked that time.",
+                )
+                context.user_data["state"] = ENTERING_DATE
+                return ENTERING_DATE
+
             # Ask for the user's name
             await update.message.reply_text(
                 "Great! 😊 Please tell me your name for the appointment:"
@@ -303,6 +464,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             context.user_data["state"] = ENTERING_NAME
             return ENTERING_NAME
         else:
+            reservations.release(user_id)
             await update.message.reply_text(
                 "No problem. Please provide a different date and time for your appointment:"
             )
@@ -312,21 +474,35 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Handle name entry
     elif state == ENTERING_NAME:
         # Store the name and create the event
-        user_context[user_id]["client_name"] = message
+        session.client_name = message
 
         try:
-            start_time = user_context[user_id]["start_time"]
-            client_name = user_context[user_id]["client_name"]
-
-            event_id = create_event(
-                summary=f"Appointment with {client_name}",
-                description=f"Scheduled by user {user_id} via CusChatAI bot",
-                start_time=start_time,
-                duration_minutes=30,
+            start_time = session.start_time
+            client_name = session.client_name
+
+            async def book():
+                # Re-checks the lease (it may have expired) before any API call
+                await reservations.commit(user_id, start_time)
+                event_id = await create_event(
+                    summary=f"Appointment with {client_name}",
+                    description=f"Scheduled by user {user_id} via CusChatAI bot",
+                    start_time=start_time,
+                    duration_minutes=30,
+                    user_id=user_id,
+                )
+                reservations.complete(user_id)
+                return event_id
+
+            # A repeated name message sent while the booking is in flight reuses
+            # it; once done, the same slot can be booked again (e.g. after a cancel)
+            event_id = await idempotency.run_once(
+                ("create", user_id, start_time.isoformat(), client_name),
+                book,
+                keep_result=False,
             )
 
             # Store the event ID for future reference
-            user_context[user_id]["event_id"] = event_id
+            session.event_id = event_id
 
             # Reset state
             context.user_data["state"] = CHOOSING_ACTION
@@ -339,7 +515,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "You can say 'menu' anytime to return to the main menu."
             )
             return CHOOSING_ACTION
+        except SlotUnavailableError:
+            await suggest_slots(
+                update,
+                session.start_time,
+                "slot",
+                "😕 Sorry, that time was booked by someone else in the meantime.",
+            )
+            context.user_data["state"] = ENTERING_DATE
+            return ENTERING_DATE
         except Exception as e:
+            reservations.release(user_id)
             print(f"Error creating event: {e}")
             await update.message.reply_text(
                 "❌ I'm sorry, there was an error scheduling your appointment. Please try again later."
@@ -349,81 +535,102 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Handle entering new date for editing
     elif state == ENTERING_NEW_DATE:
-        parsed_date = dateparser.parse(
-            message, settings={"PREFER_DATES_FROM": "future"}
-        )
+        with span("parse_date"):
+            parsed_date = parse_date(message)
         if parsed_date:
             try:
-                # Get the event to edit
-                event_index = user_context[user_id]["edit_event_index"]
-                event = user_context[user_id]["events"][event_index]
-                event_id = event["id"]
-
-                # Update the event
-                event_summary = event["summary"]
-                client_name = event_summary.replace("Appointment with ", "")
-                if client_name == event_summary:  # No replacement happened
-                    client_name = update.effective_user.first_name or "Client"
-
-                update_event(
-                    event_id=event_id,
-                    summary=f"Appointment with {client_name}",
-                    description=f"Edited by user {user_id} via CusChatAI bot",
-                    start_time=parsed_date,
-                    duration_minutes=30,
-                )
-
-                # Reset state
-                context.user_data["state"] = CHOOSING_ACTION
-
-                formatted_date = parsed_date.strftime("%A, %B %d at %I:%M %p")
-                await update.message.reply_text(
-                    f"✅ Your appointment has been rescheduled for {formatted_date}."
-                )
-                return CHOOSING_ACTION
+                exclude = editing_interval(session)
+                with span("availability"):
+                    available = await is_slot_available(parsed_date, exclude=exclude)
             except Exception as e:
-                print(f"Error editing event: {e}")
-                await update.message.reply_text(
-                    "❌ There was an error updating your appointment. Please try again later."
+                print(f"Error checking availability: {e}")
+                available = True  # Let the calendar decide when updating the event
+            if not available:
+                await suggest_slots(
+                    update,
+                    parsed_date,
+                    "newslot",
+                    unavailable_text(parsed_date),
+                    exclude,
                 )
-                context.user_data["state"] = CHOOSING_ACTION
-                return CHOOSING_ACTION
+                return ENTERING_NEW_DATE
+
+            reply = await reschedule(
+                user_id, parsed_date, update.effective_user.first_name
+            )
+            await update.message.reply_text(reply)
+            context.user_data["state"] = CHOOSING_ACTION
+            return CHOOSING_ACTION
         else:
             await update.message.reply_text(
                 "❌ I couldn't understand that date. Please try again with a clearer format."
             )
             return ENTERING_NEW_DATE
 
-    # Check for menu command
-    if message.lower() == "menu":
+    # A question that merely shares words with an action ("Can I cancel my
+    # order?") gets its curated answer instead of the cancel/edit/booking flow.
+    # Exact seed matches are unambiguous and skip the check.
+    if intent in (BOOKING, CANCEL, EDIT) and confidence < 1.0:
+        faq_answer = await match_faq(message)
+        if faq_answer is not None:
+            annotate(answer="faq")
+            await update.message.reply_text(faq_answer)
+            return CHOOSING_ACTION
+
+    # Requests the bot handles itself never reach the LLM
+    if intent == MENU:
         await start(update, context)
         return CHOOSING_ACTION
+    if intent in (AFFIRM, BOOKING):
+        # "Yes" after viewing hours or company information, or a booking request
+        state = await prompt_booking(update.message.reply_text)
+        context.user_data["state"] = state
+        return state
+    if intent in (CANCEL, EDIT):
+        return await prompt_event_choice(
+            update.message.reply_text, user_id, session, intent
+        )
+    if intent == HOURS:
+        await update.message.reply_text(hours_text())
+        return CHOOSING_ACTION
+    if intent == DENY:
+        await update.message.reply_text(
+            "👍 No problem. Type 'menu' anytime to see the main options."
+        )
+        return CHOOSING_ACTION
 
-    # If no conversation is active or we're in CHOOSING_ACTION, try to answer with the query engine
+    # FAQ and open-ended questions: curated answers first, then the query engine
+    reply = StreamingReply(update.message)
     try:
-        # Check if message might be appointment-related
-        if any(
-            word in message.lower()
-            for word in [
-                "appointment",
-                "book",
-                "schedule",
-                "reservation",
-                "cita",
-                "agendar",
-            ]
-        ):
-            await update.message.reply_text(
-                "It looks like you want to schedule an appointment. Please select 'Schedule Appointment' from the menu or type 'Yes' to proceed."
-            )
-            return CHOOSING_ACTION
-
-        response = query_engine.query(message)
-        await update.message.reply_text(str(response))
+        response = await answer_question(message, stream=reply)
+        await reply.finish(response)
         return CHOOSING_ACTION
     except Exception as e:
         print(f"Error querying: {e}")
-        await update.message.reply_text(
+        # Replaces the placeholder if one was already sent
+        await reply.finish(
             "I'm not sure how to respond to that. Can you try rephrasing your question or type 'menu' to see the main options?"
         )
         return CHOOSING_ACTION
+
+
+async def admin_cancel_day(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/cancelday YYYY-MM-DD: cancel every appointment of a day in batched requests"""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+
+    try:
+        day = datetime.date.fromisoformat(context.args[0])
+    except (IndexError, ValueError):
+        await update.message.reply_text("Usage: /cancelday YYYY-MM-DD")
+        return
+
+    try:
+        events, results = await cancel_day(day)
+        failed = sum(1 for result in results if not result.ok)
+        await update.message.reply_text(
+            f"🗑️ Canceled {len(events) - failed} of {len(events)} appointment(s) on {day}."
+        )
+    except Exception as e:
+        print(f"Error canceling day: {e}")
+        await update.message.reply_text("❌ Could not cancel the appointments.")
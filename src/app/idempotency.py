@@ -0,0 +1,111 @@
+# app/idempotency.py
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+# How long a processed update id is remembered (Telegram redeliveries)
+UPDATE_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_UPDATE_TTL", "600"))
+# Taps on the same button of the same message within this window are one tap
+DOUBLE_TAP_SECONDS = float(os.getenv("IDEMPOTENCY_DOUBLE_TAP_TTL", "3"))
+# How long the result of a calendar operation is reused for identical requests
+OPERATION_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_OPERATION_TTL", "600"))
+MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire after `ttl` seconds; oldest entries are evicted first"""
+
+    def __init__(self, ttl, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires, value)
+
+    def _purge(self, now):
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value):
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = (now + self.ttl, value)
+        self._purge(now)
+
+    def add(self, key):
+        """Remember `key`; returns False if it was already there"""
+        if self.get(key, _MISSING) is not _MISSING:
+            return False
+        self.set(key, True)
+        return True
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Idempotency:
+    """Short-circuits redelivered updates, double taps and repeated operations"""
+
+    def __init__(self):
+        self.updates = TTLCache(UPDATE_TTL_SECONDS)
+        self.taps = TTLCache(DOUBLE_TAP_SECONDS)
+        self.operations = TTLCache(OPERATION_TTL_SECONDS)
+        self.duplicates = 0
+
+    def is_duplicate_update(self, update):
+        """True if this update (by update id) or this button tap was already handled"""
+        fresh = self.updates.add(("update", update.update_id))
+        query = update.callback_query
+        if query is not None and query.message is not None:
+            # A double tap repeats the last button tapped on that message; the
+            # same button after a different one (e.g. Back) is a new tap
+            message_key = (query.from_user.id, query.message.message_id)
+            if self.taps.get(message_key) == query.data:
+                fresh = False
+            self.taps.set(message_key, query.data)
+        if not fresh:
+            self.duplicates += 1
+        return not fresh
+
+    async def run_once(self, fingerprint, operation, keep_result=True):
+        """Run `operation()` once per fingerprint; identical calls get the same result.
+
+        Calls arriving while the first one is in flight wait for it. Failures are
+        not remembered, so a retry after an error runs again. With
+        keep_result=False the result is only shared with calls made while it
+        was in flight.
+        """
+        pending = self.operations.get(fingerprint)
+        if pending is not None:
+            self.duplicates += 1
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self.operations.set(fingerprint, future)
+        try:
+            result = await operation()
+        except BaseException as e:
+            self.operations.discard(fingerprint)
+            future.set_exception(e)
+            # Nobody else may be waiting; don't log "exception never retrieved"
+            future.exception()
+            raise
+        future.set_result(result)
+        if not keep_result:
+            self.operations.discard(fingerprint)
+        return result
+
+
+idempotency = Idempotency()
@@ -0,0 +1,222 @@
+# app/ingest.py
+"""Build or update the vector index from data_collected.
+
+Usage:
+    python -m src.app.ingest [--chunk-size 512] [--chunk-overlap 50] [--dry-run] [--full]
+
+Every chunk is identified by a hash of its source path, text and metadata, so
+a run only embeds and upserts chunks whose text or frontmatter changed and
+deletes the ones that no longer exist. The ids currently in the index are tracked in a manifest
+file (INGEST_MANIFEST_PATH).
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from src.app.answer_cache import KNOWLEDGE_BASE_DIR
+from src.app.config import (
+    INGEST_MANIFEST_PATH,
+    VECTOR_BACKEND,
+    get_embed_model,
+    get_vector_store,
+)
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "512"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "50"))
+# Texts per embedding API call, and how many calls run at the same time
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+
+def _flat(value):
+    """Metadata values the vector stores accept (Pinecone only takes scalars)"""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return json.dumps(value, default=str)
+
+
+def parse_markdown(path):
+    """(text, metadata) of a markdown file, frontmatter becoming metadata"""
+    import frontmatter
+
+    post = frontmatter.load(path)
+    return post.content, {key: _flat(value) for key, value in post.metadata.items()}
+
+
+def parse_html(path):
+    from markdownify import markdownify
+
+    return markdownify(path.read_text(encoding="utf-8"), heading_style="ATX"), {}
+
+
+def parse_faq_json(path):
+    """One text per question/answer pair"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("faq", []) if isinstance(data, dict) else data
+    return [
+        f"Q: {item['question']}\nA: {item['answer']}"
+        for item in items
+        if item.get("question") and item.get("answer")
+    ]
+
+
+def parse_faq_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return [
+            f"Q: {row['Question']}\nA: {row['Answer']}"
+            for row in csv.DictReader(f)
+            if row.get("Question") and row.get("Answer")
+        ]
+
+
+def chunk_id(source, text, metadata=None):
+    """Content hash identifying a chunk; it changes whenever the text or metadata does"""
+    normalized = json.dumps(metadata or {}, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{source}\n{normalized}\n{text}".encode("utf-8")
+    ).hexdigest()[:32]
+
+
+def load_chunks(directory=KNOWLEDGE_BASE_DIR, chunk_size=None, chunk_overlap=None):
+    """TextNodes (without embeddings) for every file under directory, keyed by id"""
+    from llama_index.core.node_parser import SentenceSplitter
+    from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+
+    splitter = SentenceSplitter(
+        chunk_size=chunk_size or INGEST_CHUNK_SIZE,
+        chunk_overlap=chunk_overlap or INGEST_CHUNK_OVERLAP,
+    )
+    chunks = {}
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        source = path.relative_to(directory).as_posix()
+        metadata = {}
+        if path.suffix == ".md":
+            text, metadata = parse_markdown(path)
+            texts = splitter.split_text(text)
+        elif path.suffix in (".html", ".htm"):
+            text, metadata = parse_html(path)
+            texts = splitter.split_text(text)
+        elif path.suffix == ".json":
+            # FAQ pairs are already small, self-contained chunks
+            texts = parse_faq_json(path)
+        elif path.suffix == ".csv":
+            texts = parse_faq_csv(path)
+        else:
+            continue
+
+        for text in texts:
+            node_id = chunk_id(source, text, metadata)
+            chunks[node_id] = TextNode(
+                id_=node_id,
+                text=text,
+                metadata={**metadata, "source": source},
+                relationships={
+                    NodeRelationship.SOURCE: RelatedNodeInfo(node_id=source)
+                },
+            )
+    return chunks
+
+
+def load_manifest(path=INGEST_MANIFEST_PATH):
+    """Ids of the chunks currently in the index -> source file"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=INGEST_MANIFEST_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+async def embed_nodes(nodes, embed_model):
+    """Set node embeddings, EMBED_BATCH_SIZE texts per call, calls run concurrently"""
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+    async def embed_batch(batch):
+        async with semaphore:
+            embeddings = await embed_model.aget_text_embedding_batch(
+                [node.get_content() for node in batch]
+            )
+        for node, embedding in zip(batch, embeddings):
+            node.embedding = embedding
+
+    await asyncio.gather(
+        *(
+            embed_batch(nodes[i : i + EMBED_BATCH_SIZE])
+            for i in range(0, len(nodes), EMBED_BATCH_SIZE)
+        )
+    )
+
+
+async def ingest(chunk_size=None, chunk_overlap=None, dry_run=False, full=False):
+    """Bring the index in line with data_collected; returns (added, deleted) counts"""
+    started = time.perf_counter()
+    chunks = load_chunks(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    manifest = {} if full else load_manifest()
+    added = [node for node_id, node in chunks.items() if node_id not in manifest]
+    stale = [node_id for node_id in manifest if node_id not in chunks]
+    print(
+        f"{len(chunks)} chunk(s): {len(added)} new or changed, "
+        f"{len(stale)} stale, {len(chunks) - len(added)} unchanged"
+    )
+    if dry_run:
+        for node in added:
+            print(f"  + {node.metadata['source']}: {node.get_content()[:60]!r}")
+        for node_id in stale:
+            print(f"  - {manifest[node_id]}: {node_id}")
+        return len(added), len(stale)
+
+    vector_store = get_vector_store()
+    if full:
+        vector_store.clear()
+    if added:
+        await embed_nodes(added, get_embed_model())
+        await asyncio.to_thread(vector_store.add, added)
+    if stale:
+        await asyncio.to_thread(vector_store.delete_nodes, stale)
+    if VECTOR_BACKEND == "local":
+        vector_store.persist()
+
+    # The manifest is what running bots watch to drop cached answers
+    if added or stale or full:
+        save_manifest(
+            {node_id: node.metadata["source"] for node_id, node in chunks.items()}
+        )
+    print(f"Index updated in {time.perf_counter() - started:.2f}s")
+    return len(added), len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incrementally index data_collected into the vector store"
+    )
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=INGEST_CHUNK_OVERLAP)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only show what would change"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Clear the index and re-embed everything"
+    )
+    args = parser.parse_args()
+    asyncio.run(ingest(args.chunk_size, args.chunk_overlap, args.dry_run, args.full))
+
+
+if __name__ == "__main__":
+    main()
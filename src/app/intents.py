@@ -0,0 +1,223 @@
+# app/intents.py
+import asyncio
+import os
+import re
+import time
+import numpy as np
+from src.app.answer_cache import normalize_query
+from src.app.config import lazy
+from src.app.faq import FAQ_DIR, load_faq_pairs
+
+CONVERSATION_FLOW_PATH = FAQ_DIR / "conversation_flow.md"
+# Below this probability the message is treated as an open-ended question (RAG)
+INTENT_THRESHOLD = float(os.getenv("INTENT_THRESHOLD", "0.4"))
+
+AFFIRM = "affirm"
+DENY = "deny"
+BOOKING = "booking"
+CANCEL = "cancel"
+EDIT = "edit"
+HOURS = "hours"
+MENU = "menu"
+FAQ = "faq"
+RAG = "rag"
+
+# Hand-written examples (English and Spanish) for the intents the knowledge base
+# has no questions for, plus FAQ-labeled messages that share words with an
+# action ("cancel my order" is not about appointments, "thanks" is not a "no").
+# Exact matches of these skip the model entirely.
+# fmt: off
+SEED_EXAMPLES = {
+    AFFIRM: [
+        "yes", "y", "si", "sí", "confirm", "ok", "okay", "sure", "yep", "yeah",
+        "yes please", "of course", "correct", "that works", "sounds good",
+        "claro", "dale", "por supuesto", "confirmo", "está bien", "de acuerdo",
+    ],
+    DENY: [
+        "no", "n", "nope", "no thanks", "not now", "another time", "wrong date",
+        "that's not right", "no gracias", "mejor no", "otra fecha", "otro día",
+    ],
+    BOOKING: [
+        "appointment", "book", "schedule", "reservation", "cita", "agendar",
+        "I want to book an appointment", "can I schedule a meeting",
+        "book a slot for tomorrow", "I need an appointment next week",
+        "do you have availability on friday", "make a reservation",
+        "quiero agendar una cita", "quiero una cita", "reservar una cita",
+        "necesito una cita para mañana",
+    ],
+    CANCEL: [
+        "cancel", "cancel my appointment", "I want to cancel my booking",
+        "please cancel the meeting", "I can't make it, cancel my appointment",
+        "delete my booking", "cancelar", "cancelar mi cita", "quiero cancelar",
+        "anular la cita",
+    ],
+    EDIT: [
+        "reschedule", "change my appointment", "move my appointment to another day",
+        "edit my booking", "can I change the time of my appointment",
+        "I need to reschedule", "cambiar mi cita", "reprogramar",
+        "modificar la cita", "mover mi cita a otro día",
+    ],
+    HOURS: [
+        "hours", "what are your hours", "opening hours", "business hours",
+        "when are you open", "what time do you close", "are you open on saturday",
+        "horario", "horarios", "a qué hora abren", "a qué hora cierran",
+        "abren los sábados",
+    ],
+    MENU: [
+        "menu", "main menu", "menú", "options", "show me the options",
+        "start over", "go back", "volver al menú", "opciones",
+    ],
+    FAQ: [
+        "thanks", "thank you", "thanks a lot", "thanks, bye", "gracias",
+        "muchas gracias", "ok thanks", "ok, thank you", "okay thanks",
+        "ok great, thanks", "perfect, thank you", "ok gracias", "vale, gracias",
+        "cancel my order", "can I cancel my order",
+        "I want to cancel my order", "cancel my subscription",
+        "change my password", "I want to change my password",
+        "I forgot my password", "change my email address",
+        "update my account information", "change my order",
+        "I want to modify my order", "return my order", "cancelar mi pedido",
+        "cambiar mi contraseña",
+    ],
+}
+# fmt: on
+
+EXACT = {
+    normalize_query(text): intent
+    for intent, texts in SEED_EXAMPLES.items()
+    for text in texts
+}
+
+
+def flow_examples(path=CONVERSATION_FLOW_PATH):
+    """(user message, intent) pairs from conversation_flow.md, labeled by section"""
+    if not path.exists():
+        return []
+    examples = []
+    heading = ""
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("###"):
+            heading = line.lower()
+            continue
+        match = re.search(r'\*\*User:\*\*\s*"(.+)"', line)
+        if not match:
+            continue
+        if "hours" in heading:
+            intent = HOURS
+        elif "appointment" in heading:
+            intent = BOOKING
+        else:
+            intent = FAQ
+        examples.append((match.group(1), intent))
+    return examples
+
+
+def training_examples():
+    """Seed examples, conversation flow examples and FAQ questions (labeled faq)"""
+    examples = {}
+    for intent, texts in SEED_EXAMPLES.items():
+        for text in texts:
+            examples[normalize_query(text)] = (text, intent)
+    for text, intent in flow_examples():
+        examples.setdefault(normalize_query(text), (text, intent))
+    for question, _ in load_faq_pairs():
+        examples.setdefault(normalize_query(question), (question, FAQ))
+    return list(examples.values())
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over word and character n-grams.
+
+    Prediction is two sparse matrix products and a softmax, done with numpy
+    directly rather than through predict_proba's input validation.
+    """
+
+    def __init__(self, examples, threshold=INTENT_THRESHOLD):
+        from scipy.sparse import hstack
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        texts = [text for text, _ in examples]
+        labels = [intent for _, intent in examples]
+        self.threshold = threshold
+        self.word_vectorizer = TfidfVectorizer(
+            preprocessor=normalize_query, ngram_range=(1, 2), sublinear_tf=True
+        )
+        # Character n-grams cope with typos and short Spanish/English variants
+        self.char_vectorizer = TfidfVectorizer(
+            preprocessor=normalize_query, analyzer="char_wb", ngram_range=(2, 4)
+        )
+        features = hstack(
+            [
+                self.word_vectorizer.fit_transform(texts),
+                self.char_vectorizer.fit_transform(texts),
+            ]
+        ).tocsr()
+        model = LogisticRegression(C=10, class_weight="balanced", max_iter=1000)
+        model.fit(features, labels)
+        self.intents = list(model.classes_)
+        # Split the weights by vectorizer so predict needs no hstack
+        vocabulary_size = len(self.word_vectorizer.vocabulary_)
+        self.word_coef = model.coef_[:, :vocabulary_size].T.copy()
+        self.char_coef = model.coef_[:, vocabulary_size:].T.copy()
+        self.intercept = model.intercept_
+        self.lookups = 0
+        self.fallbacks = 0
+        self.total_seconds = 0.0
+
+    def predict(self, message):
+        """(intent, confidence); RAG when no intent is likely enough"""
+        started = time.perf_counter()
+        self.lookups += 1
+        exact = EXACT.get(normalize_query(message))
+        if exact is not None:
+            intent, confidence = exact, 1.0
+        else:
+            scores = (
+                self.word_vectorizer.transform([message]) @ self.word_coef
+                + self.char_vectorizer.transform([message]) @ self.char_coef
+                + self.intercept
+            )
+            scores = np.exp(scores - scores.max())
+            probabilities = scores[0] / scores.sum()
+            best = int(probabilities.argmax())
+            intent, confidence = self.intents[best], float(probabilities[best])
+            if confidence < self.threshold:
+                self.fallbacks += 1
+                intent = RAG
+        self.total_seconds += time.perf_counter() - started
+        return intent, confidence
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "fallbacks": self.fallbacks,
+            "avg_latency_ms": (
+                round(self.total_seconds / self.lookups * 1000, 3)
+                if self.lookups
+                else 0.0
+            ),
+        }
+
+
+@lazy
+def get_intent_classifier():
+    """Intent classifier trained on the seeds, conversation flow and FAQ"""
+    return IntentClassifier(training_examples())
+
+
+_classifier = None
+
+
+async def classify(message):
+    """(intent, confidence) of a message; the model is trained off the loop on first use"""
+    global _classifier
+    try:
+        if _classifier is None:
+            _classifier = await asyncio.to_thread(get_intent_classifier)
+        return _classifier.predict(message)
+    except Exception as e:
+        print(f"Error classifying intent: {e}")
+        # Exact matches still work without the model
+        exact = EXACT.get(normalize_query(message))
+        return (exact, 1.0) if exact is not None else (RAG, 0.0)
@@ -0,0 +1,306 @@
+# app/local_vector_store.py
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import (
+    metadata_dict_to_node,
+    node_to_metadata_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+NODES_FILE = "nodes.json"
+# How often a store loaded from disk checks whether ingestion rewrote it
+RELOAD_CHECK_SECONDS = 10
+# k-means iterations when training the IVF lists
+IVF_TRAIN_ITERATIONS = 10
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (matrix / norms).astype(np.float32)
+
+
+def _matches(metadata, filters):
+    """Whether a node's metadata passes the (flat) MetadataFilters"""
+    results = []
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            results.append(_matches(metadata, metadata_filter))
+            continue
+        value = metadata.get(metadata_filter.key)
+        expected = metadata_filter.value
+        operator = metadata_filter.operator
+        if operator == FilterOperator.IS_EMPTY:
+            results.append(value in (None, "", []))
+        elif value is None:
+            results.append(operator == FilterOperator.NE)
+        elif operator == FilterOperator.EQ:
+            results.append(value == expected)
+        elif operator == FilterOperator.NE:
+            results.append(value != expected)
+        elif operator == FilterOperator.GT:
+            results.append(value > expected)
+        elif operator == FilterOperator.GTE:
+            results.append(value >= expected)
+        elif operator == FilterOperator.LT:
+            results.append(value < expected)
+        elif operator == FilterOperator.LTE:
+            results.append(value <= expected)
+        elif operator == FilterOperator.IN:
+            results.append(value in expected)
+        elif operator == FilterOperator.NIN:
+            results.append(value not in expected)
+        elif operator == FilterOperator.CONTAINS:
+            results.append(expected in value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    if filters.condition == FilterCondition.OR:
+        return any(results)
+    return all(results)
+
+
+class LocalVectorStore(BasePydanticVectorStore):
+    """In-process vector store over one contiguous float32 matrix of unit vectors.
+
+    Embeddings are persisted as a .npy file and memory-mapped on load; node
+    text and metadata live in a JSON file next to it. Small stores are searched
+    exactly (one matrix-vector product); once the store holds ivf_min_vectors
+    rows, queries only scan the nprobe closest k-means clusters (IVF).
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    persist_dir: Optional[str] = None
+    ivf_min_vectors: int = 10000
+    nprobe: int = 8
+
+    _ids: List[str] = PrivateAttr(default_factory=list)
+    _metadata: List[dict] = PrivateAttr(default_factory=list)
+    _matrix: Any = PrivateAttr(default=None)
+    _centroids: Any = PrivateAttr(default=None)
+    _lists: List[Any] = PrivateAttr(default_factory=list)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _loaded_mtime: Optional[int] = PrivateAttr(default=None)
+    _reload_checked: float = PrivateAttr(default=0.0)
+
+    def __init__(self, persist_dir=None, **kwargs):
+        super().__init__(persist_dir=persist_dir, **kwargs)
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        if persist_dir and (Path(persist_dir) / NODES_FILE).exists():
+            self._load(Path(persist_dir))
+
+    @property
+    def client(self):
+        return None
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---- persistence ----
+
+    def _load(self, directory):
+        self._loaded_mtime = (directory / NODES_FILE).stat().st_mtime_ns
+        self._reload_checked = time.monotonic()
+        with open(directory / NODES_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        self._ids = data["ids"]
+        self._metadata = data["metadata"]
+        # Pages are read from disk on demand and shared between processes
+        self._matrix = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+        self._centroids = None
+        logger.info(f"Loaded {len(self._ids)} vectors from {directory}")
+
+    def persist(self, persist_path=None, fs=None):
+        """Write the store to persist_path (defaults to persist_dir)"""
+        directory = Path(persist_path or self.persist_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            matrix, ids, metadata = self._matrix, list(self._ids), list(self._metadata)
+        # Write next to the target and swap, so a running bot never sees half a file
+        tmp_embeddings = directory / f"{EMBEDDINGS_FILE}.tmp"
+        tmp_nodes = directory / f"{NODES_FILE}.tmp"
+        with open(tmp_embeddings, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(tmp_nodes, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadata": metadata}, f)
+        os.replace(tmp_embeddings, directory / EMBEDDINGS_FILE)
+        os.replace(tmp_nodes, directory / NODES_FILE)
+        if directory == Path(self.persist_dir or ""):
+            self._loaded_mtime = (directory / NODES_FILE).stat().st_mtime_ns
+
+    def _reload_if_changed(self):
+        """Pick up an index rewritten by another process (python -m src.app.ingest)"""
+        now = time.monotonic()
+        if (
+            self._loaded_mtime is None
+            or now - self._reload_checked < RELOAD_CHECK_SECONDS
+        ):
+            return
+        self._reload_checked = now
+        directory = Path(self.persist_dir)
+        try:
+            if (directory / NODES_FILE).stat().st_mtime_ns != self._loaded_mtime:
+                self._load(directory)
+        except OSError as e:
+            logger.error(f"Error reloading vector store from {directory}: {e}")
+
+    # ---- writes ----
+
+    def add(self, nodes, **add_kwargs):
+        if not nodes:
+            return []
+        vectors = _unit_rows(np.asarray([node.get_embedding() for node in nodes]))
+        with self._lock:
+            positions = {node_id: row for row, node_id in enumerate(self._ids)}
+            replaced = [
+                positions[node.node_id] for node in nodes if node.node_id in positions
+            ]
+            if replaced:
+                self._remove_rows(set(replaced))
+            matrix = np.asarray(self._matrix)
+            if matrix.size:
+                vectors = np.vstack([matrix, vectors])
+            self._matrix = np.ascontiguousarray(vectors)
+            for node in nodes:
+                self._ids.append(node.node_id)
+                self._metadata.append(
+                    node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+                )
+            self._centroids = None
+        return [node.node_id for node in nodes]
+
+    def _remove_rows(self, rows):
+        keep = [row for row in range(len(self._ids)) if row not in rows]
+        self._matrix = np.ascontiguousarray(np.asarray(self._matrix)[keep])
+        self._ids = [self._ids[row] for row in keep]
+        self._metadata = [self._metadata[row] for row in keep]
+        self._centroids = None
+
+    def delete(self, ref_doc_id, **delete_kwargs):
+        """Delete every node of a source document"""
+        with self._lock:
+            rows = {
+                row
+                for row, metadata in enumerate(self._metadata)
+                if metadata.get("ref_doc_id") == ref_doc_id
+            }
+            if rows:
+                self._remove_rows(rows)
+
+    def delete_nodes(self, node_ids=None, filters=None, **delete_kwargs):
+        node_ids = set(node_ids) if node_ids is not None else None
+        with self._lock:
+            rows = {
+                row
+                for row, (node_id, metadata) in enumerate(
+                    zip(self._ids, self._metadata)
+                )
+                if (node_ids is None or node_id in node_ids)
+                and (filters is None or _matches(metadata, filters))
+            }
+            if rows:
+                self._remove_rows(rows)
+
+    def clear(self):
+        with self._lock:
+            self._remove_rows(set(range(len(self._ids))))
+
+    # ---- search ----
+
+    def _train_ivf(self):
+        """Cluster the vectors with spherical k-means into ~sqrt(n) inverted lists"""
+        matrix = np.asarray(self._matrix)
+        nlist = max(1, int(np.sqrt(len(matrix))))
+        rng = np.random.default_rng(0)
+        centroids = matrix[rng.choice(len(matrix), nlist, replace=False)]
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = matrix[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = _unit_rows(centroids)
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        self._lists = [np.flatnonzero(assignments == c) for c in range(nlist)]
+        self._centroids = centroids
+
+    def _candidate_rows(self, vector):
+        """Rows in the nprobe clusters closest to the query (IVF), or None (exact)"""
+        if len(self._ids) < self.ivf_min_vectors:
+            return None
+        if self._centroids is None:
+            self._train_ivf()
+        closest = np.argsort(self._centroids @ vector)[::-1][: self.nprobe]
+        return np.concatenate([self._lists[cluster] for cluster in closest])
+
+    def _allowed_rows(self, query):
+        """Row mask for the query's node_ids / doc_ids / metadata filters, or None"""
+        if not (query.node_ids or query.doc_ids or query.filters):
+            return None
+        node_ids = set(query.node_ids or [])
+        doc_ids = set(query.doc_ids or [])
+        return np.fromiter(
+            (
+                (not node_ids or node_id in node_ids)
+                and (not doc_ids or metadata.get("ref_doc_id") in doc_ids)
+                and (query.filters is None or _matches(metadata, query.filters))
+                for node_id, metadata in zip(self._ids, self._metadata)
+            ),
+            dtype=bool,
+            count=len(self._ids),
+        )
+
+    def query(self, query: VectorStoreQuery, **kwargs):
+        with self._lock:
+            self._reload_if_changed()
+            if not self._ids or query.query_embedding is None:
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+            vector = _unit_rows(np.asarray([query.query_embedding]))[0]
+            top_k = query.similarity_top_k
+            allowed = self._allowed_rows(query)
+            rows = self._candidate_rows(vector)
+            if rows is not None and allowed is not None:
+                rows = rows[allowed[rows]]
+            if rows is not None and len(rows) < top_k:
+                # The probed clusters are too small (or too filtered): search everything
+                rows = None
+            if rows is None:
+                rows = (
+                    np.flatnonzero(allowed)
+                    if allowed is not None
+                    else np.arange(len(self._ids))
+                )
+            if not len(rows):
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+            matrix = self._matrix if len(rows) == len(self._ids) else self._matrix[rows]
+            scores = np.asarray(matrix @ vector)
+            top = min(top_k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+
+            nodes, similarities, ids = [], [], []
+            for position in best:
+                row = int(rows[position])
+                nodes.append(metadata_dict_to_node(self._metadata[row]))
+                similarities.append(float(scores[position]))
+                ids.append(self._ids[row])
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
@@ -0,0 +1,185 @@
+# app/persistence.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from telegram.ext import BasePersistence, PersistenceInput
+from src.app.sessions import Session, sessions
+
+logger = logging.getLogger(__name__)
+
+# SQLite file for bot state; must live on a persistent disk to survive restarts
+PERSISTENCE_PATH = os.getenv("PERSISTENCE_PATH", "bot_state.sqlite3")
+# Seconds between PTB handing us changed user data / conversation states
+PERSISTENCE_INTERVAL = float(os.getenv("PERSISTENCE_INTERVAL", "5"))
+# Changes are buffered this long and then written in one transaction
+WRITE_DELAY_SECONDS = float(os.getenv("PERSISTENCE_WRITE_DELAY", "1"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL, key TEXT NOT NULL, state TEXT NOT NULL, PRIMARY KEY (name, key)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL
+);
+"""
+
+
+class SQLitePersistence(BasePersistence):
+    """Persists conversation states, user_data and user sessions to SQLite.
+
+    Handlers never wait on disk: changes are buffered in memory and written by a
+    background task in one transaction (off the event loop) every
+    WRITE_DELAY_SECONDS. Everything is read back with three SELECTs at startup.
+    """
+
+    def __init__(self, path=PERSISTENCE_PATH, update_interval=PERSISTENCE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=False, user_data=True, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._pending_user_data = {}  # user id -> data (None = delete)
+        self._pending_conversations = {}  # (name, key) -> state (None = delete)
+        self._write_task = None
+        self._write_lock = asyncio.Lock()
+
+    # ---- loading (once, at startup) ----
+
+    async def get_user_data(self):
+        rows = self._db.execute("SELECT user_id, data FROM user_data").fetchall()
+        self._load_sessions()
+        return {user_id: json.loads(data) for user_id, data in rows}
+
+    def _load_sessions(self):
+        cutoff = time.time() - sessions.ttl
+        rows = self._db.execute(
+            "SELECT user_id, data FROM sessions WHERE updated > ? ORDER BY updated",
+            (cutoff,),
+        ).fetchall()
+        for user_id, data in rows:
+            sessions.load(user_id, Session.from_dict(json.loads(data)))
+
+    async def get_conversations(self, name):
+        rows = self._db.execute(
+            "SELECT key, state FROM conversations WHERE name = ?", (name,)
+        ).fetchall()
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    # ---- buffered writes ----
+
+    def _schedule_write(self):
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._delayed_write())
+
+    async def _delayed_write(self):
+        await asyncio.sleep(WRITE_DELAY_SECONDS)
+        await self._write()
+
+    async def _write(self):
+        async with self._write_lock:
+            user_data, self._pending_user_data = self._pending_user_data, {}
+            conversations, self._pending_conversations = self._pending_conversations, {}
+            dirty_sessions = {
+                user_id: session.to_dict() if session is not None else None
+                for user_id, session in sessions.drain_dirty().items()
+            }
+            if not (user_data or conversations or dirty_sessions):
+                return
+            try:
+                await asyncio.to_thread(
+                    self._write_batch, user_data, conversations, dirty_sessions
+                )
+            except Exception as e:
+                logger.error(f"Error writing persistence batch: {e}")
+
+    def _write_batch(self, user_data, conversations, dirty_sessions):
+        now = time.time()
+        with self._db:
+            for user_id, data in user_data.items():
+                if data is None:
+                    self._db.execute(
+                        "DELETE FROM user_data WHERE user_id = ?", (user_id,)
+                    )
+                else:
+                    self._db.execute(
+                        "REPLACE INTO user_data VALUES (?, ?)",
+                        (user_id, json.dumps(data)),
+                    )
+            for (name, key), state in conversations.items():
+                if state is None:
+                    self._db.execute(
+                        "DELETE FROM conversations WHERE name = ? AND key = ?",
+                        (name, key),
+                    )
+                else:
+                    self._db.execute(
+                        "REPLACE INTO conversations VALUES (?, ?, ?)",
+                        (name, key, json.dumps(state)),
+                    )
+            for user_id, data in dirty_sessions.items():
+                if data is None:
+                    self._db.execute(
+                        "DELETE FROM sessions WHERE user_id = ?", (user_id,)
+                    )
+                else:
+                    self._db.execute(
+                        "REPLACE INTO sessions VALUES (?, ?, ?)",
+                        (user_id, json.dumps(data), now),
+                    )
+
+    async def update_user_data(self, user_id, data):
+        self._pending_user_data[user_id] = dict(data)
+        self._schedule_write()
+
+    async def update_conversation(self, name, key, new_state):
+        self._pending_conversations[(name, json.dumps(list(key)))] = new_state
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id):
+        self._pending_user_data[user_id] = None
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        """Write everything still buffered (called on shutdown)"""
+        if self._write_task is not None:
+            await self._write_task
+        await self._write()
+        self._db.close()
@@ -0,0 +1,161 @@
+# app/rag.py
+import asyncio
+import time
+from src.app.answer_cache import answer_cache, normalize_query
+from src.app.config import QUERY_CONCURRENCY, get_embed_model, get_query_engine
+from src.app.faq import get_faq_matcher
+from src.app.singleflight import SingleFlight
+from src.tracing import annotate, span
+
+# Bounds how many RAG queries hit OpenAI/Pinecone at the same time
+_query_semaphore = asyncio.Semaphore(QUERY_CONCURRENCY)
+
+# Coalesces identical questions being answered at the same time
+rag_flights = SingleFlight("rag")
+
+_query_engine = None
+
+
+async def _get_query_engine():
+    # The first build imports llama_index and connects to Pinecone: keep it off the loop
+    global _query_engine
+    if _query_engine is None:
+        _query_engine = await asyncio.to_thread(get_query_engine)
+    return _query_engine
+
+
+_faq_matcher = None
+
+
+async def _get_faq_matcher():
+    global _faq_matcher
+    if _faq_matcher is None:
+        _faq_matcher = await asyncio.to_thread(get_faq_matcher)
+    return _faq_matcher
+
+
+async def _push(streams, text):
+    """Show the partial answer to everyone waiting on it"""
+    # Followers may join (or leave) while the edits are in flight
+    snapshot = list(streams)
+    results = await asyncio.gather(
+        *(stream.push(text) for stream in snapshot), return_exceptions=True
+    )
+    for stream, result in zip(snapshot, results):
+        if isinstance(result, Exception) and stream in streams:
+            print(f"Error streaming answer: {result}")
+            streams.remove(stream)
+
+
+def _count_tokens(texts):
+    """Tokens in `texts`; tiktoken is CPU-bound, so call it in a worker thread"""
+    from llama_index.core.utils import get_tokenizer
+
+    tokenizer = get_tokenizer()
+    return sum(len(tokenizer(text)) for text in texts)
+
+
+async def _rag_answer(message, streams):
+    from llama_index.core.schema import QueryBundle
+
+    query_engine = await _get_query_engine()
+    queued = time.perf_counter()
+    async with _query_semaphore:
+        annotate(queue_ms=round((time.perf_counter() - queued) * 1000, 3))
+        try:
+            with span("rag.embed"):
+                embedding = await get_embed_model().aget_query_embedding(message)
+        except Exception as e:
+            print(f"Error embedding query for the answer cache: {e}")
+            embedding = None
+        if embedding is not None:
+            cached = answer_cache.get_similar(embedding, message)
+            if cached is not None:
+                annotate(answer="similar")
+                return cached
+
+        # Retrieval reuses the embedding computed for the cache lookup
+        query = QueryBundle(message, embedding=embedding)
+        with span("rag.retrieve") as retrieval:
+            nodes = await query_engine.aretrieve(query)
+            retrieval.set(nodes=len(nodes))
+        with span("rag.synthesize") as synthesis:
+            context_tokens = None
+            if synthesis.recording:
+                # Question plus retrieved context: what the prompt size depends
+                # on. Counted in a thread while the LLM works on the answer.
+                context_tokens = asyncio.ensure_future(
+                    asyncio.to_thread(
+                        _count_tokens,
+                        [message, *(node.get_content() for node in nodes)],
+                    )
+                )
+            started = time.perf_counter()
+            response = await query_engine.asynthesize(query, nodes)
+            if hasattr(response, "async_response_gen"):
+                answer = ""
+                tokens = 0
+                async for token in response.async_response_gen():
+                    if not tokens:
+                        synthesis.set(
+                            first_token_ms=round(
+                                (time.perf_counter() - started) * 1000, 3
+                            )
+                        )
+                    # OpenAI streams one token per chunk
+                    tokens += 1
+                    answer += token
+                    if streams:
+                        await _push(streams, answer)
+            else:
+                answer = str(response)
+                tokens = (
+                    await asyncio.to_thread(_count_tokens, [answer])
+                    if synthesis.recording
+                    else 0
+                )
+            synthesis.set(completion_tokens=tokens)
+            if context_tokens is not None:
+                synthesis.set(context_tokens=await context_tokens)
+    answer_cache.put(message, embedding, answer)
+    return answer
+
+
+async def match_faq(message):
+    """Curated FAQ answer for the message, or None"""
+    try:
+        with span("rag.faq"):
+            answer, _ = (await _get_faq_matcher()).match(message)
+        return answer
+    except Exception as e:
+        print(f"Error matching FAQ: {e}")
+        return None
+
+
+async def answer_question(message, stream=None):
+    """Answer a free-text question: curated FAQ first, then the answer cache, then RAG.
+
+    Runs the RAG query engine without blocking the event loop on a cache miss.
+    Identical questions (after normalization) asked while one is being answered
+    share that answer. When a StreamingReply is given, a RAG answer is pushed to
+    it as it's generated.
+    """
+    faq_answer = await match_faq(message)
+    if faq_answer is not None:
+        annotate(answer="faq")
+        return faq_answer
+
+    cached = answer_cache.get(message)
+    if cached is not None:
+        annotate(answer="cache")
+        return cached
+
+    if stream is not None:
+        # Only the RAG path is slow enough to be worth a placeholder
+        await stream.start()
+    annotate(answer="rag")
+    return await rag_flights.do(
+        normalize_query(message),
+        lambda streams: _rag_answer(message, streams),
+        listener=stream,
+    )
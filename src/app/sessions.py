@@ -0,0 +1,122 @@
+# app/sessions.py
+import datetime
+import os
+import time
+from collections import OrderedDict, namedtuple
+
+# Max number of user sessions kept in memory; least recently used are evicted first
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "5000"))
+# Sessions idle for longer than this are dropped
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+
+# The few fields of a Calendar event the cancel/edit menus need
+EventRef = namedtuple("EventRef", ["id", "start", "summary", "etag"])
+
+
+def event_ref(event):
+    """Compact reference to a Calendar event"""
+    return EventRef(
+        event["id"],
+        event["start"].get("dateTime") or event["start"].get("date"),
+        event.get("summary", ""),
+        event.get("etag"),
+    )
+
+
+class Session:
+    """Per-user conversation data"""
+
+    __slots__ = (
+        "events",
+        "start_time",
+        "client_name",
+        "edit_event_index",
+        "event_id",
+        "last_seen",
+    )
+
+    def __init__(self):
+        self.events = ()
+        self.start_time = None
+        self.client_name = None
+        self.edit_event_index = None
+        self.event_id = None
+        self.last_seen = time.monotonic()
+
+    def to_dict(self):
+        """JSON-serializable form, used by the persistence layer"""
+        return {
+            "events": [list(event) for event in self.events],
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "client_name": self.client_name,
+            "edit_event_index": self.edit_event_index,
+            "event_id": self.event_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls()
+        session.events = [EventRef(*event) for event in data.get("events", ())]
+        if data.get("start_time"):
+            session.start_time = datetime.datetime.fromisoformat(data["start_time"])
+        session.client_name = data.get("client_name")
+        session.edit_event_index = data.get("edit_event_index")
+        session.event_id = data.get("event_id")
+        return session
+
+
+class SessionStore:
+    """LRU + idle-TTL store of user sessions with a hard cap on the number of entries"""
+
+    def __init__(self, max_entries=SESSION_MAX_ENTRIES, ttl=SESSION_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # user id -> Session, least recently used first
+        self._dirty = set()  # user ids changed since the last drain_dirty()
+
+    def _evict(self, now):
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if (
+                len(self._sessions) <= self.max_entries
+                and now - session.last_seen < self.ttl
+            ):
+                break
+            del self._sessions[user_id]
+
+    def get(self, user_id):
+        """The user's session, created if missing or expired"""
+        now = time.monotonic()
+        session = self._sessions.get(user_id)
+        if session is None or now - session.last_seen >= self.ttl:
+            session = Session()
+            self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        session.last_seen = now
+        self._dirty.add(user_id)
+        self._evict(now)
+        return session
+
+    def reset(self, user_id):
+        """Start a fresh session for the user"""
+        self._sessions.pop(user_id, None)
+        return self.get(user_id)
+
+    def load(self, user_id, session):
+        """Restore a persisted session (at startup)"""
+        self._sessions[user_id] = session
+        self._evict(time.monotonic())
+
+    def drain_dirty(self):
+        """{user id: session or None if evicted} for sessions touched since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        return {user_id: self._sessions.get(user_id) for user_id in dirty}
+
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+sessions = SessionStore()
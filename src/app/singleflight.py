@@ -0,0 +1,95 @@
+# app/singleflight.py
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Keys whose call counts are kept (least recently used are forgotten)
+METRICS_MAX_KEYS = 1000
+# Log totals every this many calls
+STATS_EVERY = 100
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight computation.
+
+    The first caller runs `operation(listeners)`; callers arriving before it
+    finishes wait for the same result (or exception). If the first caller is
+    cancelled, a waiting caller runs the operation again instead. Each caller may
+    attach a listener, which is added to the live `listeners` list the operation
+    sees, so it can fan progress out to everyone waiting. Nothing is kept once the
+    computation finishes: this is coalescing, not caching.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}  # key -> (future, listeners)
+        self._metrics = OrderedDict()  # key -> [calls, shared]
+        self.calls = 0
+        self.shared = 0
+
+    def _count(self, key, shared):
+        metrics = self._metrics.pop(key, None) or [0, 0]
+        metrics[0] += 1
+        metrics[1] += shared
+        self._metrics[key] = metrics
+        while len(self._metrics) > METRICS_MAX_KEYS:
+            self._metrics.popitem(last=False)
+        self.calls += 1
+        self.shared += shared
+        if self.calls % STATS_EVERY == 0:
+            logger.info(f"Singleflight {self.name}: {self.stats()}")
+
+    async def do(self, key, operation, listener=None):
+        counted = False
+        while key in self._inflight:
+            future, listeners = self._inflight[key]
+            if not counted:
+                self._count(key, True)
+                counted = True
+            if listener is not None:
+                listeners.append(listener)
+            try:
+                # A follower giving up must not cancel the shared computation
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: retry, leading if nobody else is
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            finally:
+                if listener in listeners:
+                    listeners.remove(listener)
+
+        future = asyncio.get_running_loop().create_future()
+        listeners = [listener] if listener is not None else []
+        self._inflight[key] = (future, listeners)
+        if not counted:
+            self._count(key, False)
+        try:
+            result = await operation(listeners)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self, top=5):
+        """Totals and the keys that saved the most calls"""
+        busiest = sorted(
+            self._metrics.items(), key=lambda item: item[1][1], reverse=True
+        )[:top]
+        return {
+            "calls": self.calls,
+            "saved": self.shared,
+            "in_flight": len(self._inflight),
+            "top_keys": {key: {"calls": c, "saved": s} for key, (c, s) in busiest if s},
+        }
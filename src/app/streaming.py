@@ -0,0 +1,83 @@
+# app/streaming.py
+import asyncio
+import datetime
+import os
+import time
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest, RetryAfter
+
+# Minimum seconds between two edits of the same message (Telegram allows about
+# one per second per chat before flood control kicks in)
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+# Don't bother editing for fewer new characters than this
+STREAM_MIN_CHARS = int(os.getenv("STREAM_MIN_CHARS", "20"))
+PLACEHOLDER = "💭 ..."
+CURSOR = " ▌"
+
+
+def _seconds(retry_after):
+    if isinstance(retry_after, datetime.timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class StreamingReply:
+    """Reply that grows as the answer is generated.
+
+    start() sends a placeholder; push() edits it with the text so far, at most
+    once per STREAM_EDIT_INTERVAL; finish() writes the final answer. If
+    start() was never called (FAQ or cached answer), finish() just replies.
+    """
+
+    def __init__(self, message, interval=STREAM_EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.sent = None
+        self.shown = ""
+        self.next_edit = 0.0
+        self.edits = 0
+
+    async def start(self):
+        if self.sent is None:
+            self.sent = await self.message.reply_text(PLACEHOLDER)
+            self.next_edit = time.monotonic() + self.interval
+
+    async def push(self, text):
+        """Show the partial answer, unless an edit went out too recently"""
+        if self.sent is None:
+            await self.start()
+        if (
+            time.monotonic() < self.next_edit
+            or len(text) - len(self.shown) < STREAM_MIN_CHARS
+        ):
+            return
+        limit = MessageLimit.MAX_TEXT_LENGTH - len(CURSOR)
+        await self._edit(text[:limit] + CURSOR)
+        self.shown = text
+
+    async def finish(self, text):
+        limit = MessageLimit.MAX_TEXT_LENGTH
+        chunks = [text[i : i + limit] for i in range(0, len(text), limit)] or [text]
+        if self.sent is None:
+            await self.message.reply_text(chunks[0])
+        else:
+            # The final text must land even if we were rate limited
+            while not await self._edit(chunks[0]):
+                await asyncio.sleep(max(0.0, self.next_edit - time.monotonic()))
+        for chunk in chunks[1:]:
+            await self.message.reply_text(chunk)
+
+    async def _edit(self, text):
+        """Edit the sent message; False if Telegram asked us to slow down"""
+        try:
+            await self.sent.edit_text(text)
+        except RetryAfter as e:
+            self.next_edit = time.monotonic() + _seconds(e.retry_after)
+            return False
+        except BadRequest as e:
+            # Same text as already shown
+            if "not modified" not in str(e).lower():
+                raise
+        self.edits += 1
+        self.next_edit = time.monotonic() + self.interval
+        return True
@@ -0,0 +1,24 @@
+# app/vector_stores.py
+import asyncio
+
+
+class ThreadedQueries:
+    """Mixin for vector stores whose client only has a blocking query()
+
+    BasePydanticVectorStore.aquery falls back to the sync query(), which would
+    block the event loop for a whole network round trip; run it in a worker
+    thread instead.
+    """
+
+    async def aquery(self, query, **kwargs):
+        return await asyncio.to_thread(self.query, query, **kwargs)
+
+
+def pinecone_vector_store(pinecone_index):
+    """PineconeVectorStore (which has no native aquery) with threaded queries"""
+    from llama_index.vector_stores.pinecone import PineconeVectorStore
+
+    class ThreadedPineconeVectorStore(ThreadedQueries, PineconeVectorStore):
+        pass
+
+    return ThreadedPineconeVectorStore(pinecone_index)
@@ -0,0 +1,238 @@
+# availability.py
+import datetime
+import time
+from bisect import bisect_left, bisect_right
+import pytz
+from src.google_calendar import TIMEZONE, get_busy_intervals, mirror
+
+# Opening hours per weekday (Monday=0). Days that are missing are closed.
+BUSINESS_HOURS = {
+    0: (datetime.time(10), datetime.time(18)),
+    1: (datetime.time(10), datetime.time(18)),
+    2: (datetime.time(10), datetime.time(18)),
+    3: (datetime.time(10), datetime.time(18)),
+    4: (datetime.time(10), datetime.time(18)),
+    5: (datetime.time(11), datetime.time(15)),
+}
+SLOT_MINUTES = 30
+# How far ahead the busy index covers
+HORIZON_DAYS = 30
+# How long a busy index built from free/busy queries is reused before refreshing
+INDEX_TTL_SECONDS = 30
+
+DAY_NAMES = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+def _format_hour(value):
+    hour = value.hour % 12 or 12
+    suffix = "am" if value.hour < 12 else "pm"
+    if value.minute:
+        return f"{hour}:{value.minute:02d}{suffix}"
+    return f"{hour}{suffix}"
+
+
+def describe_hours(hours=BUSINESS_HOURS):
+    """Human readable opening hours, grouping consecutive days with the same hours"""
+    lines = []
+    day = 0
+    while day < 7:
+        if day not in hours:
+            day += 1
+            continue
+        last = day
+        while last + 1 < 7 and hours.get(last + 1) == hours[day]:
+            last += 1
+        opening, closing = hours[day]
+        days = (
+            DAY_NAMES[day] if last == day else f"{DAY_NAMES[day]} to {DAY_NAMES[last]}"
+        )
+        lines.append(f"- {days}: {_format_hour(opening)} - {_format_hour(closing)}")
+        day = last + 1
+    return "\n".join(lines)
+
+
+class IntervalIndex:
+    """Sorted, merged busy intervals answering overlap queries in O(log n)"""
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        for start, end in sorted(intervals):
+            if self._ends and start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlaps(self, start, end):
+        """True if [start, end) intersects any busy interval"""
+        # Merged intervals are disjoint, so only the one starting right before `end` matters
+        i = bisect_left(self._starts, end) - 1
+        return i >= 0 and self._ends[i] > start
+
+    def add(self, start, end):
+        """Insert a busy interval, merging it with its neighbours"""
+        i = bisect_left(self._starts, start)
+        j = bisect_right(self._starts, end)
+        if i > 0 and self._ends[i - 1] >= start:
+            i -= 1
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def next_free(self, start, end):
+        """End of the busy interval that blocks [start, end), or None if it is free"""
+        i = bisect_left(self._starts, end) - 1
+        if i >= 0 and self._ends[i] > start:
+            return self._ends[i]
+        return None
+
+
+def is_within_hours(start, end, tz, hours=BUSINESS_HOURS):
+    """True if [start, end) falls inside the opening hours of the day it starts on"""
+    day = start.astimezone(tz).date()
+    opening_hours = hours.get(day.weekday())
+    if opening_hours is None:
+        return False
+    opening, closing = opening_hours
+    return tz.localize(
+        datetime.datetime.combine(day, opening)
+    ) <= start and end <= tz.localize(datetime.datetime.combine(day, closing))
+
+
+def without(intervals, excluded):
+    """The busy intervals with `excluded` (start, end) cut out of them"""
+    if excluded is None:
+        return list(intervals)
+    excluded_start, excluded_end = excluded
+    remaining = []
+    for start, end in intervals:
+        if end <= excluded_start or excluded_end <= start:
+            remaining.append((start, end))
+            continue
+        # Free/busy merges adjacent bookings, so keep what lies outside `excluded`
+        if start < excluded_start:
+            remaining.append((start, excluded_start))
+        if excluded_end < end:
+            remaining.append((excluded_end, end))
+    return remaining
+
+
+def next_free_slots(
+    index,
+    after,
+    count,
+    tz,
+    hours=BUSINESS_HOURS,
+    slot_minutes=SLOT_MINUTES,
+    now=None,
+):
+    """The next `count` free slot start times from `after` (never in the past), on the slot grid"""
+    after = max(after, now or datetime.datetime.now(datetime.timezone.utc))
+    slot = datetime.timedelta(minutes=slot_minutes)
+    day = after.astimezone(tz).date()
+    midnight = tz.localize(datetime.datetime.combine(day, datetime.time()))
+    # Round up to the next slot boundary
+    earliest = midnight + -(-(after - midnight) // slot) * slot
+
+    slots = []
+    for _ in range(HORIZON_DAYS + 1):
+        opening_hours = hours.get(day.weekday())
+        if opening_hours is not None:
+            opening, closing = opening_hours
+            day_start = tz.localize(datetime.datetime.combine(day, opening))
+            day_end = tz.localize(datetime.datetime.combine(day, closing))
+            candidate = max(day_start, earliest)
+            while candidate + slot <= day_end:
+                blocked_until = index.next_free(candidate, candidate + slot)
+                if blocked_until is None:
+                    slots.append(candidate)
+                    if len(slots) == count:
+                        return slots
+                    candidate += slot
+                else:
+                    # Jump past the busy interval, back onto the slot grid
+                    candidate = (
+                        day_start + -(-(blocked_until - day_start) // slot) * slot
+                    )
+        day += datetime.timedelta(days=1)
+    return slots
+
+
+# Busy index over [now, now + HORIZON_DAYS), rebuilt when the mirror changes or
+# (without a mirror) when it is older than INDEX_TTL_SECONDS
+_busy_index = None
+_busy_window_end = None
+_busy_index_key = None
+_busy_index_built = 0.0
+
+
+async def get_busy_index():
+    """Current busy-interval index, fed from the calendar mirror or free/busy queries"""
+    global _busy_index, _busy_window_end, _busy_index_key, _busy_index_built
+    key = ("mirror", mirror.version) if mirror.ready else ("freebusy", None)
+    fresh = (
+        _busy_index is not None
+        and _busy_index_key == key
+        and (mirror.ready or time.monotonic() - _busy_index_built < INDEX_TTL_SECONDS)
+    )
+    if not fresh:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        window_end = now + datetime.timedelta(days=HORIZON_DAYS + 1)
+        intervals = await get_busy_intervals(now, window_end)
+        _busy_index = IntervalIndex(intervals)
+        _busy_window_end = window_end
+        _busy_index_key = key
+        _busy_index_built = time.monotonic()
+    return _busy_index
+
+
+def mark_busy(start, duration_minutes=SLOT_MINUTES):
+    """Record a new booking in the cached index without waiting for a refresh"""
+    if _busy_index is not None:
+        _busy_index.add(start, start + datetime.timedelta(minutes=duration_minutes))
+
+
+async def is_slot_available(start, duration_minutes=SLOT_MINUTES, exclude=None):
+    """True if the slot is in the future, inside opening hours and not booked.
+
+    `exclude` is the (start, end) of an event being moved: it doesn't block its
+    own new time, so it can be shifted into an overlap with where it was.
+    """
+    tz = pytz.timezone(TIMEZONE)
+    end = start + datetime.timedelta(minutes=duration_minutes)
+    if start < datetime.datetime.now(datetime.timezone.utc):
+        return False
+    if not is_within_hours(start, end, tz):
+        return False
+    index = await get_busy_index()
+    if end > _busy_window_end:
+        index = IntervalIndex(await get_busy_intervals(start, end))
+    if exclude is not None and index.overlaps(start, end):
+        # The merged index can't drop one event; recheck against the raw intervals
+        index = IntervalIndex(without(await get_busy_intervals(start, end), exclude))
+    return not index.overlaps(start, end)
+
+
+async def find_free_slots(after, count=3, duration_minutes=SLOT_MINUTES, exclude=None):
+    """The next `count` bookable slots at or after `after` (see is_slot_available)"""
+    tz = pytz.timezone(TIMEZONE)
+    index = await get_busy_index()
+    if exclude is not None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        intervals = await get_busy_intervals(now, _busy_window_end)
+        index = IntervalIndex(without(intervals, exclude))
+    return next_free_slots(index, after, count, tz, slot_minutes=duration_minutes)
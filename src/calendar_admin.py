@@ -0,0 +1,105 @@
+# calendar_admin.py
+"""Bulk calendar operations for operators.
+
+Usage:
+    python -m src.calendar_admin cancel-day 2026-04-20 [--dry-run]
+    python -m src.calendar_admin import bookings.csv
+    python -m src.calendar_admin backfill-owners [--days 365] [--dry-run]
+
+The import CSV needs `start` (e.g. 2026-04-20T10:00) and `name` columns, and
+may have `user_id` and `duration_minutes` columns.
+
+backfill-owners is a one-off for events booked before owners were stored as
+an extended property: it copies the user id from their description.
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import pytz
+from src.calendar_mirror import legacy_owner
+from src.google_calendar import (
+    backfill_user_ids,
+    batch_create_events,
+    calendar,
+    cancel_day,
+    list_day_events,
+    list_legacy_events,
+    TIMEZONE,
+)
+
+
+def summarize(results):
+    failed = [result for result in results if not result.ok]
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+    for result in failed:
+        print(f"  {result.status_code}: {result.body}")
+
+
+async def run_cancel_day(day, dry_run=False):
+    if dry_run:
+        for event in await list_day_events(day):
+            print(f"Would cancel {event['id']}: {event.get('summary')}")
+        return
+    events, results = await cancel_day(day)
+    print(f"Canceling {len(events)} event(s) on {day}")
+    summarize(results)
+
+
+async def run_import(path):
+    with open(path, newline="") as f:
+        bookings = [
+            {
+                "summary": f"Appointment with {row['name']}",
+                "description": "Imported via CusChatAI admin",
+                "start_time": datetime.datetime.fromisoformat(row["start"]),
+                "duration_minutes": int(row.get("duration_minutes") or 30),
+                "user_id": row.get("user_id") or None,
+            }
+            for row in csv.DictReader(f)
+        ]
+    print(f"Importing {len(bookings)} booking(s)")
+    summarize(await batch_create_events(bookings))
+
+
+async def run_backfill_owners(days, dry_run=False):
+    time_min = datetime.datetime.now(pytz.timezone(TIMEZONE))
+    time_max = time_min + datetime.timedelta(days=days)
+    if dry_run:
+        for event in await list_legacy_events(time_min, time_max):
+            print(f"Would tag {event['id']} with user {legacy_owner(event)}")
+        return
+    events, results = await backfill_user_ids(time_min, time_max)
+    print(f"Tagging {len(events)} legacy event(s) with their owner")
+    summarize(results)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk Google Calendar operations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    cancel_parser = subparsers.add_parser("cancel-day", help="Cancel a whole day")
+    cancel_parser.add_argument("day", type=datetime.date.fromisoformat)
+    cancel_parser.add_argument("--dry-run", action="store_true")
+    import_parser = subparsers.add_parser("import", help="Import bookings from CSV")
+    import_parser.add_argument("path")
+    backfill_parser = subparsers.add_parser(
+        "backfill-owners", help="Tag legacy events with their owner's user id"
+    )
+    backfill_parser.add_argument("--days", type=int, default=365)
+    backfill_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "cancel-day":
+            await run_cancel_day(args.day, args.dry_run)
+        elif args.command == "backfill-owners":
+            await run_backfill_owners(args.days, args.dry_run)
+        else:
+            await run_import(args.path)
+    finally:
+        await calendar.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
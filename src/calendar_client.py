@@ -0,0 +1,240 @@
+# calendar_client.py
+import asyncio
+import json as jsonlib
+import uuid
+from collections import namedtuple
+from urllib.parse import quote, urlsplit
+import httpx
+from src.tracing import span
+
+CALENDAR_API_URL = "https://www.googleapis.com/calendar/v3"
+# The Calendar API accepts at most 50 calls per batch request
+BATCH_LIMIT = 50
+
+BatchOperation = namedtuple(
+    "BatchOperation", ["method", "path", "body", "headers"], defaults=[None, None]
+)
+
+
+class BatchResult(namedtuple("BatchResult", ["status_code", "body"])):
+    """Outcome of one operation inside a batch request"""
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+
+class CalendarError(Exception):
+    """Error returned by the Google Calendar API"""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Calendar API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class CalendarConflictError(CalendarError):
+    """The event changed since it was read (ETag mismatch)"""
+
+
+class AsyncCalendarClient:
+    """Async Google Calendar client sharing one pooled keep-alive HTTP connection pool.
+
+    Safe to use from many coroutines at once: httpx multiplexes requests over the
+    pool and token refreshes are serialized behind a lock.
+    """
+
+    def __init__(
+        self,
+        calendar_id,
+        credentials=None,
+        credentials_loader=None,
+        base_url=CALENDAR_API_URL,
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=60.0,
+        timeout=10.0,
+    ):
+        self.calendar_id = calendar_id
+        self.credentials = credentials
+        # Called on the first request when no credentials were given
+        self.credentials_loader = credentials_loader
+        self.base_url = base_url.rstrip("/")
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = timeout
+        self._client = None
+        self._token_lock = asyncio.Lock()
+
+    @property
+    def events_path(self):
+        return f"/calendars/{quote(self.calendar_id, safe='')}/events"
+
+    def _get_client(self):
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, limits=self._limits, timeout=self._timeout
+            )
+        return self._client
+
+    async def _auth_headers(self):
+        if self.credentials is None:
+            if self.credentials_loader is None:
+                return {}
+            async with self._token_lock:
+                if self.credentials is None:
+                    self.credentials = await asyncio.to_thread(self.credentials_loader)
+        if not self.credentials.valid:
+            async with self._token_lock:
+                if not self.credentials.valid:
+                    from google.auth.transport.requests import Request
+
+                    await asyncio.to_thread(self.credentials.refresh, Request())
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    async def request(self, method, path, params=None, json=None, headers=None):
+        """Send a request to the Calendar API and return the decoded JSON body"""
+        with span(f"calendar.{method}", path=path) as current:
+            request_headers = await self._auth_headers()
+            if headers:
+                request_headers.update(headers)
+            response = await self._get_client().request(
+                method, path, params=params, json=json, headers=request_headers
+            )
+            current.set(status=response.status_code)
+        if response.status_code >= 400:
+            try:
+                message = response.json()["error"]["message"]
+            except Exception:
+                message = response.text
+            if response.status_code == 412:
+                raise CalendarConflictError(response.status_code, message)
+            raise CalendarError(response.status_code, message)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    async def insert_event(self, body):
+        return await self.request("POST", self.events_path, json=body)
+
+    async def get_event(self, event_id):
+        return await self.request("GET", f"{self.events_path}/{quote(event_id)}")
+
+    async def update_event(self, event_id, body):
+        return await self.request(
+            "PUT", f"{self.events_path}/{quote(event_id)}", json=body
+        )
+
+    async def patch_event(self, event_id, body, etag=None):
+        # If-Match makes the server reject the write when someone else changed the event
+        headers = {"If-Match": etag} if etag else None
+        return await self.request(
+            "PATCH", f"{self.events_path}/{quote(event_id)}", json=body, headers=headers
+        )
+
+    async def delete_event(self, event_id):
+        await self.request("DELETE", f"{self.events_path}/{quote(event_id)}")
+
+    async def list_events(self, **params):
+        return await self.request("GET", self.events_path, params=params)
+
+    async def freebusy(self, time_min, time_max):
+        """Busy ranges of this calendar between two RFC3339 timestamps"""
+        result = await self.request(
+            "POST",
+            "/freeBusy",
+            json={
+                "timeMin": time_min,
+                "timeMax": time_max,
+                "items": [{"id": self.calendar_id}],
+            },
+        )
+        return result["calendars"][self.calendar_id].get("busy", [])
+
+    async def batch(self, operations):
+        """Run many operations through Calendar batch requests.
+
+        Operations are grouped BATCH_LIMIT at a time into multipart/mixed
+        requests. Returns one BatchResult per operation, in order; a failed item
+        doesn't fail the others.
+        """
+        results = []
+        for offset in range(0, len(operations), BATCH_LIMIT):
+            chunk = operations[offset : offset + BATCH_LIMIT]
+            results.extend(await self._send_batch(chunk))
+        return results
+
+    async def _send_batch(self, operations):
+        base = urlsplit(self.base_url)
+        batch_url = f"{base.scheme}://{base.netloc}/batch{base.path}"
+        boundary = f"batch_{uuid.uuid4().hex}"
+
+        parts = []
+        for i, operation in enumerate(operations):
+            lines = [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item{i}>",
+                "",
+                f"{operation.method} {base.path}{operation.path} HTTP/1.1",
+            ]
+            for name, value in (operation.headers or {}).items():
+                lines.append(f"{name}: {value}")
+            if operation.body is not None:
+                lines += [
+                    "Content-Type: application/json",
+                    "",
+                    jsonlib.dumps(operation.body),
+                ]
+            else:
+                lines.append("")
+            parts.append("\r\n".join(lines))
+        payload = "\r\n".join(parts) + f"\r\n--{boundary}--\r\n"
+
+        with span("calendar.batch", operations=len(operations)) as current:
+            headers = await self._auth_headers()
+            headers["Content-Type"] = f"multipart/mixed; boundary={boundary}"
+            response = await self._get_client().post(
+                batch_url, content=payload.encode(), headers=headers
+            )
+            current.set(status=response.status_code)
+        if response.status_code >= 400:
+            raise CalendarError(response.status_code, response.text)
+
+        results = [BatchResult(500, None)] * len(operations)
+        for content_id, result in _parse_batch_response(response):
+            index = int(content_id.rsplit("item", 1)[1])
+            results[index] = result
+        return results
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _parse_batch_response(response):
+    """Yield (content id, BatchResult) for every part of a multipart/mixed batch response"""
+    content_type = response.headers.get("Content-Type", "")
+    boundary = content_type.split("boundary=", 1)[1].strip('"')
+    for part in response.text.split(f"--{boundary}"):
+        part = part.strip()
+        if not part or part == "--":
+            continue
+        outer_headers, _, http_response = part.partition("\r\n\r\n")
+        content_id = ""
+        for line in outer_headers.split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                content_id = value.strip().strip("<>")
+        status_line, _, rest = http_response.partition("\r\n")
+        status_code = int(status_line.split()[1])
+        _, _, body = rest.partition("\r\n\r\n")
+        body = body.strip()
+        yield content_id, BatchResult(
+            status_code, jsonlib.loads(body) if body else None
+        )
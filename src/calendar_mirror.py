@@ -0,0 +1,181 @@
+# calendar_mirror.py
+import asyncio
+import datetime
+import logging
+import re
+from collections import defaultdict
+from src.calendar_client import CalendarError
+
+logger = logging.getLogger(__name__)
+
+# Events booked (or rescheduled) before owners were stored in an extended
+# property only name the user in their description
+LEGACY_OWNER_PATTERN = re.compile(r"(?:Scheduled|Edited) by user (\d+) via")
+
+
+def legacy_owner(event):
+    """Telegram user id from the description of an untagged (legacy) event, or None"""
+    match = LEGACY_OWNER_PATTERN.search(event.get("description") or "")
+    return match.group(1) if match else None
+
+
+def parse_event_time(value, tz):
+    """Parse an event start/end ({"dateTime": ...} or all-day {"date": ...}) as an aware datetime"""
+    if "dateTime" in value:
+        return datetime.datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    day = datetime.date.fromisoformat(value["date"])
+    return tz.localize(datetime.datetime.combine(day, datetime.time()))
+
+
+class CalendarMirror:
+    """In-memory mirror of upcoming calendar events, kept current with sync tokens.
+
+    A full sync runs once; after that each sync only fetches what changed since
+    the last nextSyncToken. Writes made by the bot are applied immediately
+    through apply()/discard() so reads never wait for the next sync.
+    """
+
+    def __init__(self, client, tz, user_property, interval=30.0):
+        self.client = client
+        self.tz = tz
+        self.user_property = user_property
+        self.interval = interval
+        self.ready = False
+        # Bumped on every change so derived indexes know when to rebuild
+        self.version = 0
+        self._events = {}  # event id -> event
+        self._times = {}  # event id -> (start, end)
+        self._user_index = defaultdict(set)  # telegram user id -> event ids
+        self._sync_token = None
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _owner(self, event):
+        owner = (
+            event.get("extendedProperties", {})
+            .get("private", {})
+            .get(self.user_property)
+        )
+        return owner if owner is not None else legacy_owner(event)
+
+    def apply(self, event):
+        """Insert or replace an event in the mirror"""
+        event_id = event["id"]
+        if event.get("status") == "cancelled":
+            self.discard(event_id)
+            return
+        current = self._events.get(event_id)
+        if current is not None and current.get("updated", "") > event.get(
+            "updated", ""
+        ):
+            return  # A newer copy was already written through
+        try:
+            start = parse_event_time(event["start"], self.tz)
+            end = parse_event_time(event["end"], self.tz)
+        except (KeyError, ValueError):
+            return
+        if end <= datetime.datetime.now(datetime.timezone.utc):
+            self.discard(event_id)
+            return
+        if current is not None:
+            self._unindex(event_id, current)
+        self._events[event_id] = event
+        self._times[event_id] = (start, end)
+        self.version += 1
+        owner = self._owner(event)
+        if owner is not None:
+            self._user_index[owner].add(event_id)
+
+    def discard(self, event_id):
+        """Remove an event from the mirror"""
+        event = self._events.pop(event_id, None)
+        self._times.pop(event_id, None)
+        if event is not None:
+            self._unindex(event_id, event)
+            self.version += 1
+
+    def _unindex(self, event_id, event):
+        owner = self._owner(event)
+        if owner is not None:
+            ids = self._user_index.get(owner)
+            if ids is not None:
+                ids.discard(event_id)
+                if not ids:
+                    del self._user_index[owner]
+
+    def user_events(self, user_id, max_results=10):
+        """Upcoming events owned by a Telegram user, ordered by start time"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        ids = [
+            event_id
+            for event_id in self._user_index.get(str(user_id), ())
+            if self._times[event_id][0] >= now
+        ]
+        ids.sort(key=lambda event_id: self._times[event_id][0])
+        return [self._events[event_id] for event_id in ids[:max_results]]
+
+    def busy_intervals(self, time_min, time_max):
+        """(start, end) of every event overlapping [time_min, time_max), sorted by start"""
+        return sorted(
+            (start, end)
+            for start, end in self._times.values()
+            if start < time_max and end > time_min
+        )
+
+    async def sync(self):
+        """Fetch changes since the last sync (or everything on the first run)"""
+        async with self._lock:
+            return await self._sync()
+
+    async def _sync(self):
+        params = {"singleEvents": True, "maxResults": 2500}
+        if self._sync_token:
+            params["syncToken"] = self._sync_token
+        changes = []
+        try:
+            while True:
+                result = await self.client.list_events(**params)
+                changes.extend(result.get("items", []))
+                if "nextPageToken" not in result:
+                    break
+                params["pageToken"] = result["nextPageToken"]
+        except CalendarError as error:
+            if error.status_code != 410 or not self._sync_token:
+                raise
+            # Sync token expired: start over with a full sync
+            logger.info("Calendar sync token expired, running a full sync")
+            self._sync_token = None
+            self._events.clear()
+            self._times.clear()
+            self._user_index.clear()
+            return await self._sync()
+
+        for event in changes:
+            self.apply(event)
+        self._sync_token = result.get("nextSyncToken")
+        self.ready = True
+        return len(changes)
+
+    async def run(self):
+        """Background worker: sync every `interval` seconds"""
+        while True:
+            try:
+                changed = await self.sync()
+                if changed:
+                    logger.info(f"Calendar mirror synced {changed} change(s)")
+            except Exception as e:
+                logger.error(f"Error syncing calendar mirror: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
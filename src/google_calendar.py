@@ -3,11 +3,16 @@ import os
 import datetime
 import json
 import pytz
-from pathlib import Path
+from urllib.parse import quote
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from src.calendar_client import (
+    AsyncCalendarClient,
+    CalendarError,
+    CalendarConflictError,
+    CALENDAR_API_URL,
+    BatchOperation,
+)
+from src.calendar_mirror import CalendarMirror, legacy_owner, parse_event_time
 
 load_dotenv()
 
@@ -17,31 +22,58 @@ SCOPES = ["https://www.googleapis.com/auth/calendar"]
 service_account_json_value = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
 CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID")
 TIMEZONE = os.getenv("TIMEZONE", "America/Mexico_City")
+# Override to point the client at a local fake Calendar server (no auth is sent)
+CALENDAR_API_BASE_URL = os.getenv("GOOGLE_CALENDAR_API_URL")
+# Seconds between incremental syncs of the local calendar mirror
+MIRROR_SYNC_INTERVAL = float(os.getenv("CALENDAR_MIRROR_SYNC_INTERVAL", "30"))
+
 
-# Better handling of service account JSON
-SERVICE_ACCOUNT_INFO = None
-try:
-    # First try to parse as JSON string
-    SERVICE_ACCOUNT_INFO = json.loads(service_account_json_value)
-except (json.JSONDecodeError, TypeError):
+def load_credentials():
+    """Parse the service account credentials (on the first Calendar call)"""
+    from google.oauth2 import service_account
+
+    # Better handling of service account JSON
     try:
-        # If that fails, try as a file path
-        with open(service_account_json_value, "r") as f:
-            SERVICE_ACCOUNT_INFO = json.load(f)
-    except Exception as e:
-        print(f"Error loading Google Service Account: {e}")
-        # Provide fallback implementation or raise error
-        raise RuntimeError("Could not load Google Service Account credentials")
-
-# Create credentials and service
-credentials = service_account.Credentials.from_service_account_info(
-    SERVICE_ACCOUNT_INFO, scopes=SCOPES
+        # First try to parse as JSON string
+        service_account_info = json.loads(service_account_json_value)
+    except (json.JSONDecodeError, TypeError):
+        try:
+            # If that fails, try as a file path
+            with open(service_account_json_value, "r") as f:
+                service_account_info = json.load(f)
+        except Exception as e:
+            print(f"Error loading Google Service Account: {e}")
+            # Provide fallback implementation or raise error
+            raise RuntimeError("Could not load Google Service Account credentials")
+
+    # Create credentials
+    return service_account.Credentials.from_service_account_info(
+        service_account_info, scopes=SCOPES
+    )
+
+
+# Shared async client with a pooled keep-alive connection pool
+calendar = AsyncCalendarClient(
+    CALENDAR_ID,
+    # A fake Calendar server (GOOGLE_CALENDAR_API_URL) needs no credentials
+    credentials_loader=None if CALENDAR_API_BASE_URL else load_credentials,
+    base_url=CALENDAR_API_BASE_URL or CALENDAR_API_URL,
+)
+
+# Private extended property used to tag events with the Telegram user who owns them
+USER_ID_PROPERTY = "telegram_user_id"
+
+# Local mirror of upcoming events; reads are served from it once the first sync finished
+mirror = CalendarMirror(
+    calendar,
+    pytz.timezone(TIMEZONE),
+    USER_ID_PROPERTY,
+    interval=MIRROR_SYNC_INTERVAL,
 )
-service = build("calendar", "v3", credentials=credentials)
 
 
-def create_event(summary, description, start_time, duration_minutes=30):
-    """Create an event in Google Calendar"""
+def _event_times(start_time, duration_minutes):
+    """Build the start/end fields of an event body"""
     # Ensure timezone is applied
     local_tz = pytz.timezone(TIMEZONE)
     if start_time.tzinfo is None:
@@ -49,9 +81,7 @@ def create_event(summary, description, start_time, duration_minutes=30):
 
     end_time = start_time + datetime.timedelta(minutes=duration_minutes)
 
-    event = {
-        "summary": summary,
-        "description": description,
+    return {
         "start": {
             "dateTime": start_time.isoformat(),
             "timeZone": TIMEZONE,
@@ -62,101 +92,260 @@ def create_event(summary, description, start_time, duration_minutes=30):
         },
     }
 
+
+def _event_body(summary, description, start_time, duration_minutes=30, user_id=None):
+    """Build the body of a new event"""
+    event = {
+        "summary": summary,
+        "description": description,
+        **_event_times(start_time, duration_minutes),
+    }
+    if user_id is not None:
+        event["extendedProperties"] = {"private": {USER_ID_PROPERTY: str(user_id)}}
+    return event
+
+
+async def create_event(
+    summary, description, start_time, duration_minutes=30, user_id=None
+):
+    """Create an event in Google Calendar, tagged with the owner's Telegram user id"""
+    event = _event_body(summary, description, start_time, duration_minutes, user_id)
+
     try:
-        created_event = (
-            service.events().insert(calendarId=CALENDAR_ID, body=event).execute()
-        )
+        created_event = await calendar.insert_event(event)
+        mirror.apply(created_event)
         print(f"Event created: {created_event.get('htmlLink')}")
         return created_event["id"]
-    except HttpError as error:
+    except CalendarError as error:
         print(f"An error occurred creating the event: {error}")
         raise
 
 
-def delete_event(event_id):
+async def delete_event(event_id):
     """Delete an event from Google Calendar"""
     try:
-        service.events().delete(calendarId=CALENDAR_ID, eventId=event_id).execute()
+        await calendar.delete_event(event_id)
+        mirror.discard(event_id)
         print(f"Event {event_id} deleted")
         return True
-    except HttpError as error:
+    except CalendarError as error:
         print(f"An error occurred deleting the event: {error}")
         raise
 
 
-def update_event(
-    event_id, summary=None, description=None, start_time=None, duration_minutes=30
+async def update_event(
+    event_id,
+    summary=None,
+    description=None,
+    start_time=None,
+    duration_minutes=30,
+    etag=None,
 ):
-    """Update an existing event in Google Calendar"""
-    try:
-        # First get the existing event
-        event = service.events().get(calendarId=CALENDAR_ID, eventId=event_id).execute()
+    """Update an existing event in Google Calendar.
 
-        # Update fields if provided
+    Sends a single PATCH with only the changed fields. When `etag` is given the
+    update fails with CalendarConflictError if the event changed in the meantime.
+    """
+    try:
+        # Only send the fields that change
+        event = {}
         if summary:
             event["summary"] = summary
         if description:
             event["description"] = description
 
         if start_time:
-            # Ensure timezone is applied
-            local_tz = pytz.timezone(TIMEZONE)
-            if start_time.tzinfo is None:
-                start_time = local_tz.localize(start_time)
-
-            end_time = start_time + datetime.timedelta(minutes=duration_minutes)
-
-            event["start"] = {
-                "dateTime": start_time.isoformat(),
-                "timeZone": TIMEZONE,
-            }
-            event["end"] = {
-                "dateTime": end_time.isoformat(),
-                "timeZone": TIMEZONE,
-            }
-
-        updated_event = (
-            service.events()
-            .update(calendarId=CALENDAR_ID, eventId=event_id, body=event)
-            .execute()
-        )
+            event.update(_event_times(start_time, duration_minutes))
+
+        updated_event = await calendar.patch_event(event_id, event, etag=etag)
+        mirror.apply(updated_event)
 
         print(f"Event updated: {updated_event.get('htmlLink')}")
         return updated_event
-    except HttpError as error:
+    except CalendarConflictError:
+        print(f"Event {event_id} was modified concurrently, update rejected")
+        raise
+    except CalendarError as error:
         print(f"An error occurred updating the event: {error}")
         raise
 
 
-def get_user_events(user_id, max_results=10):
+async def get_user_events(user_id, max_results=10):
     """Get upcoming events for a specific user"""
+    if mirror.ready:
+        return mirror.user_events(user_id, max_results)
+
     try:
         now = datetime.datetime.utcnow().isoformat() + "Z"  # 'Z' indicates UTC time
 
-        # Get all upcoming events
-        events_result = (
-            service.events()
-            .list(
-                calendarId=CALENDAR_ID,
-                timeMin=now,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
+        # The Calendar API filters on the extended property server side, so the
+        # cost doesn't depend on how many other bookings the calendar holds
+        events_result = await calendar.list_events(
+            timeMin=now,
+            maxResults=max_results,
+            singleEvents=True,
+            orderBy="startTime",
+            privateExtendedProperty=f"{USER_ID_PROPERTY}={user_id}",
         )
 
-        events = events_result.get("items", [])
+        return events_result.get("items", [])
+    except CalendarError as error:
+        print(f"An error occurred retrieving events: {error}")
+        raise
 
-        # Filter events by user ID in description
-        user_events = []
-        for event in events:
-            description = event.get("description", "")
-            # Check if this event belongs to this user
-            if f"user {user_id}" in description:
-                user_events.append(event)
 
-        return user_events
-    except HttpError as error:
-        print(f"An error occurred retrieving events: {error}")
+async def get_busy_intervals(time_min, time_max):
+    """Get (start, end) of every event overlapping the given range, sorted by start"""
+    if mirror.ready:
+        return mirror.busy_intervals(time_min, time_max)
+
+    try:
+        # One free/busy query instead of listing every event in the range
+        busy = await calendar.freebusy(time_min.isoformat(), time_max.isoformat())
+        return sorted(
+            (
+                datetime.datetime.fromisoformat(period["start"].replace("Z", "+00:00")),
+                datetime.datetime.fromisoformat(period["end"].replace("Z", "+00:00")),
+            )
+            for period in busy
+        )
+    except CalendarError as error:
+        print(f"An error occurred retrieving busy times: {error}")
         raise
+
+
+async def list_events_between(time_min, time_max):
+    """List every event overlapping the given range"""
+    events = []
+    params = {
+        "timeMin": time_min.isoformat(),
+        "timeMax": time_max.isoformat(),
+        "singleEvents": True,
+        "maxResults": 2500,
+    }
+    while True:
+        events_result = await calendar.list_events(**params)
+        events.extend(events_result.get("items", []))
+        if "nextPageToken" not in events_result:
+            return events
+        params["pageToken"] = events_result["nextPageToken"]
+
+
+def _apply_batch_results(results):
+    """Write successful batch results through to the mirror"""
+    for result in results:
+        if result.ok and result.body:
+            mirror.apply(result.body)
+
+
+async def batch_create_events(bookings):
+    """Create many events in grouped batch requests.
+
+    `bookings` is a list of dicts with the create_event arguments. Returns one
+    BatchResult per booking, in order.
+    """
+    operations = [
+        BatchOperation("POST", calendar.events_path, body=_event_body(**booking))
+        for booking in bookings
+    ]
+    results = await calendar.batch(operations)
+    _apply_batch_results(results)
+    return results
+
+
+async def batch_delete_events(event_ids):
+    """Delete many events in grouped batch requests, one BatchResult per id"""
+    operations = [
+        BatchOperation("DELETE", f"{calendar.events_path}/{quote(event_id)}")
+        for event_id in event_ids
+    ]
+    results = await calendar.batch(operations)
+    for event_id, result in zip(event_ids, results):
+        if result.ok or result.status_code == 410:
+            mirror.discard(event_id)
+    return results
+
+
+async def batch_patch_events(patches):
+    """Apply many partial updates in grouped batch requests.
+
+    `patches` is a list of (event_id, fields) pairs. Returns one BatchResult
+    per patch.
+    """
+    operations = [
+        BatchOperation("PATCH", f"{calendar.events_path}/{quote(event_id)}", body=body)
+        for event_id, body in patches
+    ]
+    results = await calendar.batch(operations)
+    _apply_batch_results(results)
+    return results
+
+
+async def batch_move_events(moves, duration_minutes=30):
+    """Reschedule many events in grouped batch requests.
+
+    `moves` is a list of (event_id, new_start_time) pairs. Returns one
+    BatchResult per move.
+    """
+    return await batch_patch_events(
+        [
+            (event_id, _event_times(start_time, duration_minutes))
+            for event_id, start_time in moves
+        ]
+    )
+
+
+async def list_legacy_events(time_min, time_max):
+    """Events in the range whose owner is only named in the description.
+
+    Events booked before the owner was stored as an extended property are
+    invisible to the server-side privateExtendedProperty filter used by
+    get_user_events.
+    """
+    return [
+        event
+        for event in await list_events_between(time_min, time_max)
+        if USER_ID_PROPERTY
+        not in event.get("extendedProperties", {}).get("private", {})
+        and legacy_owner(event) is not None
+    ]
+
+
+async def backfill_user_ids(time_min, time_max):
+    """Tag legacy events with USER_ID_PROPERTY. Returns (events, results)"""
+    events = await list_legacy_events(time_min, time_max)
+    results = await batch_patch_events(
+        [
+            (
+                event["id"],
+                {
+                    "extendedProperties": {
+                        "private": {USER_ID_PROPERTY: legacy_owner(event)}
+                    }
+                },
+            )
+            for event in events
+        ]
+    )
+    return events, results
+
+
+async def list_day_events(day):
+    """Events starting on the given local date (not ones running over from the day before)"""
+    local_tz = pytz.timezone(TIMEZONE)
+    day_start = local_tz.localize(datetime.datetime.combine(day, datetime.time()))
+    day_end = local_tz.localize(
+        datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time())
+    )
+    return [
+        event
+        for event in await list_events_between(day_start, day_end)
+        if parse_event_time(event["start"], local_tz) >= day_start
+    ]
+
+
+async def cancel_day(day):
+    """Cancel every event starting on the given date. Returns (events, results)"""
+    events = await list_day_events(day)
+    results = await batch_delete_events([event["id"] for event in events])
+    return events, results
@@ -0,0 +1,623 @@
+# loadtest/__main__.py
+"""Simulated Telegram users driving the real bot against local fakes.
+
+Usage:
+    python -m src.loadtest [--users 1000] [--ramp-up 60] [--think-time 1]
+                           [--mix booking=0.4,rag=0.4,cancel=0.1,edit=0.1]
+                           [--race 20] [--output loadtest_report.json]
+
+Updates go through the bot's real Application and ConversationHandler (with
+CONCURRENT_UPDATES), in process, so handler latency is measured without
+network noise on our side. The Bot API is an in-process fake; OpenAI and
+Google Calendar are served over HTTP by a second process; Pinecone is the
+local vector store behind an artificial blocking delay, so a query that runs
+on the event loop shows up as loop lag. Opening hours are widened to the
+whole day so a few thousand users don't run out of slots.
+
+The JSON report (latency and time to first reply per step, throughput,
+event loop lag) is written with sorted keys and rounded numbers so two runs
+can be diffed.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict, namedtuple
+import httpx
+import numpy as np
+from src.loadtest.fakes import BOT_USER, serve_backends
+
+SCENARIOS = ("booking", "rag", "cancel", "edit")
+# Date attempts (typed or picked from suggestions) before a booking flow gives up
+MAX_ATTEMPTS = 5
+
+# Open-ended questions asked repeatedly (answer cache and coalescing get hits)
+QUESTIONS = [
+    "What is the dress code at the office?",
+    "How many vacation days do employees get?",
+    "What is your policy on remote work?",
+    "How do you handle customer complaints?",
+    "What are the company's core values?",
+    "Do you offer training for new employees?",
+    "How are expense reports submitted?",
+    "What is the process for reporting a safety issue?",
+    "Who should I contact about billing problems?",
+    "Do you have a recycling program?",
+]
+TOPICS = [
+    "paper quality",
+    "bulk orders",
+    "late deliveries",
+    "overtime",
+    "sick leave",
+    "the sales team",
+    "warehouse safety",
+    "office supplies",
+    "loyalty discounts",
+    "data privacy",
+]
+SPANISH_MONTHS = [
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+]
+
+Reply = namedtuple("Reply", ["text", "markup", "message_id"])
+
+
+class StepFailed(Exception):
+    """The bot didn't answer a step (timeout, exception or no message sent)"""
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Telegram bot")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument(
+        "--ramp-up", type=float, default=60.0, help="Seconds over which users arrive"
+    )
+    parser.add_argument(
+        "--think-time", type=float, default=1.0, help="Mean seconds between steps"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("booking=0.4,rag=0.4,cancel=0.1,edit=0.1"),
+    )
+    parser.add_argument(
+        "--unique-questions",
+        type=float,
+        default=0.5,
+        help="Fraction of RAG questions nobody else asks",
+    )
+    parser.add_argument("--concurrent-updates", type=int, default=None)
+    parser.add_argument("--step-timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--race",
+        type=int,
+        default=0,
+        help="Users confirming the same slot at once, before the main run",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest_report.json")
+    latency = parser.add_argument_group("fake backend latency (seconds)")
+    latency.add_argument("--telegram-latency", type=float, default=0.05)
+    latency.add_argument("--llm-first-token", type=float, default=0.5)
+    latency.add_argument("--llm-token", type=float, default=0.02)
+    latency.add_argument("--llm-tokens", type=int, default=60)
+    latency.add_argument("--embedding-latency", type=float, default=0.1)
+    latency.add_argument("--vector-latency", type=float, default=0.08)
+    latency.add_argument("--calendar-latency", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(args, port, workdir):
+    """Point the bot at the fakes; must run before any src.app module is imported"""
+    base = f"http://127.0.0.1:{port}"
+    os.environ.update(
+        TELEGRAM_BOT_TOKEN="123456:loadtest",
+        OPENAI_API_KEY="sk-loadtest",
+        OPENAI_API_BASE=f"{base}/v1",
+        GOOGLE_CALENDAR_API_URL=f"{base}/calendar/v3",
+        GOOGLE_CALENDAR_ID="loadtest@example.com",
+        VECTOR_BACKEND="local",
+        LOCAL_VECTOR_STORE_PATH=os.path.join(workdir, "vector_store"),
+        EMBEDDING_CACHE_PATH=os.path.join(workdir, "embeddings.sqlite3"),
+        # Warmed up explicitly before the run starts
+        WARM_UP="0",
+    )
+    os.environ.pop("INGEST_MANIFEST_PATH", None)
+    os.environ.pop("TELEGRAM_API_BASE_URL", None)
+    os.environ.setdefault("SESSION_MAX_ENTRIES", str(max(5000, args.users * 2)))
+    if args.concurrent_updates is not None:
+        os.environ["CONCURRENT_UPDATES"] = str(args.concurrent_updates)
+
+
+def start_backends(args, port):
+    """Start the fake OpenAI + Calendar server in its own process and wait for it"""
+    latencies = {
+        "llm_first_token": args.llm_first_token,
+        "llm_token": args.llm_token,
+        "llm_tokens": args.llm_tokens,
+        "embedding": args.embedding_latency,
+        "calendar": args.calendar_latency,
+    }
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve_backends, args=(port, latencies), daemon=True
+    )
+    process.start()
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1.0)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Fake backends did not start")
+
+
+def summarize(values, scale=1000.0):
+    """count/mean/p50/p95/p99/max of a list of seconds, in milliseconds"""
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values) * scale
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(array.mean()), 1),
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(float(array.max()), 1),
+    }
+
+
+async def monitor_loop_lag(samples, interval=0.01):
+    """Record how late a short sleep wakes up (time the loop spent blocked)"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+class Simulation:
+    """Feeds updates to the application and measures what the bot sends back"""
+
+    def __init__(self, application, bot_api, args):
+        self.application = application
+        self.bot_api = bot_api
+        self.args = args
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.latency = defaultdict(list)  # step -> seconds until the handler returned
+        self.first_reply = defaultdict(list)  # step -> seconds until the first message
+        self.errors = Counter()  # step -> failed steps
+        self.flows = defaultdict(Counter)  # scenario -> outcome -> count
+        self.updates = 0
+
+    def _user(self, user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def message(self, user_id, text):
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+            ]
+        return {"update_id": next(self.update_ids), "message": message}
+
+    def tap(self, user_id, reply, data):
+        update_id = next(self.update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": reply.message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": BOT_USER,
+                    "text": reply.text,
+                },
+            },
+        }
+
+    async def step(self, user_id, label, data):
+        """Process one update; returns the last message the bot sent or edited"""
+        from telegram import Update
+
+        application = self.application
+        update = Update.de_json(data, application.bot)
+        calls = self.bot_api.calls[user_id]
+        seen = len(calls)
+        started = time.perf_counter()
+        self.updates += 1
+        try:
+            await asyncio.wait_for(
+                application.update_processor.process_update(
+                    update, application.process_update(update)
+                ),
+                self.args.step_timeout,
+            )
+        except asyncio.CancelledError as e:
+            if asyncio.current_task().cancelling():
+                raise
+            # A coalesced RAG question whose leader timed out
+            self.errors[label] += 1
+            raise StepFailed(f"{label}: cancelled") from e
+        except Exception as e:
+            self.errors[label] += 1
+            raise StepFailed(f"{label}: {e!r}") from e
+        self.latency[label].append(time.perf_counter() - started)
+        if len(calls) == seen:
+            self.errors[label] += 1
+            raise StepFailed(f"{label}: no reply")
+        self.first_reply[label].append(calls[seen][0] - started)
+        _, _, params, message_id = calls[-1]
+        return Reply(params.get("text", ""), params.get("reply_markup"), message_id)
+
+    async def think(self, rng):
+        if self.args.think_time > 0:
+            await asyncio.sleep(rng.expovariate(1 / self.args.think_time))
+
+    # ---- scenarios ----
+
+    async def open_menu(self, user_id, rng):
+        reply = await self.step(user_id, "start", self.message(user_id, "/start"))
+        await self.think(rng)
+        return reply
+
+    async def book(self, user_id, rng):
+        """start → agendar → date (→ suggested slot) → yes → name; True if booked"""
+        menu = await self.open_menu(user_id, rng)
+        await self.step(user_id, "agendar", self.tap(user_id, menu, "agendar"))
+        for _ in range(MAX_ATTEMPTS):
+            await self.think(rng)
+            reply = await self.step(
+                user_id, "date", self.message(user_id, slot_phrase(rng))
+            )
+            if "confirm" not in reply.text:
+                data = first_button(reply.markup, "slot_")
+                if data is None:
+                    continue
+                await self.think(rng)
+                await self.step(user_id, "pick_slot", self.tap(user_id, reply, data))
+            await self.think(rng)
+            reply = await self.step(user_id, "confirm", self.message(user_id, "yes"))
+            if "name" not in reply.text:
+                # Someone else holds or booked the slot
+                continue
+            await self.think(rng)
+            reply = await self.step(
+                user_id, "name", self.message(user_id, f"User {user_id}")
+            )
+            return reply.text.startswith("✅")
+        return False
+
+    async def choose_event(self, user_id, rng, menu_button, prefix):
+        menu = await self.open_menu(user_id, rng)
+        reply = await self.step(
+            user_id, menu_button, self.tap(user_id, menu, menu_button)
+        )
+        data = first_button(reply.markup, prefix)
+        if data is None:
+            return None
+        await self.think(rng)
+        return await self.step(
+            user_id, prefix.rstrip("_"), self.tap(user_id, reply, data)
+        )
+
+    async def scenario_booking(self, user_id, rng):
+        return await self.book(user_id, rng)
+
+    async def scenario_cancel(self, user_id, rng):
+        if not await self.book(user_id, rng):
+            return False
+        await self.think(rng)
+        reply = await self.choose_event(user_id, rng, "cancelar", "cancel_")
+        return reply is not None and reply.text.startswith("✅")
+
+    async def scenario_edit(self, user_id, rng):
+        if not await self.book(user_id, rng):
+            return False
+        await self.think(rng)
+        reply = await self.choose_event(user_id, rng, "editar", "edit_")
+        if reply is None:
+            return False
+        for _ in range(MAX_ATTEMPTS):
+            await self.think(rng)
+            reply = await self.step(
+                user_id, "new_date", self.message(user_id, slot_phrase(rng))
+            )
+            data = first_button(reply.markup, "newslot_")
+            if data is not None:
+                await self.think(rng)
+                reply = await self.step(
+                    user_id, "pick_new_slot", self.tap(user_id, reply, data)
+                )
+            if "rescheduled" in reply.text:
+                return True
+        return False
+
+    async def scenario_rag(self, user_id, rng):
+        await self.open_menu(user_id, rng)
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < self.args.unique_questions:
+                question = (
+                    f"What is your policy on {rng.choice(TOPICS)} "
+                    f"for order {uuid.UUID(int=rng.getrandbits(128)).hex[:8]}?"
+                )
+            else:
+                question = rng.choice(QUESTIONS)
+            await self.step(user_id, "question", self.message(user_id, question))
+            await self.think(rng)
+        return True
+
+    async def run_user(self, user_id, scenario, delay):
+        await asyncio.sleep(delay)
+        rng = random.Random(f"{self.args.seed}-{user_id}")
+        try:
+            done = await getattr(self, f"scenario_{scenario}")(user_id, rng)
+            self.flows[scenario]["completed" if done else "gave_up"] += 1
+        except StepFailed:
+            self.flows[scenario]["failed"] += 1
+
+    async def race(self, users, first_user_id):
+        """`users` users confirm the same slot at the same moment"""
+        user_ids = range(first_user_id, first_user_id + users)
+        phrase = slot_phrase(random.Random(f"{self.args.seed}-race"))
+        replies = {}
+
+        async def pick(user_id):
+            menu = await self.step(user_id, "start", self.message(user_id, "/start"))
+            await self.step(user_id, "agendar", self.tap(user_id, menu, "agendar"))
+            replies[user_id] = await self.step(
+                user_id, "date", self.message(user_id, phrase)
+            )
+
+        await asyncio.gather(*(pick(user_id) for user_id in user_ids))
+        contenders = [u for u in user_ids if "confirm" in replies[u].text]
+        confirmations = await asyncio.gather(
+            *(
+                self.step(user_id, "confirm", self.message(user_id, "yes"))
+                for user_id in contenders
+            )
+        )
+        leased = [
+            user_id
+            for user_id, reply in zip(contenders, confirmations)
+            if "name" in reply.text
+        ]
+        bookings = await asyncio.gather(
+            *(
+                self.step(user_id, "name", self.message(user_id, f"User {user_id}"))
+                for user_id in leased
+            )
+        )
+        return {
+            "users": users,
+            "leases": len(leased),
+            "bookings": sum(reply.text.startswith("✅") for reply in bookings),
+        }
+
+
+def first_button(markup, prefix):
+    """callback_data of the first inline button starting with `prefix`"""
+    if not markup:
+        return None
+    if isinstance(markup, str):
+        markup = json.loads(markup)
+    for row in markup.get("inline_keyboard", []):
+        for button in row:
+            if button.get("callback_data", "").startswith(prefix):
+                return button["callback_data"]
+    return None
+
+
+def slot_phrase(rng):
+    """A date and time within the booking horizon, as a user would type it"""
+    import pytz
+    from src.app.dates import TIMEZONE
+    from src.availability import HORIZON_DAYS
+
+    today = datetime.datetime.now(pytz.timezone(TIMEZONE)).date()
+    day = today + datetime.timedelta(days=rng.randint(1, HORIZON_DAYS - 2))
+    hour, minute = rng.randrange(24), rng.choice((0, 30))
+    if rng.random() < 0.5:
+        return f"{day:%B} {day.day} at {hour % 12 or 12}:{minute:02d}{'pm' if hour >= 12 else 'am'}"
+    return f"{day.day} de {SPANISH_MONTHS[day.month - 1]} a las {hour}:{minute:02d}"
+
+
+async def run(args, port):
+    from src.app import config
+
+    def get_vector_store():
+        from src.loadtest.fakes import ThreadedSlowVectorStore
+
+        return ThreadedSlowVectorStore(
+            latency=args.vector_latency,
+            persist_dir=config.LOCAL_VECTOR_STORE_PATH,
+            ivf_min_vectors=config.LOCAL_VECTOR_IVF_MIN,
+        )
+
+    # Before the modules below import it by name
+    config.get_vector_store = config.lazy(get_vector_store)
+
+    import telegram_app
+    from src.app.ingest import ingest
+    from src.app.rag import rag_flights
+    from src.availability import BUSINESS_HOURS
+    from src.loadtest.fakes import FakeBotAPI
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    BUSINESS_HOURS.update(
+        {day: (datetime.time(0), datetime.time(23, 59)) for day in range(7)}
+    )
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        await ingest()
+        await asyncio.to_thread(config.warm_up)
+
+    bot_api = FakeBotAPI(latency=args.telegram_latency)
+    application = telegram_app.build_application(
+        mode="webhook", persistence=False, request=bot_api
+    )
+    simulation = Simulation(application, bot_api, args)
+    exceptions = Counter()
+
+    async def on_error(update, context):
+        exceptions[type(context.error).__name__] += 1
+
+    application.add_error_handler(on_error)
+
+    rng = random.Random(args.seed)
+    scenarios = rng.choices(
+        list(args.mix), weights=list(args.mix.values()), k=args.users
+    )
+    lag = []
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"}
+    }
+
+    async with application:
+        await telegram_app.on_startup(application)
+        await application.start()
+        await telegram_app.mirror.sync()
+        monitor = asyncio.create_task(monitor_loop_lag(lag))
+        try:
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                if args.race:
+                    report["race"] = await simulation.race(args.race, args.users + 1)
+                started = time.perf_counter()
+                await asyncio.gather(
+                    *(
+                        simulation.run_user(
+                            user_id,
+                            scenario,
+                            args.ramp_up * (user_id - 1) / max(1, args.users),
+                        )
+                        for user_id, scenario in enumerate(scenarios, start=1)
+                    )
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            monitor.cancel()
+            await application.stop()
+            await telegram_app.on_shutdown(application)
+
+    backends = httpx.get(f"http://127.0.0.1:{port}/stats").json()
+    flows = sum(counts["completed"] for counts in simulation.flows.values())
+    report.update(
+        {
+            "duration_s": round(elapsed, 2),
+            "updates": simulation.updates,
+            "updates_per_s": round(simulation.updates / elapsed, 1),
+            "flows_completed_per_s": round(flows / elapsed, 2),
+            "flows": {name: dict(counts) for name, counts in simulation.flows.items()},
+            "steps": {
+                label: {
+                    "latency_ms": summarize(simulation.latency[label]),
+                    "first_reply_ms": summarize(simulation.first_reply[label]),
+                    "errors": simulation.errors[label],
+                }
+                for label in sorted(set(simulation.latency) | set(simulation.errors))
+            },
+            "event_loop_lag_ms": summarize(lag),
+            "exceptions": dict(exceptions),
+            "rag": {key: rag_flights.stats()[key] for key in ("calls", "saved")},
+            "calendar": backends,
+        }
+    )
+    return report
+
+
+def print_summary(report):
+    print(
+        f"{report['updates']} updates in {report['duration_s']}s "
+        f"({report['updates_per_s']}/s), "
+        f"{report['flows_completed_per_s']} completed flows/s"
+    )
+    for name, counts in sorted(report["flows"].items()):
+        print(f"  {name:8} {dict(sorted(counts.items()))}")
+    print(
+        f"  {'step':14} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'first p95':>10} err"
+    )
+    for label, step in report["steps"].items():
+        latency, first = step["latency_ms"], step["first_reply_ms"]
+        print(
+            f"  {label:14} {latency['count']:>6} {latency.get('p50', 0):>8} "
+            f"{latency.get('p95', 0):>8} {latency.get('p99', 0):>8} "
+            f"{first.get('p95', 0):>10} {step['errors']}"
+        )
+    lag = report["event_loop_lag_ms"]
+    print(f"  event loop lag p99 {lag.get('p99', 0)}ms, max {lag.get('max', 0)}ms")
+    if "race" in report:
+        print(f"  race: {report['race']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        configure_environment(args, port, workdir)
+        backends = start_backends(args, port)
+        try:
+            report = asyncio.run(run(args, port))
+        finally:
+            backends.terminate()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print_summary(report)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
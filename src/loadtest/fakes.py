@@ -0,0 +1,364 @@
+# loadtest/fakes.py
+"""Local stand-ins for the Telegram Bot API, OpenAI, Pinecone and Google Calendar.
+
+The Bot API fake runs inside the bot process (it's how the load test sees what
+the bot sends). OpenAI and Calendar are served over HTTP by a separate process
+(serve_backends), so the bot pays for real connections and JSON like it does in
+production. Pinecone is replaced by the local vector store plus a delay.
+"""
+
+import asyncio
+import base64
+import datetime
+import hashlib
+import itertools
+import json
+import time
+import uuid
+from collections import defaultdict
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from telegram.request import BaseRequest
+from src.app.local_vector_store import LocalVectorStore
+from src.app.vector_stores import ThreadedQueries
+
+EMBEDDING_DIMENSIONS = 1536
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "CusChatAI",
+    "username": "cuschat_bot",
+}
+
+
+class FakeBotAPI(BaseRequest):
+    """In-process Bot API: records every call per chat and answers after `latency` seconds"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = defaultdict(
+            list
+        )  # chat id -> [(time, method, params, message_id)]
+        self._message_ids = itertools.count(1)
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _message(self, chat_id, params, message_id=None):
+        return {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    async def do_request(self, url, method, request_data=None, **timeouts):
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if api_method == "getMe":
+            result = BOT_USER
+        elif api_method in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            result = self._message(chat_id, params, params.get("message_id"))
+            self.calls[chat_id].append(
+                (time.perf_counter(), api_method, params, result["message_id"])
+            )
+        else:
+            # answerCallbackQuery, sendChatAction, setWebhook, ...
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+class SlowVectorStore(LocalVectorStore):
+    """Local vector store whose query() blocks for a Pinecone-like delay
+
+    Like the Pinecone client it has no async query of its own, so a code path
+    that calls query() on the event loop shows up as event loop lag.
+    """
+
+    _latency: float = PrivateAttr(default=0.0)
+
+    def __init__(self, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self._latency = latency
+
+    def query(self, query, **kwargs):
+        time.sleep(self._latency)
+        return super().query(query, **kwargs)
+
+
+class ThreadedSlowVectorStore(ThreadedQueries, SlowVectorStore):
+    """The fake store wrapped the way production wraps Pinecone"""
+
+
+def fake_embedding(text):
+    """Deterministic unit vector per text, so repeated texts embed identically"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def _rfc3339(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def create_backends_app(
+    llm_first_token=0.3, llm_token=0.02, llm_tokens=40, embedding=0.05, calendar=0.1
+):
+    """Starlette app faking the OpenAI (/v1) and Google Calendar (/calendar/v3) APIs"""
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    # ---- OpenAI ----
+
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(embedding)
+        data = []
+        for index, text in enumerate(texts):
+            vector = fake_embedding(str(text))
+            if body.get("encoding_format") == "base64":
+                value = base64.b64encode(vector.tobytes()).decode()
+            else:
+                value = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": value})
+        tokens = sum(len(str(text).split()) for text in texts)
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        words = [f"word{i} " for i in range(llm_tokens)]
+        prompt_tokens = sum(
+            len(str(message.get("content", "")).split())
+            for message in body.get("messages", [])
+        )
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+
+        if not body.get("stream"):
+            await asyncio.sleep(llm_first_token + llm_token * llm_tokens)
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": body.get("model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(words)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": llm_tokens,
+                        "total_tokens": prompt_tokens + llm_tokens,
+                    },
+                }
+            )
+
+        async def stream():
+            await asyncio.sleep(llm_first_token)
+            yield f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}))}\n\n"
+            for word in words:
+                yield f"data: {json.dumps(chunk({'content': word}))}\n\n"
+                await asyncio.sleep(llm_token)
+            yield f"data: {json.dumps(chunk({}, 'stop'))}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    # ---- Google Calendar ----
+
+    events = {}  # id -> event (deleted events stay, with status "cancelled")
+    versions = itertools.count(1)
+
+    def public(event):
+        return {key: value for key, value in event.items() if key != "_version"}
+
+    def save(event):
+        event["_version"] = next(versions)
+        event["etag"] = f'"{event["_version"]}"'
+        event["updated"] = _rfc3339(datetime.datetime.now(datetime.timezone.utc))
+        events[event["id"]] = event
+        return public(event)
+
+    def start_of(event):
+        return datetime.datetime.fromisoformat(event["start"]["dateTime"])
+
+    def end_of(event):
+        return datetime.datetime.fromisoformat(event["end"]["dateTime"])
+
+    def error(status, message):
+        return JSONResponse({"error": {"code": status, "message": message}}, status)
+
+    async def events_collection(request: Request):
+        await asyncio.sleep(calendar)
+        if request.method == "POST":
+            event = await request.json()
+            event.update(
+                id=uuid.uuid4().hex,
+                status="confirmed",
+                htmlLink="https://calendar.example/event",
+            )
+            return JSONResponse(save(event))
+
+        params = request.query_params
+        if "syncToken" in params:
+            since = int(params["syncToken"])
+            items = [e for e in events.values() if e["_version"] > since]
+        else:
+            items = [e for e in events.values() if e["status"] != "cancelled"]
+        if "privateExtendedProperty" in params:
+            key, _, value = params["privateExtendedProperty"].partition("=")
+            items = [
+                e
+                for e in items
+                if e.get("extendedProperties", {}).get("private", {}).get(key) == value
+            ]
+        if "timeMin" in params:
+            time_min = datetime.datetime.fromisoformat(
+                params["timeMin"].replace("Z", "+00:00")
+            )
+            items = [
+                e for e in items if e["status"] == "cancelled" or end_of(e) > time_min
+            ]
+        if "timeMax" in params:
+            time_max = datetime.datetime.fromisoformat(
+                params["timeMax"].replace("Z", "+00:00")
+            )
+            items = [
+                e for e in items if e["status"] == "cancelled" or start_of(e) < time_max
+            ]
+        if params.get("orderBy") == "startTime":
+            items.sort(key=start_of)
+        offset = int(params.get("pageToken", 0))
+        limit = int(params.get("maxResults", 250))
+        page = {"items": [public(e) for e in items[offset : offset + limit]]}
+        if offset + limit < len(items):
+            page["nextPageToken"] = str(offset + limit)
+        else:
+            page["nextSyncToken"] = str(
+                max((e["_version"] for e in events.values()), default=0)
+            )
+        return JSONResponse(page)
+
+    async def event_resource(request: Request):
+        await asyncio.sleep(calendar)
+        event = events.get(request.path_params["event_id"])
+        if event is None or event["status"] == "cancelled":
+            return error(404, "Not Found")
+        if_match = request.headers.get("If-Match")
+        if (
+            request.method in ("PATCH", "PUT")
+            and if_match
+            and if_match != event["etag"]
+        ):
+            return error(412, "Precondition Failed")
+        if request.method == "GET":
+            return JSONResponse(public(event))
+        if request.method == "DELETE":
+            event["status"] = "cancelled"
+            save(event)
+            return Response(status_code=204)
+        body = await request.json()
+        if request.method == "PUT":
+            body.update(
+                id=event["id"], status=event["status"], htmlLink=event["htmlLink"]
+            )
+            return JSONResponse(save(body))
+        event.update(body)
+        return JSONResponse(save(event))
+
+    async def freebusy(request: Request):
+        await asyncio.sleep(calendar)
+        body = await request.json()
+        time_min = datetime.datetime.fromisoformat(
+            body["timeMin"].replace("Z", "+00:00")
+        )
+        time_max = datetime.datetime.fromisoformat(
+            body["timeMax"].replace("Z", "+00:00")
+        )
+        busy = [
+            {"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+            for e in events.values()
+            if e["status"] != "cancelled"
+            and start_of(e) < time_max
+            and end_of(e) > time_min
+        ]
+        return JSONResponse(
+            {
+                "calendars": {
+                    item["id"]: {"busy": busy} for item in body.get("items", [])
+                }
+            }
+        )
+
+    async def stats(request: Request):
+        live = [e for e in events.values() if e["status"] != "cancelled"]
+        writes = max((e["_version"] for e in events.values()), default=0)
+        return JSONResponse({"events": len(live), "writes": writes})
+
+    return Starlette(
+        routes=[
+            Route("/v1/embeddings", embeddings, methods=["POST"]),
+            Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+            Route(
+                "/calendar/v3/calendars/{calendar_id}/events",
+                events_collection,
+                methods=["GET", "POST"],
+            ),
+            Route(
+                "/calendar/v3/calendars/{calendar_id}/events/{event_id}",
+                event_resource,
+                methods=["GET", "PATCH", "PUT", "DELETE"],
+            ),
+            Route("/calendar/v3/freeBusy", freebusy, methods=["POST"]),
+            Route("/stats", stats),
+        ]
+    )
+
+
+def serve_backends(port, latencies):
+    """Run the fake OpenAI + Calendar server (target of a separate process)"""
+    import uvicorn
+
+    uvicorn.run(
+        create_backends_app(**latencies),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
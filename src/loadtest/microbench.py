@@ -0,0 +1,431 @@
+# loadtest/microbench.py
+"""Microbenchmarks for the code that runs on every message.
+
+Usage:
+    python -m src.loadtest.microbench [-k FILTER] [--rounds 20]
+                                      [--save [BASELINE]] [--compare [BASELINE]]
+                                      [--threshold 1.5]
+
+The regression check to run in CI (exits 1 on a regression):
+    python -m src.loadtest.microbench --compare
+
+--save and --compare without a path use src/loadtest/microbench_baseline.json.
+Record it with `python -m src.loadtest.microbench --save` on the CI runner
+itself (never commit one from a dev box), and refresh it when a change is meant
+to make something slower or when the runner changes. Without a baseline,
+--compare only prints the results.
+
+Each benchmark is timed pytest-benchmark style: the number of calls per round
+is calibrated so a round lasts at least MIN_ROUND_SECONDS, then the per-call
+time of every round is recorded. --save writes the results as a JSON baseline
+and --compare flags a benchmark whose median is more than --threshold times
+its baseline median plus NOISE_STDDEVS baseline standard deviations, so a
+noisy benchmark needs a bigger slowdown to be flagged. Baselines only make
+sense on the machine they came from: a regression fails the run (status 1)
+only when the baseline was recorded on the same machine, and is just a
+warning otherwise.
+
+Handlers are driven with stub updates whose replies return immediately, so
+what is measured is our code (keyboards, formatting, routing, session and
+mirror lookups), not Telegram or any network call.
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+# Minimum duration of one timed round
+MIN_ROUND_SECONDS = 0.02
+# A benchmark slower than baseline * threshold is a regression
+DEFAULT_THRESHOLD = 1.5
+# Baseline standard deviations added to the allowed median, to absorb noise
+NOISE_STDDEVS = 3
+# Baseline used by --save / --compare when no path is given
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "microbench_baseline.json")
+
+BENCHMARKS = {}  # name -> setup function returning the callable to time
+
+
+def benchmark(name):
+    """Register a setup function; it returns the zero-argument callable to time"""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def run_sync(coroutine):
+    """Run a coroutine that never suspends (stubbed I/O) without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Benchmarked coroutine tried to wait on I/O")
+
+
+async def _reply(*args, **kwargs):
+    return None
+
+
+_ids = itertools.count(1)
+
+
+def _message_update(user_id, text):
+    return SimpleNamespace(
+        update_id=next(_ids),
+        callback_query=None,
+        effective_user=SimpleNamespace(id=user_id, first_name="Bench"),
+        message=SimpleNamespace(text=text, reply_text=_reply),
+    )
+
+
+def _callback_update(user_id, data):
+    user = SimpleNamespace(id=user_id, first_name="Bench")
+    return SimpleNamespace(
+        # A fresh update and message id each time, so idempotency never skips it
+        update_id=next(_ids),
+        effective_user=user,
+        callback_query=SimpleNamespace(
+            data=data,
+            from_user=user,
+            message=SimpleNamespace(message_id=next(_ids)),
+            answer=_reply,
+            edit_message_text=_reply,
+        ),
+    )
+
+
+def _context():
+    return SimpleNamespace(user_data={})
+
+
+def _upcoming_events(user_id, count):
+    """Calendar events owned by `user_id`, one a day starting tomorrow"""
+    import pytz
+    from src.google_calendar import TIMEZONE, USER_ID_PROPERTY, _event_body
+
+    tz = pytz.timezone(TIMEZONE)
+    tomorrow = datetime.datetime.now(tz).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    ) + datetime.timedelta(days=1)
+    events = []
+    for i in range(count):
+        event = _event_body(
+            "Appointment with Bench",
+            "Benchmark",
+            tomorrow + datetime.timedelta(days=i),
+            user_id=user_id,
+        )
+        event.update(
+            id=f"bench{user_id}x{i}",
+            etag=f'"{i}"',
+            updated="2024-01-01T00:00:00.000Z",
+            extendedProperties={"private": {USER_ID_PROPERTY: str(user_id)}},
+        )
+        events.append(event)
+    return events
+
+
+# ---- handlers ----
+
+
+@benchmark("handlers.start")
+def bench_start():
+    from src.app.handlers import start
+
+    context = _context()
+    return lambda: run_sync(start(_message_update(1, "/start"), context))
+
+
+@benchmark("handlers.back_to_menu")
+def bench_back_to_menu():
+    from src.app.handlers import handle_callback
+
+    context = _context()
+    return lambda: run_sync(
+        handle_callback(_callback_update(2, "back_to_menu"), context)
+    )
+
+
+@benchmark("handlers.cancelar_5_events")
+def bench_cancelar():
+    from src.app.handlers import handle_callback
+    from src.google_calendar import mirror
+
+    # Reads are served from the mirror, as in production once it has synced
+    for event in _upcoming_events(3, 5):
+        mirror.apply(event)
+    mirror.ready = True
+    context = _context()
+    return lambda: run_sync(handle_callback(_callback_update(3, "cancelar"), context))
+
+
+@benchmark("handlers.message_deny")
+def bench_message_deny():
+    from src.app.handlers import handle_message
+    from src.app.intents import get_intent_classifier
+    import src.app.intents as intents
+
+    # classify() trains the model in a thread on first use; do it up front
+    intents._classifier = get_intent_classifier()
+    context = _context()
+    return lambda: run_sync(
+        handle_message(_message_update(4, "no thanks, maybe later"), context)
+    )
+
+
+# ---- dates ----
+
+DATE_TEXTS = [
+    "tomorrow at 3pm",
+    "April 20 at 10am",
+    "next friday at 11:30",
+    "el martes a las 4 de la tarde",
+    "21 de octubre a las 14:30",
+]
+
+
+@benchmark("dates.parse_fast")
+def bench_parse_fast():
+    from src.app.dates import normalize_date_text, parse_fast
+
+    now = datetime.datetime(2024, 3, 14, 9, 26)
+    texts = [normalize_date_text(text) for text in DATE_TEXTS]
+    return lambda: [parse_fast(text, now) for text in texts]
+
+
+@benchmark("dates.parse_date_cached")
+def bench_parse_date():
+    from src.app.dates import parse_date
+
+    return lambda: [parse_date(text) for text in DATE_TEXTS]
+
+
+# ---- intent routing ----
+
+ROUTED_TEXTS = [
+    "yes",
+    "I'd like to book something for next week",
+    "can you move my appointment",
+    "what time do you open on saturdays",
+    "What is the company's paper recycling policy?",
+]
+
+
+@benchmark("intents.predict")
+def bench_predict():
+    from src.app.intents import get_intent_classifier
+
+    classifier = get_intent_classifier()
+    return lambda: [classifier.predict(text) for text in ROUTED_TEXTS]
+
+
+# ---- calendar payloads ----
+
+
+@benchmark("google_calendar.event_body")
+def bench_event_body():
+    from src.google_calendar import _event_body
+
+    start_time = datetime.datetime(2024, 3, 14, 15, 30)
+    return lambda: _event_body(
+        "Appointment with Bench", "Benchmark", start_time, 30, user_id=42
+    )
+
+
+@benchmark("google_calendar.event_times")
+def bench_event_times():
+    from src.google_calendar import _event_times
+
+    start_time = datetime.datetime(2024, 3, 14, 15, 30)
+    return lambda: _event_times(start_time, 30)
+
+
+# ---- sessions ----
+
+
+@benchmark("sessions.get_5000_users")
+def bench_sessions():
+    from src.app.sessions import SessionStore
+
+    store = SessionStore(max_entries=5000)
+    for user_id in range(5000):
+        store.get(user_id)
+    user_ids = itertools.cycle(range(0, 5000, 7))
+    return lambda: store.get(next(user_ids))
+
+
+@benchmark("calendar_mirror.user_events")
+def bench_user_events():
+    from src.google_calendar import mirror
+
+    for user_id in range(100, 1100):
+        for event in _upcoming_events(user_id, 2):
+            mirror.apply(event)
+    user_ids = itertools.cycle(range(100, 1100, 13))
+    return lambda: mirror.user_events(next(user_ids))
+
+
+# ---- tracing ----
+
+
+@benchmark("tracing.trace_with_3_spans")
+def bench_tracing():
+    from src.tracing import annotate, span, trace
+
+    def traced_request():
+        with trace("bench", user_id=1):
+            annotate(state=0)
+            for name in ("intent", "parse_date", "availability"):
+                with span(name) as current:
+                    current.set(status=200)
+
+    return traced_request
+
+
+def measure(function, rounds):
+    """Per-call seconds of each round, after calibrating the calls per round"""
+    function()  # Warm caches and lazy imports
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        if time.perf_counter() - started >= MIN_ROUND_SECONDS:
+            break
+        iterations *= 2
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        samples.append((time.perf_counter() - started) / iterations)
+    return samples, iterations
+
+
+def run(pattern=None, rounds=20):
+    results = {}
+    # Handlers print every state change; that isn't what is being measured
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for name, setup in BENCHMARKS.items():
+            if pattern and pattern not in name:
+                continue
+            function = setup()
+            gc.collect()
+            samples, iterations = measure(function, rounds)
+            results[name] = {
+                "median_us": round(statistics.median(samples) * 1e6, 3),
+                "min_us": round(min(samples) * 1e6, 3),
+                "mean_us": round(statistics.mean(samples) * 1e6, 3),
+                "stddev_us": round(statistics.stdev(samples) * 1e6, 3),
+                "rounds": rounds,
+                "iterations": iterations,
+            }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline medians; returns the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':32} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:32} {'-':>12} {result['median_us']:>10.2f}us {'new':>7}")
+            continue
+        ratio = result["median_us"] / previous["median_us"]
+        limit = previous["median_us"] * threshold + NOISE_STDDEVS * previous.get(
+            "stddev_us", 0
+        )
+        regressed = result["median_us"] > limit
+        flag = "  REGRESSION" if regressed else ""
+        print(
+            f"{name:32} {previous['median_us']:>10.2f}us "
+            f"{result['median_us']:>10.2f}us {ratio:>6.2f}x{flag}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks of per-message code")
+    parser.add_argument("-k", dest="pattern", help="Only benchmarks containing this")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--save",
+        nargs="?",
+        const=BASELINE_PATH,
+        help="Write the results to this JSON baseline (default: the committed one)",
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=BASELINE_PATH,
+        help="Compare against this JSON baseline (default: the committed one)",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.rounds)
+    machine = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+    regressions = []
+    baseline = None
+    if args.compare:
+        if os.path.exists(args.compare):
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        else:
+            print(f"No baseline at {args.compare}; record one with --save on CI")
+    if baseline:
+        regressions = compare(results, baseline["benchmarks"], args.threshold)
+        if regressions and baseline.get("machine") != machine:
+            print(
+                f"Warning: {len(regressions)} benchmark(s) look slower, but the "
+                f"baseline was recorded on {baseline.get('machine')} and this is "
+                f"{machine}; not failing"
+            )
+            regressions = []
+    else:
+        for name, result in results.items():
+            print(
+                f"{name:32} {result['min_us']:>10.2f}us "
+                f"(median {result['median_us']:.2f}us, {result['iterations']} calls/round)"
+            )
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {"machine": machine, "benchmarks": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"Baseline written to {args.save}")
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) slower than {args.threshold}x "
+            f"baseline (+{NOISE_STDDEVS} stddev)"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
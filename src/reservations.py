@@ -0,0 +1,88 @@
+# reservations.py
+import asyncio
+import datetime
+import os
+import time
+from collections import namedtuple
+from src.availability import SLOT_MINUTES, is_slot_available, mark_busy
+
+# How long a confirmed slot is held for a user while they type their name
+LEASE_SECONDS = float(os.getenv("SLOT_LEASE_SECONDS", "300"))
+
+Lease = namedtuple("Lease", ["start", "end", "expires"])
+
+
+class SlotUnavailableError(Exception):
+    """The slot overlaps a booking or another user's lease"""
+
+
+class SlotReservations:
+    """Short-lived per-user leases on slots, so two users can't book overlapping times.
+
+    acquire() checks other leases and the calendar (mirror or free/busy index)
+    under one lock, so concurrent confirmations of the same slot are serialized
+    and only the first one wins. The lease is held until the event is created.
+    """
+
+    def __init__(self, lease_seconds=LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self._leases = {}  # user id -> Lease
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now):
+        for user_id in [
+            user_id
+            for user_id, lease in self._leases.items()
+            if lease.expires is not None and lease.expires <= now
+        ]:
+            del self._leases[user_id]
+
+    def _conflicts(self, user_id, start, end):
+        return any(
+            other != user_id and lease.start < end and start < lease.end
+            for other, lease in self._leases.items()
+        )
+
+    async def acquire(
+        self, user_id, start, duration_minutes=SLOT_MINUTES, exclude=None
+    ):
+        """Hold the slot for this user, replacing any lease they already had.
+
+        `exclude` is the (start, end) of the user's event being moved, if any.
+        """
+        end = start + datetime.timedelta(minutes=duration_minutes)
+        async with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if self._conflicts(user_id, start, end):
+                raise SlotUnavailableError("Slot is being booked by someone else")
+            if not await is_slot_available(start, duration_minutes, exclude=exclude):
+                raise SlotUnavailableError("Slot is already booked or closed")
+            self._leases[user_id] = Lease(start, end, now + self.lease_seconds)
+
+    async def commit(self, user_id, start, duration_minutes=SLOT_MINUTES, exclude=None):
+        """Pin the user's lease (re-acquiring it if it expired) before the event is created"""
+        async with self._lock:
+            self._expire(time.monotonic())
+            lease = self._leases.get(user_id)
+            if lease is not None and lease.start == start:
+                # No expiry while the calendar write is in flight
+                self._leases[user_id] = lease._replace(expires=None)
+                return
+        await self.acquire(user_id, start, duration_minutes, exclude)
+        async with self._lock:
+            lease = self._leases[user_id]
+            self._leases[user_id] = lease._replace(expires=None)
+
+    def complete(self, user_id):
+        """The event exists now: record it as busy and drop the lease"""
+        lease = self._leases.pop(user_id, None)
+        if lease is not None:
+            mark_busy(lease.start, int((lease.end - lease.start).total_seconds() // 60))
+
+    def release(self, user_id):
+        """Drop the user's lease without booking"""
+        self._leases.pop(user_id, None)
+
+
+reservations = SlotReservations()
@@ -151,7 +151,7 @@ async def handle_schedule_appointment(
     )  # Example: April 15, 3:00 pm
 
     try:
-        event_id = create_event(
+        event_id = await create_event(
             summary="Telegram client appointment",
             description=f"Scheduled by user {user_id} via bot",
             start_time=appointment_date,
@@ -177,7 +177,7 @@ async def handle_cancel_appointment(update: Update, context: ContextTypes.DEFAUL
 
     if event_id:
         try:
-            delete_event(event_id)
+            await delete_event(event_id)
             await query.edit_message_text(
                 "🗑️ Your appointment has been successfully canceled."
             )
@@ -208,7 +208,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         event_id = context_data.get("event_id")
         if event_id:
             try:
-                delete_event(event_id)
+                await delete_event(event_id)
                 context_data.clear()
                 await update.message.reply_text(
                     "🗑️ Your appointment has been successfully canceled."
@@ -231,7 +231,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if message in ["yes", "i confirm", "confirm", "ok"]:
             start_time = context_data["start_time"]
             name = update.effective_user.first_name or "Cliente"
-            event_id = create_event(
+            event_id = await create_event(
                 summary=f"Cita con {name}",
                 description="Cita agendada por CusChatAI",
                 start_time=start_time,
@@ -0,0 +1,273 @@
+# tracing.py
+"""Lightweight in-process tracing.
+
+A trace starts at an entry point (a Telegram handler) with trace() or
+@traced(); span() then times a stage inside it. The current span is kept in a
+contextvar, so spans nest across awaits and into tasks created inside a
+trace. span() outside a trace costs one contextvar lookup and records
+nothing, so instrumented code that also runs in the background (calendar
+sync, warm-up) doesn't create traces of its own.
+
+Finished traces go to an in-memory ring buffer (read by the admin endpoint)
+and, when TRACE_JSONL_PATH is set, to a JSONL file written by a background
+thread. Recording a span is a perf_counter call, a small object and a list
+append; serialization only happens when traces are read or exported.
+"""
+
+import functools
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to turn tracing off entirely
+TRACING = os.getenv("TRACING", "1") == "1"
+# Finished traces kept in memory for /admin/traces
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "1000"))
+# Optional file every finished trace is appended to, one JSON object per line
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH")
+# Spans kept per trace, so a long loop can't grow one trace without bound
+MAX_SPANS_PER_TRACE = 200
+
+_current = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+# Most recent finished traces, oldest first
+traces = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is being recorded"""
+
+    recording = False
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed stage; use as a context manager"""
+
+    __slots__ = (
+        "name",
+        "trace",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "started",
+        "duration",
+        "error",
+        "_token",
+    )
+    recording = True
+
+    def __init__(self, name, trace, parent_id, attributes):
+        self.name = name
+        self.trace = trace
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.started = None
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.trace.finish(self)
+        return False
+
+    def to_dict(self, origin):
+        record = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attributes:
+            record["attributes"] = self.attributes
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class Trace:
+    """The spans of one request; exported when its root span ends"""
+
+    __slots__ = ("trace_id", "root", "spans", "timestamp", "done")
+
+    def __init__(self):
+        self.trace_id = os.urandom(8).hex()
+        self.root = None
+        self.spans = []
+        self.timestamp = time.time()
+        self.done = False
+
+    def finish(self, span):
+        if self.done:
+            # A task started inside the trace outlived it
+            return
+        if span is self.root:
+            self.done = True
+            _export(self)
+        elif len(self.spans) < MAX_SPANS_PER_TRACE:
+            self.spans.append(span)
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+    def to_dict(self):
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": round(self.timestamp, 3),
+            **root.to_dict(root.started),
+            "spans": sorted(
+                (span.to_dict(root.started) for span in self.spans),
+                key=lambda span: span["offset_ms"],
+            ),
+        }
+
+
+def trace(name, **attributes):
+    """Start a trace (or, inside one already, a span) named `name`"""
+    if not TRACING:
+        return NOOP_SPAN
+    parent = _current.get()
+    if parent is not None:
+        return Span(name, parent.trace, parent.span_id, attributes)
+    new_trace = Trace()
+    new_trace.root = Span(name, new_trace, None, attributes)
+    return new_trace.root
+
+
+def span(name, **attributes):
+    """Time a stage of the current trace; records nothing outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace, parent.span_id, attributes)
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def traced(name=None):
+    """Decorator running an async function inside trace(name or its __name__)"""
+
+    def decorate(function):
+        trace_name = name or function.__name__
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with trace(trace_name):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class _JsonlWriter:
+    """Appends traces to a JSONL file from a daemon thread, off the event loop"""
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        threading.Thread(target=self.run, name="trace-writer", daemon=True).start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for finished in batch:
+                        f.write(json.dumps(finished.to_dict(), default=str) + "\n")
+            except Exception as e:
+                logger.error(f"Error writing traces to {self.path}: {e}")
+
+
+_writer = None
+
+
+def _export(finished):
+    global _writer
+    traces.append(finished)
+    if TRACE_JSONL_PATH:
+        if _writer is None:
+            _writer = _JsonlWriter(TRACE_JSONL_PATH)
+        _writer.queue.put(finished)
+
+
+def recent(limit=50, min_ms=0.0, name=None):
+    """Newest finished traces first, optionally only slow ones or one entry point"""
+    selected = []
+    for finished in reversed(traces):
+        if len(selected) >= limit:
+            break
+        if finished.duration * 1000 < min_ms:
+            continue
+        if name is not None and finished.root.name != name:
+            continue
+        selected.append(finished.to_dict())
+    return selected
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary():
+    """Per span name: count, errors and p50/p95/max duration over the buffered traces"""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for finished in list(traces):
+        for recorded in (finished.root, *finished.spans):
+            durations[recorded.name].append(recorded.duration * 1000)
+            if recorded.error:
+                errors[recorded.name] += 1
+    result = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        result[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "p50_ms": round(_percentile(values, 0.5), 3),
+            "p95_ms": round(_percentile(values, 0.95), 3),
+            "max_ms": round(values[-1], 3),
+        }
+    return result
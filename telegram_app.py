@@ -1,9 +1,21 @@
 # telegram_app.py
+import time
+
+# Measured before the imports below so the startup report covers them
+PROCESS_STARTED = time.perf_counter()
+
+import asyncio
+import hmac
 import logging
 import os
-import threading
-import time
-import requests
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from telegram import Update
+from telegram.request import BaseRequest, HTTPXRequest
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -16,6 +28,7 @@ from src.app.handlers import (
     start,
     handle_callback,
     handle_message,
+    admin_cancel_day,
     CHOOSING_ACTION,
     ENTERING_DATE,
     CONFIRMING_DATE,
@@ -23,8 +36,10 @@ from src.app.handlers import (
     SELECTING_EVENT,
     ENTERING_NEW_DATE,
 )
-from src.app.config import TELEGRAM_BOT_TOKEN
-from flask import Flask
+from src.app.config import TELEGRAM_BOT_TOKEN, CONCURRENT_UPDATES, start_warm_up
+from src.app.persistence import SQLitePersistence
+from src.google_calendar import calendar, mirror
+from src import tracing
 
 # Configure logging
 logging.basicConfig(
@@ -32,10 +47,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global variables
-telegram_app = None
-flask_app = Flask(__name__)  # Simple Flask app to keep service alive
-last_activity_time = time.time()
+PORT = int(os.environ.get("PORT", 10000))
+
+# Public base URL Telegram pushes updates to (webhook mode)
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+# Telegram echoes this in a header so forged webhook calls can be rejected
+# (required in webhook mode)
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+WEBHOOK_PATH = "/telegram"
+# "webhook" or "polling"; defaults to webhook when a public URL is configured
+BOT_MODE = os.environ.get("BOT_MODE", "webhook" if WEBHOOK_URL else "polling")
+# Bot API base URL, e.g. a local fake Telegram server ("http://127.0.0.1:8081/bot")
+TELEGRAM_API_BASE_URL = os.environ.get("TELEGRAM_API_BASE_URL")
+
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+# Bearer token required by the /admin endpoints (they are disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 # Service URL (useful for keep-alive)
 RENDER_SERVICE_URL = os.environ.get(
@@ -43,51 +71,86 @@ RENDER_SERVICE_URL = os.environ.get(
 )
 
 
-@flask_app.route("/")
-def home():
-    global last_activity_time
-    last_activity_time = time.time()
-    return "Bot server is running! Bot is using polling method, not webhook."
+async def keep_alive():
+    """Periodically ping our own service to prevent Render from hibernating (polling mode)"""
+    async with httpx.AsyncClient() as client:
+        while True:
+            # Sleep for 5 minutes between pings
+            await asyncio.sleep(300)
+            try:
+                response = await client.get(f"{RENDER_SERVICE_URL}/ping")
+                logger.info(f"Keep-alive ping sent. Status: {response.status_code}")
+            except Exception as e:
+                logger.error(f"Error in keep-alive function: {e}")
 
 
-@flask_app.route("/ping")
-def ping():
-    return "pong"
+class TracedRequest(BaseRequest):
+    """Bot API transport that records each call as a span of the current trace"""
 
+    def __init__(self, request):
+        self.wrapped = request
 
-def keep_alive():
-    """Periodically ping our own service to prevent Render from hibernating"""
-    while True:
-        try:
-            # Ping our own service every 5 minutes
-            response = requests.get(f"{RENDER_SERVICE_URL}/ping")
-            logger.info(f"Keep-alive ping sent. Status: {response.status_code}")
-        except Exception as e:
-            logger.error(f"Error in keep-alive function: {e}")
+    @property
+    def read_timeout(self):
+        return self.wrapped.read_timeout
+
+    async def initialize(self):
+        await self.wrapped.initialize()
+
+    async def shutdown(self):
+        await self.wrapped.shutdown()
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        with tracing.span(f"telegram.{url.rsplit('/', 1)[-1]}") as current:
+            status, payload = await self.wrapped.do_request(
+                url, method, request_data=request_data, **kwargs
+            )
+            current.set(status=status)
+            return status, payload
 
-        # Sleep for 5 minutes before next ping
-        time.sleep(300)
 
+async def on_startup(application):
+    """Start background workers once the event loop is running"""
+    mirror.start()
+    # RAG clients are built lazily; warm them up without delaying the bot
+    start_warm_up()
 
-def run_flask():
-    """Run the Flask app to keep the service alive"""
-    port = int(os.environ.get("PORT", 10000))
-    flask_app.run(host="0.0.0.0", port=port, threaded=True)
 
+async def on_shutdown(application):
+    """Stop background workers and close pooled HTTP connections when the bot stops"""
+    await mirror.stop()
+    await calendar.aclose()
 
-def run_bot():
-    """Initialize and run the Telegram bot with polling"""
-    global telegram_app
 
-    # Build the application with adjusted timeout settings
-    telegram_app = (
+def build_application(mode=BOT_MODE, persistence=True, request=None):
+    """Build the Telegram application with all handlers registered.
+
+    `request` replaces the HTTP transport to the Bot API (the load test passes
+    an in-process fake). Either way Bot API calls are traced.
+    """
+    if request is None:
+        request = HTTPXRequest(
+            connection_pool_size=256,  # PTB's default for the bot's own pool
+            connect_timeout=10.0,
+            read_timeout=10.0,
+            write_timeout=10.0,
+        )
+    builder = (
         ApplicationBuilder()
         .token(TELEGRAM_BOT_TOKEN)
-        .connect_timeout(10.0)
-        .read_timeout(10.0)
-        .write_timeout(10.0)
-        .build()
+        .request(TracedRequest(request))
+        # Slow LLM answers don't block other chats
+        .concurrent_updates(CONCURRENT_UPDATES)
     )
+    if mode == "webhook":
+        # Updates arrive through our own HTTP server
+        builder = builder.updater(None)
+    if TELEGRAM_API_BASE_URL:
+        builder = builder.base_url(TELEGRAM_API_BASE_URL)
+    if persistence:
+        # Survive restarts mid-booking
+        builder = builder.persistence(SQLitePersistence())
+    application = builder.build()
 
     # Define conversation handler
     conv_handler = ConversationHandler(
@@ -98,6 +161,7 @@ def run_bot():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message),
             ],
             ENTERING_DATE: [
+                CallbackQueryHandler(handle_callback),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message),
             ],
             CONFIRMING_DATE: [
@@ -110,42 +174,122 @@ def run_bot():
                 CallbackQueryHandler(handle_callback),
             ],
             ENTERING_NEW_DATE: [
+                CallbackQueryHandler(handle_callback),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message),
             ],
         },
         fallbacks=[CommandHandler("start", start)],
+        name="booking",
+        persistent=persistence,
     )
 
     # Add the conversation handler
-    telegram_app.add_handler(conv_handler)
+    application.add_handler(conv_handler)
+
+    # Admin commands
+    application.add_handler(CommandHandler("cancelday", admin_cancel_day))
 
     # Add a fallback handler for general messages
-    telegram_app.add_handler(
+    application.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
     )
+    return application
 
-    logger.info("Bot is running in polling mode...")
-
-    # Start polling with improved settings
-    telegram_app.run_polling(
-        drop_pending_updates=True,  # Don't process updates from when the bot was offline
-        allowed_updates=[
-            "message",
-            "callback_query",
-        ],  # Specify what updates to receive
-        poll_interval=1.0,  # Poll every 1 second
-        timeout=30,  # Timeout for long polling
-    )
 
+def create_web_app(application, mode=BOT_MODE):
+    """One ASGI app serving the Telegram webhook and the health endpoints"""
+    if mode == "webhook" and not WEBHOOK_SECRET:
+        # Without it anyone who finds the URL can post forged updates
+        raise RuntimeError("WEBHOOK_SECRET must be set in webhook mode")
 
-if __name__ == "__main__":
-    # Start the Flask app in a separate thread to keep the service alive
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
+    async def home(request: Request):
+        return PlainTextResponse(f"Bot server is running in {mode} mode.")
+
+    async def ping(request: Request):
+        return PlainTextResponse("pong")
+
+    async def admin_traces(request: Request):
+        """Recent traces and per-stage latency; ?limit=50&min_ms=0&name=handle_message"""
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+            return Response(status_code=403)
+        try:
+            limit = int(request.query_params.get("limit", 50))
+            min_ms = float(request.query_params.get("min_ms", 0))
+        except ValueError:
+            return PlainTextResponse("limit and min_ms must be numbers", 400)
+        return JSONResponse(
+            {
+                "summary": tracing.summary(),
+                "traces": tracing.recent(
+                    limit, min_ms, request.query_params.get("name")
+                ),
+            }
+        )
+
+    async def telegram_webhook(request: Request):
+        secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(secret.encode(), WEBHOOK_SECRET.encode()):
+            return Response(status_code=403)
+        update = Update.de_json(await request.json(), application.bot)
+        await application.update_queue.put(update)
+        return Response()
 
-    # Start the keep-alive pinger in another thread
-    keep_alive_thread = threading.Thread(target=keep_alive, daemon=True)
-    keep_alive_thread.start()
+    routes = [
+        Route("/", home),
+        Route("/ping", ping),
+        Route("/admin/traces", admin_traces),
+    ]
+    if mode == "webhook":
+        routes.append(Route(WEBHOOK_PATH, telegram_webhook, methods=["POST"]))
+    return Starlette(routes=routes)
 
-    # Run the Telegram bot in the main thread
-    run_bot()
+
+async def run_bot(mode=BOT_MODE):
+    """Run the bot and its HTTP server on a single event loop"""
+    application = build_application(mode)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_web_app(application, mode),
+            host="0.0.0.0",
+            port=PORT,
+            log_level="warning",
+        )
+    )
+
+    keep_alive_task = None
+    async with application:
+        await on_startup(application)
+        if mode == "webhook":
+            await application.bot.set_webhook(
+                url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                allowed_updates=ALLOWED_UPDATES,
+                secret_token=WEBHOOK_SECRET,
+            )
+            logger.info("Bot is running in webhook mode...")
+        else:
+            await application.updater.start_polling(
+                drop_pending_updates=False,  # Resume conversations with messages sent while offline
+                allowed_updates=ALLOWED_UPDATES,
+                poll_interval=1.0,  # Poll every 1 second
+                timeout=30,  # Timeout for long polling
+            )
+            keep_alive_task = asyncio.create_task(keep_alive())
+            logger.info("Bot is running in polling mode...")
+        await application.start()
+        logger.info(
+            f"Bot ready to answer in {time.perf_counter() - PROCESS_STARTED:.2f}s"
+        )
+        try:
+            # Serves until SIGINT/SIGTERM
+            await server.serve()
+        finally:
+            if keep_alive_task is not None:
+                keep_alive_task.cancel()
+                await application.updater.stop()
+            await application.stop()
+            await on_shutdown(application)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_bot())
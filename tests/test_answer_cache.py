@@ -0,0 +1,72 @@
+# tests/test_answer_cache.py
+import functools
+import os
+import numpy as np
+from src.app import answer_cache as cache_module
+from src.app.answer_cache import AnswerCache, key_terms, normalize_query
+
+
+def rotated(vector, similarity):
+    """A vector with exactly this cosine similarity to `vector` (a unit vector)"""
+    other = np.zeros_like(vector)
+    other[1] = 1.0
+    return similarity * vector + np.sqrt(1 - similarity**2) * other
+
+
+BASE = np.array([1.0, 0.0, 0.0, 0.0])
+
+
+def test_exact_and_similar_wordings_hit():
+    cache = AnswerCache()
+    cache.put("What are your hours on Saturday?", BASE, "9 to 2")
+    assert cache.get("what are your HOURS on saturday") == "9 to 2"
+    assert cache.get_similar(rotated(BASE, 0.99), "Open on saturdays?") == "9 to 2"
+    assert cache.get_similar(rotated(BASE, 0.99), "Saturday opening hours?") == (
+        "9 to 2"
+    )
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["semantic_hits"] == 2
+
+
+def test_near_misses_are_not_served():
+    cache = AnswerCache()
+    cache.put("What are your hours on Saturday?", BASE, "9 to 2")
+    # Close, but under the threshold
+    assert cache.get_similar(rotated(BASE, 0.96), "Hours on saturday?") is None
+    # Above the threshold, but about another day
+    assert cache.get_similar(rotated(BASE, 0.99), "Hours on sunday?") is None
+    assert cache.get_similar(rotated(BASE, 0.99), "Hours on domingo?") is None
+    assert cache.stats()["misses"] == 3
+
+
+def test_key_terms():
+    assert key_terms(normalize_query("Open on Sábado, 3 de mayo?")) == {
+        ("weekday", 5),
+        "3",
+        ("month", 5),
+    }
+    assert key_terms("hours on sat") == key_terms("hours on saturday")
+    assert key_terms("open sabados") == key_terms("open saturday")
+    assert key_terms("do you have parking") == set()
+
+
+def test_knowledge_base_changes_drop_cached_answers(tmp_path, monkeypatch):
+    document = tmp_path / "faq.md"
+    document.write_text("Open 9 to 2 on Saturdays")
+    monkeypatch.setattr(
+        cache_module,
+        "knowledge_base_version",
+        functools.partial(
+            cache_module.knowledge_base_version, tmp_path, tmp_path / "manifest.json"
+        ),
+    )
+    monkeypatch.setattr(cache_module, "KNOWLEDGE_BASE_CHECK_SECONDS", 0)
+    cache = AnswerCache()
+    cache.put("hours on saturday", BASE, "9 to 2")
+    assert cache.get("hours on saturday") == "9 to 2"
+
+    document.write_text("Open 10 to 3 on Saturdays")
+    stat = document.stat()
+    os.utime(document, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get("hours on saturday") is None
+    assert cache.get_similar(BASE, "hours on saturday") is None
@@ -0,0 +1,106 @@
+# tests/test_availability.py
+import asyncio
+import datetime
+import pytest
+import pytz
+from src import availability
+from src.availability import IntervalIndex, is_slot_available, next_free_slots, without
+
+TZ = pytz.timezone("America/Mexico_City")
+MONDAY = datetime.date(2030, 1, 7)
+NOW = TZ.localize(datetime.datetime(2030, 1, 1, 9, 0))
+
+
+def at(day, hour, minute=0):
+    return TZ.localize(datetime.datetime.combine(day, datetime.time(hour, minute)))
+
+
+def slot(day, hour, minute=0):
+    start = at(day, hour, minute)
+    return start, start + datetime.timedelta(minutes=30)
+
+
+def test_interval_index_merges_and_answers_overlaps():
+    index = IntervalIndex(
+        [slot(MONDAY, 10), slot(MONDAY, 10, 30), slot(MONDAY, 10, 15), slot(MONDAY, 14)]
+    )
+    assert len(index) == 2
+    assert index.overlaps(*slot(MONDAY, 10, 45))
+    assert not index.overlaps(*slot(MONDAY, 11))  # Touching the end is free
+    assert not index.overlaps(*slot(MONDAY, 13, 30))  # Touching the start is free
+    assert index.next_free(*slot(MONDAY, 10, 30)) == at(MONDAY, 11)
+    assert index.next_free(*slot(MONDAY, 12)) is None
+
+    index.add(*slot(MONDAY, 11))
+    index.add(at(MONDAY, 12), at(MONDAY, 14))
+    assert len(index) == 2
+    assert index.next_free(*slot(MONDAY, 10)) == at(MONDAY, 11, 30)
+    assert index.next_free(*slot(MONDAY, 12, 30)) == at(MONDAY, 14, 30)
+
+
+def test_free_slots_follow_business_hours():
+    saturday = MONDAY + datetime.timedelta(days=5)
+    slots = next_free_slots(IntervalIndex(), at(saturday, 14, 10), 3, TZ, now=NOW)
+    # The last Saturday slot ends at 15:00; Sunday is closed
+    assert slots == [
+        at(saturday, 14, 30),
+        at(saturday + datetime.timedelta(days=2), 10),
+        at(saturday + datetime.timedelta(days=2), 10, 30),
+    ]
+    assert next_free_slots(IntervalIndex(), at(MONDAY, 7), 1, TZ, now=NOW) == [
+        at(MONDAY, 10)
+    ]
+
+
+def test_fully_booked_day_moves_to_the_next_one():
+    index = IntervalIndex([(at(MONDAY, 9), at(MONDAY, 18))])
+    tuesday = MONDAY + datetime.timedelta(days=1)
+    assert next_free_slots(index, at(MONDAY, 10), 1, TZ, now=NOW) == [at(tuesday, 10)]
+
+
+def test_free_slots_are_never_in_the_past():
+    now = at(MONDAY, 12, 5)
+    slots = next_free_slots(IntervalIndex(), at(MONDAY, 10), 2, TZ, now=now)
+    assert slots == [at(MONDAY, 12, 30), at(MONDAY, 13)]
+
+
+def test_without_cuts_the_excluded_interval_out():
+    excluded = slot(MONDAY, 10)
+    assert without([slot(MONDAY, 10), slot(MONDAY, 11)], excluded) == [slot(MONDAY, 11)]
+    # Free/busy merged it with the next booking
+    assert without([(at(MONDAY, 10), at(MONDAY, 11))], excluded) == [
+        slot(MONDAY, 10, 30)
+    ]
+
+
+@pytest.fixture
+def busy(monkeypatch):
+    """Calendar stub answering free/busy queries from a list of (start, end)"""
+    intervals = []
+
+    async def get_busy_intervals(time_min, time_max):
+        return sorted(i for i in intervals if i[0] < time_max and i[1] > time_min)
+
+    monkeypatch.setattr(availability, "get_busy_intervals", get_busy_intervals)
+    monkeypatch.setattr(availability.mirror, "ready", False)
+    monkeypatch.setattr(availability, "_busy_index", None)
+    return intervals
+
+
+def test_past_starts_are_unavailable(busy):
+    now = datetime.datetime.now(TZ)
+    past = now.replace(minute=0, second=0, microsecond=0) - datetime.timedelta(days=7)
+    assert not asyncio.run(is_slot_available(past))
+
+
+def test_rescheduled_event_does_not_block_its_new_time(busy):
+    day = (datetime.datetime.now(TZ) + datetime.timedelta(days=7)).date()
+    while day.weekday() not in range(5):
+        day += datetime.timedelta(days=1)
+    current = slot(day, 10)
+    busy.extend([current, slot(day, 11)])
+
+    assert not asyncio.run(is_slot_available(at(day, 10, 15)))
+    assert asyncio.run(is_slot_available(at(day, 10, 15), exclude=current))
+    # Other bookings still count
+    assert not asyncio.run(is_slot_available(at(day, 10, 45), exclude=current))
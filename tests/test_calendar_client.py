@@ -0,0 +1,155 @@
+# tests/test_calendar_client.py
+import asyncio
+import json
+import httpx
+import pytest
+from src.calendar_client import (
+    BATCH_LIMIT,
+    AsyncCalendarClient,
+    BatchOperation,
+    CalendarConflictError,
+    CalendarError,
+)
+
+BASE_URL = "https://calendar.test/calendar/v3"
+
+
+def make_client(handler):
+    client = AsyncCalendarClient("team@example.com", base_url=BASE_URL)
+    client._client = httpx.AsyncClient(
+        base_url=BASE_URL, transport=httpx.MockTransport(handler)
+    )
+    return client
+
+
+def batch_response(request, status_for=lambda index: 200):
+    """Answer a multipart batch request the way Google does, items out of order"""
+    boundary = request.headers["Content-Type"].split("boundary=", 1)[1]
+    items = [
+        part
+        for part in request.content.decode().split(f"--{boundary}")
+        if "Content-ID" in part
+    ]
+    parts = []
+    for index in reversed(range(len(items))):
+        status = status_for(index)
+        body = json.dumps({"id": f"event{index}"}) if status == 200 else ""
+        parts.append(
+            "\r\n".join(
+                [
+                    "--response_boundary",
+                    "Content-Type: application/http",
+                    f"Content-ID: <response-item{index}>",
+                    "",
+                    f"HTTP/1.1 {status} Status",
+                    "Content-Type: application/json",
+                    "",
+                    body,
+                ]
+            )
+        )
+    return httpx.Response(
+        200,
+        headers={"Content-Type": "multipart/mixed; boundary=response_boundary"},
+        content=("\r\n".join(parts) + "\r\n--response_boundary--\r\n").encode(),
+    )
+
+
+def test_412_raises_conflict():
+    def handler(request):
+        assert request.headers["If-Match"] == '"1"'
+        return httpx.Response(
+            412, json={"error": {"code": 412, "message": "Precondition Failed"}}
+        )
+
+    client = make_client(handler)
+    with pytest.raises(CalendarConflictError) as raised:
+        asyncio.run(client.patch_event("abc", {"summary": "x"}, etag='"1"'))
+    assert raised.value.status_code == 412
+    assert raised.value.message == "Precondition Failed"
+
+
+def test_other_errors_are_not_conflicts():
+    client = make_client(lambda request: httpx.Response(404, text="Not Found"))
+    with pytest.raises(CalendarError) as raised:
+        asyncio.run(client.get_event("abc"))
+    assert not isinstance(raised.value, CalendarConflictError)
+    assert raised.value.status_code == 404
+
+
+def test_delete_returns_none_on_204():
+    client = make_client(lambda request: httpx.Response(204))
+    assert asyncio.run(client.delete_event("abc")) is None
+
+
+def test_batch_splits_at_limit():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        assert request.url.path == "/batch/calendar/v3"
+        return batch_response(request)
+
+    client = make_client(handler)
+    operations = [
+        BatchOperation("DELETE", f"{client.events_path}/e{i}")
+        for i in range(BATCH_LIMIT * 2 + 1)
+    ]
+    results = asyncio.run(client.batch(operations))
+
+    sizes = [request.content.decode().count("Content-ID") for request in requests]
+    assert sizes == [BATCH_LIMIT, BATCH_LIMIT, 1]
+    assert len(results) == len(operations)
+    assert all(result.ok for result in results)
+
+
+def test_batch_request_format():
+    captured = []
+
+    def handler(request):
+        captured.append(request.content.decode())
+        return batch_response(request)
+
+    client = make_client(handler)
+    asyncio.run(
+        client.batch(
+            [
+                BatchOperation(
+                    "PATCH",
+                    f"{client.events_path}/e1",
+                    {"summary": "moved"},
+                    {"If-Match": '"7"'},
+                )
+            ]
+        )
+    )
+    lines = captured[0].split("\r\n")
+    assert "Content-ID: <item0>" in lines
+    assert "PATCH /calendar/v3/calendars/team%40example.com/events/e1 HTTP/1.1" in lines
+    assert 'If-Match: "7"' in lines
+    assert '{"summary": "moved"}' in lines
+
+
+def test_batch_results_follow_operation_order():
+    client = make_client(
+        lambda request: batch_response(
+            request, status_for=lambda index: 412 if index == 1 else 200
+        )
+    )
+    operations = [
+        BatchOperation("DELETE", f"{client.events_path}/e{i}") for i in range(3)
+    ]
+    results = asyncio.run(client.batch(operations))
+
+    assert [result.status_code for result in results] == [200, 412, 200]
+    assert results[0].body == {"id": "event0"}
+    assert results[1].body is None
+    assert not results[1].ok
+
+
+def test_batch_request_failure_raises():
+    client = make_client(lambda request: httpx.Response(401, text="Unauthorized"))
+    with pytest.raises(CalendarError):
+        asyncio.run(
+            client.batch([BatchOperation("DELETE", f"{client.events_path}/e1")])
+        )
@@ -0,0 +1,181 @@
+# tests/test_calendar_mirror.py
+import asyncio
+import datetime
+import pytest
+import pytz
+from src.calendar_client import BatchResult, CalendarError
+from src.calendar_mirror import CalendarMirror
+
+TZ = pytz.timezone("America/Mexico_City")
+USER_PROPERTY = "telegram_user_id"
+
+
+def event(event_id, user_id, days=1, updated="2026-01-01T00:00:00.000Z", **fields):
+    start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=days)
+    return {
+        "id": event_id,
+        "status": "confirmed",
+        "updated": updated,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + datetime.timedelta(minutes=30)).isoformat()},
+        "extendedProperties": {"private": {USER_PROPERTY: str(user_id)}},
+        **fields,
+    }
+
+
+class FakeClient:
+    """Replays list_events pages; an exception in the list is raised instead"""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.calls = []
+
+    async def list_events(self, **params):
+        self.calls.append(params)
+        page = self.pages.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+
+def mirror_for(client):
+    return CalendarMirror(client, TZ, USER_PROPERTY)
+
+
+def test_full_sync_follows_pages_and_keeps_sync_token():
+    client = FakeClient(
+        {"items": [event("a", 1)], "nextPageToken": "p2"},
+        {"items": [event("b", 1, days=2)], "nextSyncToken": "s1"},
+    )
+    mirror = mirror_for(client)
+    assert asyncio.run(mirror.sync()) == 2
+
+    assert "syncToken" not in client.calls[0]
+    assert client.calls[1]["pageToken"] == "p2"
+    assert mirror.ready
+    assert [e["id"] for e in mirror.user_events(1)] == ["a", "b"]
+
+
+def test_incremental_sync_applies_changes_and_deletions():
+    client = FakeClient(
+        {"items": [event("a", 1), event("b", 2)], "nextSyncToken": "s1"},
+        {
+            "items": [
+                {"id": "a", "status": "cancelled"},
+                event("c", 2, days=3),
+            ],
+            "nextSyncToken": "s2",
+        },
+    )
+    mirror = mirror_for(client)
+
+    async def scenario():
+        await mirror.sync()
+        await mirror.sync()
+
+    asyncio.run(scenario())
+    assert client.calls[1]["syncToken"] == "s1"
+    assert mirror.user_events(1) == []
+    assert [e["id"] for e in mirror.user_events(2)] == ["b", "c"]
+    assert mirror._sync_token == "s2"
+
+
+def test_expired_sync_token_runs_full_resync():
+    client = FakeClient(
+        {"items": [event("a", 1), event("b", 1)], "nextSyncToken": "s1"},
+        CalendarError(410, "Sync token is no longer valid"),
+        {"items": [event("b", 1)], "nextSyncToken": "s9"},
+    )
+    mirror = mirror_for(client)
+
+    async def scenario():
+        await mirror.sync()
+        return await mirror.sync()
+
+    assert asyncio.run(scenario()) == 1
+    assert client.calls[1]["syncToken"] == "s1"
+    assert "syncToken" not in client.calls[2]
+    # "a" was deleted while the token was stale; the resync dropped it
+    assert [e["id"] for e in mirror.user_events(1)] == ["b"]
+    assert mirror._sync_token == "s9"
+
+
+def test_410_without_sync_token_is_raised():
+    mirror = mirror_for(FakeClient(CalendarError(410, "Gone")))
+    with pytest.raises(CalendarError):
+        asyncio.run(mirror.sync())
+    assert not mirror.ready
+
+
+def test_stale_copy_does_not_overwrite_newer_write():
+    mirror = mirror_for(FakeClient())
+    mirror.apply(event("a", 1, updated="2026-01-02T00:00:00.000Z", summary="new"))
+    mirror.apply(event("a", 1, updated="2026-01-01T00:00:00.000Z", summary="old"))
+    assert mirror.user_events(1)[0]["summary"] == "new"
+
+
+def test_busy_intervals_and_past_events():
+    mirror = mirror_for(FakeClient())
+    mirror.apply(event("past", 1, days=-1))
+    mirror.apply(event("soon", 1, days=1))
+    now = datetime.datetime.now(datetime.timezone.utc)
+    busy = mirror.busy_intervals(now, now + datetime.timedelta(days=7))
+    assert len(busy) == 1
+    assert mirror.user_events(1)[0]["id"] == "soon"
+
+
+def test_legacy_events_are_indexed_by_description():
+    mirror = mirror_for(FakeClient())
+    legacy = event("old", 0, description="Scheduled by user 42 via CusChatAI bot")
+    del legacy["extendedProperties"]
+    mirror.apply(legacy)
+    mirror.apply(event("new", 42, days=2))
+    assert [e["id"] for e in mirror.user_events(42)] == ["old", "new"]
+
+    mirror.discard("old")
+    assert [e["id"] for e in mirror.user_events(42)] == ["new"]
+
+
+def legacy_event(event_id, description, days=1):
+    legacy = event(event_id, 0, days=days, description=description)
+    del legacy["extendedProperties"]
+    return legacy
+
+
+def test_rescheduled_legacy_events_are_indexed_by_description():
+    mirror = mirror_for(FakeClient())
+    mirror.apply(legacy_event("moved", "Edited by user 42 via CusChatAI bot"))
+    mirror.apply(legacy_event("other", "Edited by user 7 via CusChatAI bot", 2))
+    assert [e["id"] for e in mirror.user_events(42)] == ["moved"]
+
+
+def test_backfill_tags_rescheduled_legacy_events(monkeypatch):
+    from src import google_calendar
+
+    events = [
+        legacy_event("booked", "Scheduled by user 42 via CusChatAI bot"),
+        legacy_event("moved", "Edited by user 43 via CusChatAI bot", 2),
+    ]
+    sent = []
+
+    async def list_events_between(time_min, time_max):
+        return events
+
+    async def batch(operations):
+        sent.extend(operations)
+        return [BatchResult(200, None) for _ in operations]
+
+    monkeypatch.setattr(google_calendar, "list_events_between", list_events_between)
+    monkeypatch.setattr(google_calendar.calendar, "calendar_id", "team@example.com")
+    monkeypatch.setattr(google_calendar.calendar, "batch", batch)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tagged, _ = asyncio.run(
+        google_calendar.backfill_user_ids(now, now + datetime.timedelta(days=7))
+    )
+    assert [e["id"] for e in tagged] == ["booked", "moved"]
+    owners = [
+        operation.body["extendedProperties"]["private"][USER_PROPERTY]
+        for operation in sent
+    ]
+    assert owners == ["42", "43"]
@@ -0,0 +1,100 @@
+# tests/test_config.py
+import logging
+import threading
+import time
+from src.app import config
+from src.app.config import lazy
+
+
+def test_lazy_builds_once_across_threads(monkeypatch):
+    timings = {}
+    monkeypatch.setattr(config, "STARTUP_TIMINGS", timings)
+    calls = []
+    barrier = threading.Barrier(8)
+
+    @lazy
+    def get_component():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.01)  # Other threads arrive while it is being built
+        return object()
+
+    results = []
+
+    def use():
+        barrier.wait()
+        results.append(get_component())
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert timings["get_component"] >= 0.01
+    assert get_component.__name__ == "get_component"
+
+
+def test_lazy_retries_after_a_failed_build(monkeypatch):
+    monkeypatch.setattr(config, "STARTUP_TIMINGS", {})
+    attempts = []
+
+    @lazy
+    def get_flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("Pinecone is down")
+        return "ready"
+
+    try:
+        get_flaky()
+    except RuntimeError:
+        pass
+    assert get_flaky() == "ready"
+    assert len(attempts) == 2
+
+
+def stub_components(monkeypatch, built, query_engine=None):
+    import src.app.dates
+    import src.app.faq
+    import src.app.intents
+
+    def builder(name):
+        return lambda: built.append(name)
+
+    monkeypatch.setattr(src.app.dates, "warm_up_date_parser", builder("dates"))
+    monkeypatch.setattr(src.app.intents, "get_intent_classifier", builder("intents"))
+    monkeypatch.setattr(src.app.faq, "get_faq_matcher", builder("faq"))
+    monkeypatch.setattr(
+        config, "get_query_engine", query_engine or builder("query_engine")
+    )
+
+
+def test_warm_up_builds_every_component(monkeypatch):
+    built = []
+    stub_components(monkeypatch, built)
+    config.warm_up()
+    assert built == ["dates", "intents", "faq", "query_engine"]
+
+
+def test_warm_up_logs_failures_instead_of_raising(monkeypatch, caplog):
+    def broken():
+        raise RuntimeError("no OPENAI_API_KEY")
+
+    stub_components(monkeypatch, [], query_engine=broken)
+    with caplog.at_level(logging.ERROR, logger=config.__name__):
+        config.warm_up()
+    assert "no OPENAI_API_KEY" in caplog.text
+
+
+def test_start_warm_up_runs_in_the_background(monkeypatch):
+    done = threading.Event()
+    monkeypatch.setattr(config, "warm_up", done.set)
+    monkeypatch.setattr(config, "WARM_UP", True)
+    config.start_warm_up()
+    assert done.wait(1)
+
+    done.clear()
+    monkeypatch.setattr(config, "WARM_UP", False)
+    config.start_warm_up()
+    assert not done.wait(0.05)
@@ -0,0 +1,60 @@
+# tests/test_dates.py
+import datetime
+import pytest
+from src.app.dates import normalize_date_text, parse_fast
+
+# A Thursday morning
+NOW = datetime.datetime(2024, 3, 14, 9, 26)
+TOMORROW = datetime.date(2024, 3, 15)
+
+
+def parse(text):
+    return parse_fast(normalize_date_text(text), NOW)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        # Hours 1-7 without am/pm are afternoon times
+        ("tomorrow at 3", datetime.time(15, 0)),
+        ("tomorrow at 3:30", datetime.time(15, 30)),
+        ("tomorrow at 7.45", datetime.time(19, 45)),
+        ("mañana a las 4:15", datetime.time(16, 15)),
+        ("mañana a las 3h30", datetime.time(15, 30)),
+        # Unless a meridiem, a period or a zero-padded 24-hour time says otherwise
+        ("tomorrow at 3:30am", datetime.time(3, 30)),
+        ("tomorrow at 3:30 in the morning", datetime.time(3, 30)),
+        ("tomorrow at 03:30", datetime.time(3, 30)),
+        ("tomorrow at 3:30pm", datetime.time(15, 30)),
+        ("mañana a las 3:30 de la tarde", datetime.time(15, 30)),
+        # 8 and later are taken as written
+        ("tomorrow at 8:30", datetime.time(8, 30)),
+        ("tomorrow at 11:00", datetime.time(11, 0)),
+        ("tomorrow at 14:30", datetime.time(14, 30)),
+        ("tomorrow at noon", datetime.time(12, 0)),
+    ],
+)
+def test_time_of_day(text, expected):
+    assert parse(text) == datetime.datetime.combine(TOMORROW, expected)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("April 20 at 10am", datetime.datetime(2024, 4, 20, 10, 0)),
+        ("21 de octubre a las 14:30", datetime.datetime(2024, 10, 21, 14, 30)),
+        ("next friday at 11:30", datetime.datetime(2024, 3, 15, 11, 30)),
+        ("el martes a las 4 de la tarde", datetime.datetime(2024, 3, 19, 16, 0)),
+        ("at 3:30", datetime.datetime(2024, 3, 14, 15, 30)),
+        ("2024-05-01 at 9:15", datetime.datetime(2024, 5, 1, 9, 15)),
+    ],
+)
+def test_dates(text, expected):
+    assert parse(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text", ["tomorrow at 25:00", "tomorrow at 13pm", "February 30 at 10am", "20"]
+)
+def test_invalid_or_ambiguous(text):
+    assert parse(text) is None
@@ -0,0 +1,104 @@
+# tests/test_embedding_cache.py
+import asyncio
+import threading
+from typing import Any
+import numpy as np
+import pytest
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from src.app.embedding_cache import CachedEmbedding, EmbeddingStore, embedding_key
+
+VECTOR = [0.5, -1.25, 0.003, 2.0, -0.75]
+
+
+class CountingEmbedding(BaseEmbedding):
+    """Embeds a text as its length repeated, counting the texts it saw"""
+
+    _calls: Any = PrivateAttr(default_factory=list)
+
+    @property
+    def calls(self):
+        return self._calls
+
+    def _embed(self, text):
+        self._calls.append(text)
+        return [float(len(text))] * 3
+
+    def _get_text_embedding(self, text):
+        return self._embed(text)
+
+    def _get_query_embedding(self, query):
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._embed(query)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "embeddings.sqlite3")
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 0), ("int8", 2.0 / 254)])
+def test_vectors_round_trip_through_disk(path, dtype, tolerance):
+    EmbeddingStore(path, dtype=dtype).put_many([("k", VECTOR)])
+    reopened = EmbeddingStore(path, dtype=dtype)
+    found = reopened.get_many(["k", "other"])
+    assert list(found) == ["k"]
+    assert np.allclose(found["k"], VECTOR, rtol=0, atol=tolerance + 1e-7)
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+
+def test_recent_vectors_are_served_from_the_hot_tier(path):
+    store = EmbeddingStore(path, hot_entries=2)
+    store.put_many([("a", VECTOR), ("b", VECTOR), ("c", VECTOR)])
+    store.get_many(["b", "c"])
+    assert store.stats()["hot_hits"] == 2
+    # "a" was evicted from memory but is still on disk
+    store.get_many(["a"])
+    assert store.stats()["disk_hits"] == 1
+    assert store.stats()["hot_entries"] == 2
+
+
+def test_texts_are_only_embedded_once_per_model(path):
+    model = CountingEmbedding(model_name="small")
+    cached = CachedEmbedding(model, store=EmbeddingStore(path))
+    assert cached.get_text_embedding_batch(["hi", "hello", "hi"]) == [
+        [2.0] * 3,
+        [5.0] * 3,
+        [2.0] * 3,
+    ]
+    assert cached.get_query_embedding("hello") == [5.0] * 3
+    assert model.calls == ["hi", "hello"]
+
+    # Another model never reuses these vectors
+    other = CountingEmbedding(model_name="large")
+    CachedEmbedding(other, store=cached.store).get_query_embedding("hello")
+    assert other.calls == ["hello"]
+    assert embedding_key("small", "hello") != embedding_key("large", "hello")
+
+
+def test_async_lookups_run_off_the_event_loop(path):
+    store = EmbeddingStore(path)
+    threads = []
+    get_many = store.get_many
+
+    def recording_get_many(keys):
+        threads.append(threading.current_thread())
+        return get_many(keys)
+
+    store.get_many = recording_get_many
+    model = CountingEmbedding(model_name="small")
+    cached = CachedEmbedding(model, store=store)
+
+    async def scenario():
+        first = await cached.aget_query_embedding("hello")
+        second = await cached.aget_text_embedding_batch(["hello", "hey"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == [5.0] * 3
+    assert second == [[5.0] * 3, [3.0] * 3]
+    assert model.calls == ["hello", "hey"]
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,113 @@
+# tests/test_faq.py
+import pytest
+from src.app.faq import FAQMatcher, load_faq_pairs
+
+# Held-out rewordings of FAQ questions (none of them appear in the FAQ files)
+PARAPHRASES = {
+    "how do i cancel an order": "How do I cancel my order?",
+    "Can I cancel my order?": "How do I cancel my order?",
+    "how can I reset my password": "How do I reset my password?",
+    "where can I track my order?": "How can I track my order?",
+    "what's your return policy": "What is your return policy?",
+    "how do I request a refund for my order": "How do I request a refund?",
+    "which payment methods do you accept": "What payment methods do you accept?",
+    "how long does shipping usually take?": "How long does shipping take?",
+    "is there parking at your office?": "Do you have parking at your office?",
+    "how do I redeem my loyalty points": "How do I redeem loyalty points?",
+    "do you offer expedited shipping options": "Do you offer expedited shipping?",
+    "how can I unsubscribe from your marketing emails": (
+        "How do I unsubscribe from marketing emails?"
+    ),
+    "do you have eco friendly paper": "Do you provide eco-friendly paper options?",
+    "where is Dunder Mifflin located": "Where is Dunder Mifflin located?",
+    "how do I check the status of my refund": (
+        "How can I check the status of my refund?"
+    ),
+    "do you ship internationally?": "Do you ship internationally?",
+    "how can I apply for a job": "How can I apply for a job at Dunder Mifflin?",
+    "are you open on public holidays?": "Are you open on holidays?",
+    "what payment methods are accepted": "What payment methods do you accept?",
+    "do you have a rewards program": "Do you have a loyalty or rewards program?",
+    "can I use a promotional code": "How do I apply a promotional code?",
+    "how do I subscribe to the newsletter": "How can I subscribe to your newsletter?",
+    "do you sell colored paper?": "Do you sell colored paper?",
+    "do you offer gift wrapping for orders": "Do you offer gift wrapping?",
+}
+
+# Questions that share most words with a FAQ entry but ask something else
+NEAR_MISSES = [
+    "How do I cancel my subscription?",
+    "How do I cancel my appointment?",
+    "How do I reset my router?",
+    "Can I cancel my meeting with a sales representative?",
+    "How long does a refund take?",
+    "How can I subscribe to your podcast?",
+    "What happens if an employee is out sick?",
+    "Do you sell printers?",
+    "What is your dress code?",
+    "How do I change my appointment?",
+    "What is your policy on pets in the office?",
+    "Do you offer catering?",
+    "How much does a consultation cost?",
+    "Do you have a mobile app?",
+    "How do I delete my account?",
+    "Do you offer gift baskets?",
+    "How do I track my appointment?",
+    "What is your cancellation fee for appointments?",
+    "Can I place an order for lunch?",
+    "How quickly can I get an appointment?",
+]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return FAQMatcher(load_faq_pairs())
+
+
+@pytest.fixture(scope="module")
+def answers():
+    return dict(load_faq_pairs())
+
+
+# Share of PARAPHRASES answered from the FAQ at the default threshold; the
+# rest fall through to RAG, which is slower but not wrong
+MIN_RECALL = 0.8
+
+
+def test_paraphrases_get_the_faq_answer(matcher, answers):
+    answered = 0
+    for message, question in PARAPHRASES.items():
+        answer, score = matcher.match(message)
+        if answer is not None:
+            assert answer == answers[question], (message, score)
+            answered += 1
+    assert answered / len(PARAPHRASES) >= MIN_RECALL
+
+
+@pytest.mark.parametrize("message", NEAR_MISSES)
+def test_near_misses_go_to_rag(matcher, message):
+    answer, score = matcher.match(message)
+    assert answer is None, score
+
+
+def test_runner_up_margin(answers):
+    pairs = [
+        ("Do you offer gift cards?", "Yes"),
+        ("Do you offer gift wrapping?", "No"),
+    ]
+    matcher = FAQMatcher(pairs, threshold=0.3, margin=0.1)
+    assert matcher.match("do you offer gift cards")[0] == "Yes"
+    # Equally close to both entries
+    assert matcher.match("do you offer gift")[0] is None
+
+
+def test_unknown_words_lower_the_score(matcher):
+    _, known = matcher.match("How do I cancel my order?")
+    _, unknown = matcher.match("How do I cancel my subscription?")
+    assert known == pytest.approx(1.0)
+    assert unknown < 0.5
+
+
+def test_message_without_known_words(matcher):
+    assert matcher.match("hmm")[0] is None
+    assert matcher.match("")[0] is None
@@ -0,0 +1,85 @@
+# tests/test_google_calendar.py
+import asyncio
+import datetime
+import pytz
+from src import google_calendar
+from src.calendar_client import BatchResult
+
+
+def test_backfill_tags_only_untagged_legacy_events(monkeypatch):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = {"dateTime": (now + datetime.timedelta(days=1)).isoformat()}
+    end = {"dateTime": (now + datetime.timedelta(days=1, hours=1)).isoformat()}
+    events = [
+        {
+            "id": "legacy",
+            "description": "Scheduled by user 42 via CusChatAI bot",
+            "start": start,
+            "end": end,
+        },
+        {
+            "id": "tagged",
+            "description": "Scheduled by user 7 via CusChatAI bot",
+            "extendedProperties": {"private": {google_calendar.USER_ID_PROPERTY: "7"}},
+            "start": start,
+            "end": end,
+        },
+        {"id": "manual", "description": "Dentist", "start": start, "end": end},
+    ]
+    sent = []
+
+    async def list_events_between(time_min, time_max):
+        return events
+
+    async def batch(operations):
+        sent.extend(operations)
+        return [BatchResult(200, None) for _ in operations]
+
+    monkeypatch.setattr(google_calendar, "list_events_between", list_events_between)
+    monkeypatch.setattr(google_calendar.calendar, "calendar_id", "team@example.com")
+    monkeypatch.setattr(google_calendar.calendar, "batch", batch)
+
+    tagged, results = asyncio.run(
+        google_calendar.backfill_user_ids(now, now + datetime.timedelta(days=7))
+    )
+    assert [event["id"] for event in tagged] == ["legacy"]
+    assert len(results) == 1
+    (operation,) = sent
+    assert operation.method == "PATCH"
+    assert operation.path.endswith("/events/legacy")
+    assert operation.body == {
+        "extendedProperties": {"private": {google_calendar.USER_ID_PROPERTY: "42"}}
+    }
+
+
+def test_cancel_day_skips_events_running_over_from_the_day_before(monkeypatch):
+    tz = pytz.timezone(google_calendar.TIMEZONE)
+    day = datetime.date(2026, 4, 20)
+
+    def local(hour, day_offset=0):
+        moment = datetime.datetime.combine(
+            day + datetime.timedelta(days=day_offset), datetime.time(hour)
+        )
+        return {"dateTime": tz.localize(moment).isoformat()}
+
+    events = [
+        {"id": "overnight", "start": local(23, -1), "end": local(1)},
+        {"id": "morning", "start": local(9), "end": local(10)},
+    ]
+    deleted = []
+
+    async def list_events_between(time_min, time_max):
+        return events
+
+    async def batch_delete_events(event_ids):
+        deleted.extend(event_ids)
+        return [BatchResult(204, None) for _ in event_ids]
+
+    monkeypatch.setattr(google_calendar, "list_events_between", list_events_between)
+    monkeypatch.setattr(google_calendar, "batch_delete_events", batch_delete_events)
+
+    listed = asyncio.run(google_calendar.list_day_events(day))
+    canceled, _ = asyncio.run(google_calendar.cancel_day(day))
+    assert [event["id"] for event in listed] == ["morning"]
+    assert canceled == listed
+    assert deleted == ["morning"]
@@ -0,0 +1,119 @@
+# tests/test_idempotency.py
+import asyncio
+import itertools
+from types import SimpleNamespace
+from src.app.idempotency import Idempotency
+
+_ids = itertools.count(1)
+
+
+def tap(data, user_id=1, message_id=10):
+    user = SimpleNamespace(id=user_id)
+    return SimpleNamespace(
+        update_id=next(_ids),
+        callback_query=SimpleNamespace(
+            id=str(next(_ids)),
+            data=data,
+            from_user=user,
+            message=SimpleNamespace(message_id=message_id),
+        ),
+    )
+
+
+def test_redelivered_update_is_duplicate():
+    idempotency = Idempotency()
+    update = tap("agendar")
+    assert not idempotency.is_duplicate_update(update)
+    assert idempotency.is_duplicate_update(update)
+
+
+def test_double_tap_is_duplicate():
+    idempotency = Idempotency()
+    assert not idempotency.is_duplicate_update(tap("cancelar"))
+    assert idempotency.is_duplicate_update(tap("cancelar"))
+
+
+def test_same_button_after_back_is_a_new_tap():
+    idempotency = Idempotency()
+    assert not idempotency.is_duplicate_update(tap("cancelar"))
+    assert not idempotency.is_duplicate_update(tap("back_to_menu"))
+    assert not idempotency.is_duplicate_update(tap("cancelar"))
+
+
+def test_taps_on_other_messages_or_users_are_independent():
+    idempotency = Idempotency()
+    assert not idempotency.is_duplicate_update(tap("cancelar"))
+    assert not idempotency.is_duplicate_update(tap("cancelar", message_id=11))
+    assert not idempotency.is_duplicate_update(tap("cancelar", user_id=2))
+
+
+def test_run_once_shares_in_flight_result():
+    idempotency = Idempotency()
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return f"event{len(calls)}"
+
+    async def scenario():
+        return await asyncio.gather(
+            idempotency.run_once(("create", 1), create, keep_result=False),
+            idempotency.run_once(("create", 1), create, keep_result=False),
+        )
+
+    assert asyncio.run(scenario()) == ["event1", "event1"]
+    assert len(calls) == 1
+
+
+def test_run_once_without_keep_result_runs_again_later():
+    idempotency = Idempotency()
+    calls = []
+
+    async def create():
+        calls.append(1)
+        return f"event{len(calls)}"
+
+    async def scenario():
+        first = await idempotency.run_once(("create", 1), create, keep_result=False)
+        # e.g. the event was canceled and the same slot is booked again
+        second = await idempotency.run_once(("create", 1), create, keep_result=False)
+        return first, second
+
+    assert asyncio.run(scenario()) == ("event1", "event2")
+
+
+def test_run_once_keeps_result_by_default():
+    idempotency = Idempotency()
+    calls = []
+
+    async def delete():
+        calls.append(1)
+        return True
+
+    async def scenario():
+        await idempotency.run_once(("cancel", "e1"), delete)
+        await idempotency.run_once(("cancel", "e1"), delete)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_failures_are_not_remembered():
+    idempotency = Idempotency()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("Calendar down")
+        return "ok"
+
+    async def scenario():
+        try:
+            await idempotency.run_once(("create", 1), flaky)
+        except RuntimeError:
+            pass
+        return await idempotency.run_once(("create", 1), flaky)
+
+    assert asyncio.run(scenario()) == "ok"
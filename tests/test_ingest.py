@@ -0,0 +1,126 @@
+# tests/test_ingest.py
+import asyncio
+import functools
+import json
+import pytest
+from src.app import ingest as ingest_module
+from src.app.ingest import chunk_id, ingest
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.nodes = {}
+
+    def add(self, nodes):
+        for node in nodes:
+            assert node.embedding is not None
+            self.nodes[node.id_] = node
+
+    def delete_nodes(self, node_ids):
+        for node_id in node_ids:
+            del self.nodes[node_id]
+
+    def clear(self):
+        self.nodes.clear()
+
+    def persist(self):
+        pass
+
+
+class FakeEmbedModel:
+    def __init__(self):
+        self.texts = []
+
+    async def aget_text_embedding_batch(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    manifest = str(tmp_path / "index" / "manifest.json")
+    store = FakeVectorStore()
+    embed_model = FakeEmbedModel()
+    monkeypatch.setattr(
+        ingest_module,
+        "load_chunks",
+        functools.partial(ingest_module.load_chunks, directory),
+    )
+    monkeypatch.setattr(
+        ingest_module,
+        "load_manifest",
+        functools.partial(ingest_module.load_manifest, manifest),
+    )
+    monkeypatch.setattr(
+        ingest_module,
+        "save_manifest",
+        functools.partial(ingest_module.save_manifest, path=manifest),
+    )
+    monkeypatch.setattr(ingest_module, "get_vector_store", lambda: store)
+    monkeypatch.setattr(ingest_module, "get_embed_model", lambda: embed_model)
+    return directory, store, embed_model
+
+
+def write_faq(path, *pairs):
+    path.write_text(
+        json.dumps({"faq": [{"question": q, "answer": a} for q, a in pairs]})
+    )
+
+
+def test_chunk_id_covers_metadata():
+    assert chunk_id("a.md", "text", {"x": 1}) == chunk_id("a.md", "text", {"x": 1})
+    assert chunk_id("a.md", "text", {"x": 1}) != chunk_id("a.md", "text", {"x": 2})
+    assert chunk_id("a.md", "text") != chunk_id("b.md", "text")
+
+
+def test_incremental_ingest(knowledge_base):
+    directory, store, embed_model = knowledge_base
+    write_faq(directory / "faq.json", ("Parking?", "Yes"), ("Wifi?", "Free"))
+    page = directory / "services.md"
+    page.write_text("---\ncategory: hair\n---\nHaircuts take 30 minutes.")
+    old_text = directory / "old.md"
+    old_text.write_text("We used to sell gift cards.")
+
+    def run():
+        embed_model.texts.clear()
+        return asyncio.run(ingest())
+
+    assert run() == (4, 0)
+    assert len(store.nodes) == 4
+
+    # Unchanged: nothing is embedded
+    assert run() == (0, 0)
+    assert embed_model.texts == []
+
+    # Added and changed FAQ pairs; the unchanged one is kept
+    write_faq(
+        directory / "faq.json",
+        ("Parking?", "Yes"),
+        ("Wifi?", "Free, ask for the password"),
+        ("Pets?", "No"),
+    )
+    assert run() == (2, 1)
+    assert sorted(embed_model.texts) == [
+        "Q: Pets?\nA: No",
+        "Q: Wifi?\nA: Free, ask for the password",
+    ]
+
+    # Only the frontmatter changed: the chunk is re-embedded with new metadata
+    page.write_text("---\ncategory: beauty\n---\nHaircuts take 30 minutes.")
+    assert run() == (1, 1)
+    [services] = [
+        n for n in store.nodes.values() if n.metadata["source"] == "services.md"
+    ]
+    assert services.metadata["category"] == "beauty"
+
+    # Deleted file: its chunk is removed from the index
+    old_text.unlink()
+    assert run() == (0, 1)
+    assert sorted(n.metadata["source"] for n in store.nodes.values()) == [
+        "faq.json",
+        "faq.json",
+        "faq.json",
+        "services.md",
+    ]
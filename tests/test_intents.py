@@ -0,0 +1,96 @@
+# tests/test_intents.py
+import asyncio
+import itertools
+from types import SimpleNamespace
+import pytest
+from src.app import handlers
+from src.app.intents import (
+    BOOKING,
+    CANCEL,
+    DENY,
+    EDIT,
+    FAQ,
+    HOURS,
+    IntentClassifier,
+    training_examples,
+)
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier(training_examples())
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # Collide with cancel/edit/deny but are FAQ questions
+        "Can I cancel my order?",
+        "I'd like to cancel my order",
+        "I want to change my password",
+        "how can I change my password?",
+        "can I change my order",
+        "thanks",
+        "thank you so much",
+        "muchas gracias",
+        "ok thanks",
+        "ok, thank you",
+        "okay thank you so much",
+        "ok perfect thanks",
+        "ok gracias",
+        "How do I cancel my subscription?",
+    ],
+)
+def test_faq_questions_are_not_actions(classifier, message):
+    intent, confidence = classifier.predict(message)
+    assert intent == FAQ, (intent, confidence)
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("cancel my appointment please", CANCEL),
+        ("can you cancel my booking for tomorrow", CANCEL),
+        ("I need to move my appointment to friday", EDIT),
+        ("I want to change my appointment", EDIT),
+        ("I'd like to book an appointment", BOOKING),
+        ("what are your hours on sunday", HOURS),
+        ("no thanks", DENY),
+    ],
+)
+def test_actions_still_route(classifier, message, expected):
+    intent, confidence = classifier.predict(message)
+    assert intent == expected, (intent, confidence)
+
+
+_ids = itertools.count(1)
+
+
+def test_faq_answer_wins_over_a_guessed_action(monkeypatch):
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    async def classify(message):
+        # What the model answered before FAQ-labeled negatives were added
+        return CANCEL, 0.71
+
+    async def prompt_event_choice(*args):
+        raise AssertionError("Routed to the cancel flow")
+
+    async def match_faq(message):
+        return "You can cancel an order within 24 hours."
+
+    monkeypatch.setattr(handlers, "classify", classify)
+    monkeypatch.setattr(handlers, "prompt_event_choice", prompt_event_choice)
+    monkeypatch.setattr(handlers, "match_faq", match_faq)
+    update = SimpleNamespace(
+        update_id=next(_ids),
+        callback_query=None,
+        effective_user=SimpleNamespace(id=next(_ids), first_name="Ana"),
+        message=SimpleNamespace(text="Can I cancel my order?", reply_text=reply_text),
+    )
+    state = asyncio.run(handlers.handle_message(update, SimpleNamespace(user_data={})))
+    assert state == handlers.CHOOSING_ACTION
+    assert replies == ["You can cancel an order within 24 hours."]
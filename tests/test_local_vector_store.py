@@ -0,0 +1,102 @@
+# tests/test_local_vector_store.py
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import (
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+)
+from src.app import local_vector_store as store_module
+from src.app.local_vector_store import LocalVectorStore
+
+DIMENSIONS = 16
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    """400 vectors in 20 well separated clusters"""
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(20, DIMENSIONS))
+    return np.vstack(
+        [center + 0.05 * rng.normal(size=(20, DIMENSIONS)) for center in centers]
+    )
+
+
+def nodes_for(vectors):
+    return [
+        TextNode(
+            id_=f"n{i}",
+            text=f"chunk {i}",
+            metadata={"source": "faq.json" if i % 2 else "services.md"},
+            embedding=vector.tolist(),
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def search(store, vector, top_k=5, **kwargs):
+    query = VectorStoreQuery(
+        query_embedding=list(vector), similarity_top_k=top_k, **kwargs
+    )
+    return store.query(query).ids
+
+
+def test_ivf_search_agrees_with_exact_search(vectors):
+    exact = LocalVectorStore(ivf_min_vectors=10000)
+    ivf = LocalVectorStore(ivf_min_vectors=100, nprobe=3)
+    exact.add(nodes_for(vectors))
+    ivf.add(nodes_for(vectors))
+
+    rng = np.random.default_rng(7)
+    recall = []
+    for i in rng.choice(len(vectors), 50, replace=False):
+        query = vectors[i] + 0.01 * rng.normal(size=DIMENSIONS)
+        expected = search(exact, query)
+        found = search(ivf, query)
+        assert expected[0] == f"n{i}"
+        assert found[0] == f"n{i}"
+        recall.append(len(set(expected) & set(found)) / len(expected))
+    assert ivf._centroids is not None  # The IVF path was actually used
+    assert np.mean(recall) >= 0.95
+
+
+def test_filters_deletes_and_replacements(vectors):
+    store = LocalVectorStore()
+    store.add(nodes_for(vectors[:10]))
+    only_faq = MetadataFilters(filters=[MetadataFilter(key="source", value="faq.json")])
+    found = search(store, vectors[0], top_k=3, filters=only_faq)
+    assert len(found) == 3
+    assert all(int(node_id[1:]) % 2 for node_id in found)
+
+    store.delete_nodes(["n0"])
+    assert "n0" not in search(store, vectors[0])
+    # Re-adding an id replaces its row instead of duplicating it
+    store.add(nodes_for(vectors[:2])[1:])
+    assert len(store) == 9
+
+
+def test_persisted_store_is_memory_mapped_and_reloaded(tmp_path, vectors, monkeypatch):
+    writer = LocalVectorStore(persist_dir=str(tmp_path))
+    writer.add(nodes_for(vectors[:50]))
+    writer.persist()
+
+    reader = LocalVectorStore(persist_dir=str(tmp_path))
+    assert isinstance(reader._matrix, np.memmap)
+    assert search(reader, vectors[7]) == search(writer, vectors[7])
+    assert (
+        reader.query(
+            VectorStoreQuery(query_embedding=list(vectors[7]), similarity_top_k=1)
+        )
+        .nodes[0]
+        .get_content()
+        == "chunk 7"
+    )
+
+    # Another process (ingestion) rewrites the index
+    monkeypatch.setattr(store_module, "RELOAD_CHECK_SECONDS", 0)
+    writer.delete_nodes(["n7"])
+    writer.persist()
+    reader._loaded_mtime -= 1  # The rewrite may land within the mtime resolution
+    assert "n7" not in search(reader, vectors[7])
+    assert len(reader) == 49
@@ -0,0 +1,74 @@
+# tests/test_persistence.py
+import asyncio
+import datetime
+import pytest
+from src.app import persistence
+from src.app.persistence import SQLitePersistence
+from src.app.sessions import EventRef, SessionStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(persistence, "sessions", store)
+    monkeypatch.setattr(persistence, "WRITE_DELAY_SECONDS", 0.01)
+    return store
+
+
+def test_round_trip_through_the_batched_writer(tmp_path, store, monkeypatch):
+    path = str(tmp_path / "state.sqlite3")
+    start = datetime.datetime(2026, 4, 20, 10, 0)
+
+    async def write():
+        saved = SQLitePersistence(path)
+        await saved.update_user_data(1, {"state": 3})
+        await saved.update_user_data(2, {"state": 1})
+        await saved.update_conversation("main", (1, 1), 3)
+        session = store.get(1)
+        session.start_time = start
+        session.client_name = "Ana"
+        session.events = [EventRef("e1", "2026-04-20T10:00:00-06:00", "Cut", '"1"')]
+        # The background write runs after WRITE_DELAY_SECONDS, in one batch
+        await asyncio.sleep(0.05)
+        rows = saved._db.execute("SELECT COUNT(*) FROM user_data").fetchone()[0]
+        # Changes after the batch are only written by flush()
+        await saved.drop_user_data(2)
+        await saved.update_conversation("main", (2, 2), 1)
+        await saved.flush()
+        return rows
+
+    assert asyncio.run(write()) == 2
+
+    restored_sessions = SessionStore()
+    monkeypatch.setattr(persistence, "sessions", restored_sessions)
+
+    async def read():
+        loaded = SQLitePersistence(path)
+        return (
+            await loaded.get_user_data(),
+            await loaded.get_conversations("main"),
+        )
+
+    user_data, conversations = asyncio.run(read())
+    assert user_data == {1: {"state": 3}}
+    assert conversations == {(1, 1): 3, (2, 2): 1}
+    assert 1 in restored_sessions
+    session = restored_sessions.get(1)
+    assert session.start_time == start
+    assert session.client_name == "Ana"
+    assert session.events == [EventRef("e1", "2026-04-20T10:00:00-06:00", "Cut", '"1"')]
+
+
+def test_conversation_end_is_deleted(tmp_path, store):
+    path = str(tmp_path / "state.sqlite3")
+
+    async def scenario():
+        saved = SQLitePersistence(path)
+        await saved.update_conversation("main", (1, 1), 2)
+        await saved.flush()
+        saved = SQLitePersistence(path)
+        await saved.update_conversation("main", (1, 1), None)
+        await saved.flush()
+        return await SQLitePersistence(path).get_conversations("main")
+
+    assert asyncio.run(scenario()) == {}
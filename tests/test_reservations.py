@@ -0,0 +1,110 @@
+# tests/test_reservations.py
+import asyncio
+import datetime
+import pytest
+from src import reservations as reservations_module
+from src.reservations import SlotReservations, SlotUnavailableError
+
+SLOT = datetime.datetime(2026, 4, 20, 10, 0, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def booked(monkeypatch):
+    """Stub calendar: a list of booked (start, end), checked after a short await"""
+    intervals = []
+
+    async def is_slot_available(start, duration_minutes=30, exclude=None):
+        # Yield like the real free/busy lookup, so requests interleave
+        await asyncio.sleep(0.001)
+        end = start + datetime.timedelta(minutes=duration_minutes)
+        return not any(s < end and start < e for s, e in intervals)
+
+    def mark_busy(start, duration_minutes=30):
+        intervals.append((start, start + datetime.timedelta(minutes=duration_minutes)))
+
+    monkeypatch.setattr(reservations_module, "is_slot_available", is_slot_available)
+    monkeypatch.setattr(reservations_module, "mark_busy", mark_busy)
+    return intervals
+
+
+async def book(slots, user_id, start=SLOT):
+    await slots.acquire(user_id, start)
+    await asyncio.sleep(0)  # User types their name
+    await slots.commit(user_id, start)
+    slots.complete(user_id)
+    return user_id
+
+
+def outcomes(results):
+    winners = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, Exception)]
+    return winners, rejected
+
+
+def test_concurrent_bookings_of_one_slot_have_one_winner(booked):
+    slots = SlotReservations()
+
+    async def scenario():
+        return await asyncio.gather(
+            *(book(slots, user_id) for user_id in range(50)), return_exceptions=True
+        )
+
+    winners, rejected = outcomes(asyncio.run(scenario()))
+    assert len(winners) == 1
+    assert len(rejected) == 49
+    assert all(isinstance(error, SlotUnavailableError) for error in rejected)
+    assert booked == [(SLOT, SLOT + datetime.timedelta(minutes=30))]
+
+
+def test_overlapping_slots_conflict(booked):
+    slots = SlotReservations()
+    half_past = SLOT + datetime.timedelta(minutes=15)
+
+    async def scenario():
+        return await asyncio.gather(
+            book(slots, 1, SLOT), book(slots, 2, half_past), return_exceptions=True
+        )
+
+    winners, rejected = outcomes(asyncio.run(scenario()))
+    assert len(winners) == 1 and len(rejected) == 1
+
+
+def test_distinct_slots_all_succeed(booked):
+    slots = SlotReservations()
+
+    async def scenario():
+        return await asyncio.gather(
+            *(
+                book(slots, user_id, SLOT + datetime.timedelta(minutes=30 * user_id))
+                for user_id in range(10)
+            )
+        )
+
+    assert sorted(asyncio.run(scenario())) == list(range(10))
+    assert len(booked) == 10
+
+
+def test_expired_lease_frees_the_slot(booked):
+    slots = SlotReservations(lease_seconds=0)
+
+    async def scenario():
+        await slots.acquire(1, SLOT)
+        # User 1 walked away; their lease expired immediately
+        await book(slots, 2)
+        with pytest.raises(SlotUnavailableError):
+            await slots.commit(1, SLOT)
+
+    asyncio.run(scenario())
+
+
+def test_release_frees_the_slot(booked):
+    slots = SlotReservations()
+
+    async def scenario():
+        await slots.acquire(1, SLOT)
+        with pytest.raises(SlotUnavailableError):
+            await slots.acquire(2, SLOT)
+        slots.release(1)
+        await slots.acquire(2, SLOT)
+
+    asyncio.run(scenario())
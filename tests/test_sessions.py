@@ -0,0 +1,69 @@
+# tests/test_sessions.py
+import datetime
+from src.app import sessions as sessions_module
+from src.app.sessions import EventRef, Session, SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def patch_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions_module.time, "monotonic", clock)
+    return clock
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = SessionStore(max_entries=2)
+    store.get(1)
+    store.get(2)
+    store.get(1)  # 2 is now the least recently used
+    store.get(3)
+    assert 1 in store and 3 in store
+    assert 2 not in store
+    assert len(store) == 2
+
+
+def test_idle_sessions_expire(monkeypatch):
+    clock = patch_clock(monkeypatch)
+    store = SessionStore(ttl=60)
+    store.get(1).client_name = "Ana"
+    clock.now += 30
+    assert store.get(1).client_name == "Ana"
+    clock.now += 60
+    # Expired: a fresh session replaces it
+    assert store.get(1).client_name is None
+    store.get(2)
+    clock.now += 61
+    store.get(3)
+    assert 1 not in store and 2 not in store
+
+
+def test_dirty_sessions_are_drained_once():
+    store = SessionStore(max_entries=1)
+    first = store.get(1)
+    assert store.drain_dirty() == {1: first}
+    assert store.drain_dirty() == {}
+    store.get(1)
+    # 1 is evicted before it is saved again; None tells persistence to delete it
+    second = store.get(2)
+    assert store.drain_dirty() == {1: None, 2: second}
+    store.reset(2)
+    assert list(store.drain_dirty()) == [2]
+
+
+def test_session_dict_round_trip():
+    session = Session()
+    session.events = [EventRef("e1", "2026-04-20T10:00:00-06:00", "Cut", '"1"')]
+    session.start_time = datetime.datetime(2026, 4, 20, 10, 0)
+    session.edit_event_index = 0
+    restored = Session.from_dict(session.to_dict())
+    assert restored.events == session.events
+    assert restored.start_time == session.start_time
+    assert restored.edit_event_index == 0
+    assert restored.client_name is None
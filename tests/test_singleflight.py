@@ -0,0 +1,94 @@
+# tests/test_singleflight.py
+import asyncio
+import pytest
+from src.app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def operation(listeners):
+        runs.append(len(listeners))
+        await asyncio.sleep(0.01)
+        for listener in listeners:
+            listener("done")
+        return "answer"
+
+    async def scenario():
+        heard = []
+        results = await asyncio.gather(
+            *(flights.do("q", operation, heard.append) for _ in range(3))
+        )
+        return results, heard
+
+    results, heard = asyncio.run(scenario())
+    assert results == ["answer"] * 3
+    assert runs == [1]
+    assert heard == ["done"] * 3
+    assert flights.stats()["calls"] == 3
+    assert flights.stats()["saved"] == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_leader_exception_reaches_followers():
+    flights = SingleFlight("test")
+
+    async def operation(listeners):
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(
+            flights.do("q", operation),
+            flights.do("q", operation),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def operation(listeners):
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return len(runs)
+
+    async def scenario():
+        leader = asyncio.create_task(flights.do("q", operation))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.do("q", operation)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    # One follower reruns the operation and the other shares its result
+    assert asyncio.run(scenario()) == [2, 2]
+    assert len(runs) == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_cancelled_follower_leaves_the_computation_running():
+    flights = SingleFlight("test")
+
+    async def operation(listeners):
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.create_task(flights.do("q", operation))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("q", operation))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(scenario()) == "answer"
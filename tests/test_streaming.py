@@ -0,0 +1,121 @@
+# tests/test_streaming.py
+import asyncio
+import datetime
+import pytest
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest, RetryAfter
+from src.app.streaming import CURSOR, PLACEHOLDER, StreamingReply
+
+
+class FakeSent:
+    """A sent message; edit_text raises the queued errors first"""
+
+    def __init__(self, errors=()):
+        self.edits = []
+        self.errors = list(errors)
+
+    async def edit_text(self, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.edits.append(text)
+
+
+class FakeMessage:
+    def __init__(self, errors=()):
+        self.replies = []
+        self.sent = FakeSent(errors)
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+        return self.sent
+
+
+def text_of(words):
+    return " ".join(f"word{i}" for i in range(words))
+
+
+def test_edits_are_rate_limited():
+    message = FakeMessage()
+    reply = StreamingReply(message, interval=10)
+
+    async def scenario():
+        for words in range(1, 40):
+            await reply.push(text_of(words))
+
+    asyncio.run(scenario())
+    # Only the placeholder went out: every push came within the interval
+    assert message.replies == [PLACEHOLDER]
+    assert message.sent.edits == []
+
+
+def test_partial_answers_are_shown_with_a_cursor():
+    message = FakeMessage()
+    reply = StreamingReply(message, interval=0)
+
+    async def scenario():
+        await reply.push("Hi")  # Too few new characters to bother
+        await reply.push(text_of(10))
+        await reply.push(text_of(10) + "!")
+        await reply.finish(text_of(12))
+
+    asyncio.run(scenario())
+    assert message.sent.edits == [text_of(10) + CURSOR, text_of(12)]
+    assert reply.edits == 2
+
+
+def test_final_text_lands_despite_flood_control():
+    message = FakeMessage(
+        errors=[RetryAfter(datetime.timedelta(seconds=0.01)), RetryAfter(0.01)]
+    )
+    reply = StreamingReply(message, interval=10)
+
+    async def scenario():
+        await reply.start()
+        await reply.finish("The full answer")
+
+    asyncio.run(scenario())
+    assert message.sent.edits == ["The full answer"]
+
+
+def test_unmodified_text_counts_as_edited():
+    message = FakeMessage(errors=[BadRequest("Message is not modified")])
+    reply = StreamingReply(message, interval=0)
+
+    async def scenario():
+        await reply.start()
+        await reply.finish(PLACEHOLDER)
+
+    asyncio.run(scenario())
+    assert reply.edits == 1
+
+
+def test_other_edit_errors_propagate():
+    message = FakeMessage(errors=[BadRequest("Message to edit not found")])
+    reply = StreamingReply(message, interval=0)
+
+    async def scenario():
+        await reply.start()
+        await reply.finish("answer")
+
+    with pytest.raises(BadRequest):
+        asyncio.run(scenario())
+
+
+def test_long_answers_are_split():
+    limit = MessageLimit.MAX_TEXT_LENGTH
+    text = "a" * limit + "b" * 10
+    streamed = FakeMessage()
+    direct = FakeMessage()
+
+    async def scenario():
+        reply = StreamingReply(streamed, interval=0)
+        await reply.push(text)
+        await reply.finish(text)
+        # Never started (cached or FAQ answer): plain replies
+        await StreamingReply(direct).finish(text)
+
+    asyncio.run(scenario())
+    assert streamed.sent.edits[0] == "a" * (limit - len(CURSOR)) + CURSOR
+    assert streamed.sent.edits[-1] == "a" * limit
+    assert streamed.replies == [PLACEHOLDER, "b" * 10]
+    assert direct.replies == ["a" * limit, "b" * 10]
@@ -0,0 +1,59 @@
+# tests/test_telegram_app.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from starlette.testclient import TestClient
+import telegram_app
+
+SECRET = "s3cret-token"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 5, "type": "private"},
+        "from": {"id": 5, "is_bot": False, "first_name": "Ana"},
+        "text": "hi",
+    },
+}
+
+
+@pytest.fixture
+def application():
+    return SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+
+
+def webhook_client(application, monkeypatch, secret=SECRET):
+    monkeypatch.setattr(telegram_app, "WEBHOOK_SECRET", secret)
+    return TestClient(telegram_app.create_web_app(application, mode="webhook"))
+
+
+def test_webhook_mode_requires_a_secret(application, monkeypatch):
+    with pytest.raises(RuntimeError):
+        webhook_client(application, monkeypatch, secret=None)
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "no"}])
+def test_webhook_rejects_missing_or_wrong_secret(application, monkeypatch, headers):
+    client = webhook_client(application, monkeypatch)
+    response = client.post(telegram_app.WEBHOOK_PATH, json=UPDATE, headers=headers)
+    assert response.status_code == 403
+    assert application.update_queue.empty()
+
+
+def test_webhook_queues_update_with_the_right_secret(application, monkeypatch):
+    client = webhook_client(application, monkeypatch)
+    response = client.post(
+        telegram_app.WEBHOOK_PATH,
+        json=UPDATE,
+        headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+    )
+    assert response.status_code == 200
+    assert application.update_queue.get_nowait().message.text == "hi"
+
+
+def test_polling_mode_has_no_webhook_route(application, monkeypatch):
+    monkeypatch.setattr(telegram_app, "WEBHOOK_SECRET", None)
+    client = TestClient(telegram_app.create_web_app(application, mode="polling"))
+    assert client.post(telegram_app.WEBHOOK_PATH, json=UPDATE).status_code == 404
+    assert client.get("/ping").text == "pong"
@@ -0,0 +1,112 @@
+# tests/test_tracing.py
+import asyncio
+import collections
+import json
+import time
+import pytest
+from src import tracing
+from src.tracing import NOOP_SPAN, annotate, recent, span, summary, trace, traced
+
+
+@pytest.fixture(autouse=True)
+def buffer(monkeypatch):
+    traces = collections.deque(maxlen=3)
+    monkeypatch.setattr(tracing, "traces", traces)
+    monkeypatch.setattr(tracing, "TRACE_JSONL_PATH", None)
+    return traces
+
+
+def test_spans_nest_under_their_parent(buffer):
+    with trace("handle_message", user_id=1) as root:
+        annotate(state=2)
+        with span("intent") as intent:
+            with span("faq") as faq:
+                faq.set(hit=True)
+        with span("rag"):
+            pass
+
+    [finished] = buffer
+    record = finished.to_dict()
+    assert record["name"] == "handle_message"
+    assert record["attributes"] == {"user_id": 1, "state": 2}
+    spans = {recorded["name"]: recorded for recorded in record["spans"]}
+    assert spans["intent"]["parent_id"] == root.span_id
+    assert spans["faq"]["parent_id"] == intent.span_id
+    assert spans["faq"]["attributes"] == {"hit": True}
+    assert spans["rag"]["parent_id"] == root.span_id
+    assert faq.duration <= intent.duration <= root.duration
+
+
+def test_spans_follow_awaits_and_tasks(buffer):
+    async def stage(name):
+        with span(name):
+            await asyncio.sleep(0)
+
+    @traced()
+    async def handler():
+        await asyncio.gather(stage("a"), stage("b"))
+
+    asyncio.run(handler())
+    [finished] = buffer
+    assert finished.root.name == "handler"
+    assert sorted(recorded.name for recorded in finished.spans) == ["a", "b"]
+    assert {recorded.parent_id for recorded in finished.spans} == {
+        finished.root.span_id
+    }
+
+
+def test_nothing_is_recorded_outside_a_trace(buffer, monkeypatch):
+    assert span("calendar_sync") is NOOP_SPAN
+    annotate(ignored=True)
+    monkeypatch.setattr(tracing, "TRACING", False)
+    assert trace("handle_message") is NOOP_SPAN
+    assert not buffer
+
+
+def test_errors_are_recorded_and_reraised(buffer):
+    with pytest.raises(ValueError):
+        with trace("handle_callback"):
+            with span("calendar"):
+                raise ValueError("boom")
+    [finished] = buffer
+    assert finished.root.error == "ValueError"
+    assert finished.spans[0].error == "ValueError"
+    assert summary()["calendar"]["errors"] == 1
+
+
+def test_ring_buffer_and_span_cap_are_bounded(buffer, monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_SPANS_PER_TRACE", 5)
+    for i in range(10):
+        with trace("handle_message", n=i):
+            for _ in range(20):
+                with span("loop"):
+                    pass
+    assert len(buffer) == 3
+    assert [finished.root.attributes["n"] for finished in buffer] == [7, 8, 9]
+    assert all(len(finished.spans) == 5 for finished in buffer)
+    assert summary()["loop"]["count"] == 15
+
+
+def test_recent_filters_by_name_and_duration(buffer):
+    with trace("start"):
+        pass
+    with trace("handle_message"):
+        time.sleep(0.02)
+    assert [record["name"] for record in recent()] == ["handle_message", "start"]
+    assert [record["name"] for record in recent(name="start")] == ["start"]
+    assert [record["name"] for record in recent(min_ms=10)] == ["handle_message"]
+    assert len(recent(limit=1)) == 1
+
+
+def test_traces_are_exported_as_jsonl(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_JSONL_PATH", str(path))
+    monkeypatch.setattr(tracing, "_writer", None)
+    with trace("start", user_id=5):
+        pass
+    for _ in range(100):
+        if path.exists() and path.read_text().endswith("\n"):
+            break
+        time.sleep(0.01)
+    [line] = path.read_text().splitlines()
+    assert json.loads(line)["attributes"] == {"user_id": 5}